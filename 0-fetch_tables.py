@@ -1,6 +1,8 @@
 import requests
 from bs4 import BeautifulSoup
 
+from table_index import write_index
+
 # Add a global counter for failed requests at the top
 failed_requests = 0
 
@@ -292,6 +294,28 @@ html_content += "  <button id=\"expand-all-tables\">Expand All Tables</button>\n
 html_content += "  <button id=\"collapse-all-tables\">Collapse All Tables</button>\n"
 html_content += "</div>\n"
 
+# Byte offsets [start, end] of every table container in the output file, saved to the sidecar index
+container_offsets = []
+offset = len(html_content.encode("utf-8"))
+
+
+def add_container(table_html):
+    global html_content, offset
+    container = "<div class=\"table-container\">\n"
+    container += f"<h3>Table number: {len(container_offsets)}</h3>\n"
+    container += "<div class=\"table-buttons\">\n"
+    container += "<button class=\"expand-rows-btn\">Expand All Rows</button>\n"
+    container += "<button class=\"collapse-rows-btn\">Collapse All Rows</button>\n"
+    container += "<button class=\"collapse-table-btn\">Collapse Table</button>\n"
+    container += "<button class=\"expand-table-btn\">Expand Table</button>\n"
+    container += "</div>\n"
+    container += table_html + "\n</div>"
+    size = len(container.encode("utf-8"))
+    container_offsets.append([offset, offset + size])
+    html_content += container + "\n"
+    offset += size + 1
+
+
 # Add containers for tables fetched from URLs
 index_counter = 0
 for table in all_tables:
@@ -300,38 +324,25 @@ for table in all_tables:
         tr["class"] = tr.get("class", []) + ["eaip-row"]
     # Ensure table has eaip-table class
     table["class"] = table.get("class", []) + ["eaip-table"]
-    html_content += "<div class=\"table-container\">\n"
-    html_content += f"<h3>Table number: {index_counter}</h3>\n"
-    html_content += "<div class=\"table-buttons\">\n"
-    html_content += "  <button class=\"expand-rows-btn\">Expand All Rows</button>\n"
-    html_content += "  <button class=\"collapse-rows-btn\">Collapse All Rows</button>\n"
-    html_content += "  <button class=\"collapse-table-btn\">Collapse Table</button>\n"
-    html_content += "  <button class=\"expand-table-btn\">Expand Table</button>\n"
-    html_content += "</div>\n"
-    html_content += str(table) + "\n</div>\n"
+    add_container(str(table))
     index_counter += 1
 
 # Fetch AD-2.17 tables from fetch_ad_tables() and append them in the same style
 ad_tables = fetch_ad_tables()
 for ad_table in ad_tables:
-    html_content += "<div class=\"table-container\">\n"
-    html_content += f"<h3>Table number: {index_counter}</h3>\n"
-    html_content += "<div class=\"table-buttons\">\n"
-    html_content += "  <button class=\"expand-rows-btn\">Expand All Rows</button>\n"
-    html_content += "  <button class=\"collapse-rows-btn\">Collapse All Rows</button>\n"
-    html_content += "  <button class=\"collapse-table-btn\">Collapse Table</button>\n"
-    html_content += "  <button class=\"expand-table-btn\">Expand Table</button>\n"
-    html_content += "</div>\n"
-    html_content += ad_table + "\n</div>\n"
+    add_container(ad_table)
     index_counter += 1
 
 html_content += "</body>\n</html>"
 
-# Save to file
+# Save to file, keeping \n line ends so that the byte offsets of the index hold on every platform
 output_file = "eaip_tables.html"
-with open(output_file, "w", encoding="utf-8") as f:
+with open(output_file, "w", encoding="utf-8", newline="\n") as f:
     f.write(html_content)
 print(f"Saved {index_counter} tables to '{output_file}'")
 
+# Save the sidecar index that lets stage 1 slice the selected tables out of the file without parsing it
+write_index(output_file, container_offsets)
+
 # Finally, print out the number of failed requests
 print(f"Total number of failed requests: {failed_requests}")
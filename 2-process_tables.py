@@ -1,42 +1,166 @@
-from bs4 import BeautifulSoup
-import re
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-# Load eaip_selected_tables.html
-with open("eaip_selected_tables.html", "r", encoding="utf-8") as f:
-    soup = BeautifulSoup(f, "html.parser")
+from bs4 import BeautifulSoup, CData, NavigableString
 
-# Add helper function at the top after imports
+import patterns
+from memo_cache import PersistentMemo
+from patterns import (KM_NM_PATTERN, COORD_TOKEN_PATTERN, PAIR_COMMA_PATTERN, SPACED_COORD_PATTERN, DMS_COORD_PATTERN,
+                      GEOMETRY_START_PATTERN, PARACHUTAGE_PATTERN, AERODROME_SUFFIX_PATTERN, CONTROL_CHAR_PATTERN,
+                      CONTROL_CHARS_PATTERN, WHITESPACE_PATTERN, ALTITUDE_SEPARATOR_PATTERN)
+from stages import call_stage
+from table_specs import TABLE_SPECS, altitude_text
 
-def format_coords(text):
-    """Clean coordinate text by removing unwanted characters and formatting coordinate pairs as 'lat, lon'."""
+# The tags of the parsed rows are created with this empty document rather than with the one of the tables, so that
+# a processor only depends on its container and containers can be processed in worker processes
+TAG_FACTORY = BeautifulSoup("", "html.parser")
+
+
+def new_tag(name):
+    return TAG_FACTORY.new_tag(name)
+
+
+# ===============================
+# Coordinate lexer
+# ===============================
+
+# Characters removed from the coordinates: degree, minute and second symbols
+UNWANTED_CHARS = "°º'\"’”"
+
+
+def lex_coords(text):
+    """Split coordinate text into its points: coordinate pairs as 'lat@lon' without degree symbols or spaces,
+    and the free text of arcs, circles and borders, stripped.
+    """
     # Remove parenthesis group if preceded by 'Km' and ending with 'NM'
-    text = re.sub(r'(?i)(km)\s*\([^)]*nm\)', r'\1', text)
+    if "(" in text:
+        text = KM_NM_PATTERN.sub(r'\1', text)
     # Remove degree symbols and other unwanted characters
-    cleaned = re.sub(r"[°º'\"’”]", "", text)
-
-    # Replace occurrences where two coordinates are separated by '-' or ','
-    # Pattern: a token (6 digits with optional spaces before letter) followed by '-' or ',' then a token (7 digits with optional spaces)
-    cleaned = re.sub(
-        r'(\d{6}\s*[NSEW])\s*[-,]\s*(\d{7}\s*[NSEW])',
-        lambda m: f"{re.sub(r'\s+', '', m.group(1))}@{re.sub(r'\s+', '', m.group(2))}",
-        cleaned
-    )
-
-    # Determine delimiter: if ' - ' exists, use that; otherwise, split on commas not inside parentheses
-    if " - " in cleaned:
-        tokens = cleaned.split(" - ")
+    for char in UNWANTED_CHARS:
+        if char in text:
+            text = text.replace(char, "")
+
+    tokens = []        # points closed by a ' - ' separator
+    current = []       # pieces of the point being read
+    paired = []        # the whole text with only the pairs rewritten, split on commas when there is no ' - '
+    pos = 0
+    for match in COORD_TOKEN_PATTERN.finditer(text):
+        start = match.start()
+        if start > pos:
+            current.append(text[pos:start])
+            paired.append(text[pos:start])
+        kind = match.lastindex
+        if kind == 4:
+            lat, lat_hemisphere, lon, lon_hemisphere = match.group(1, 2, 3, 4)
+            pair = f"{lat}{lat_hemisphere}@{lon}{lon_hemisphere}"
+            current.append(pair)
+            paired.append(pair)
+        elif kind == 6:
+            current.append(match.group(5) + match.group(6))
+            paired.append(match.group())
+        else:
+            tokens.append("".join(current))
+            current = []
+            paired.append(" - ")
+        pos = match.end()
+    current.append(text[pos:])
+
+    if tokens:
+        tokens.append("".join(current))
     else:
-        tokens = re.split(r'(?<=\d{6}[NSEW]@\d{7}[NSEW])\s*,\s*(?=\d{6}[NSEW]@\d{7}[NSEW])', cleaned)
+        paired.append(text[pos:])
+        tokens = [SPACED_COORD_PATTERN.sub(r'\1\2', token) for token in PAIR_COMMA_PATTERN.split("".join(paired))]
+    return [token.strip() for token in tokens if token.strip()]
+
 
-    parts = [re.sub(r'(\d{6})\s+([NSEW])', r'\1\2', token.strip()) for token in tokens if token.strip()]
-    return "[" + ", ".join(f'\"{p}\"' for p in parts) + "]"
+# Points of a cell without coordinates
+NO_COORDS = ()
+
+
+def coord_tokens(text):
+    """Return the points of coordinate text as lex_coords does, with control characters and runs of whitespace written
+    as one space. The parsed rows carry this tuple as their first cell, written as a JSON array by coords_json.
+    """
+    return tuple(WHITESPACE_PATTERN.sub(' ', CONTROL_CHARS_PATTERN.sub(' ', token)) for token in lex_coords(text))
+
+
+def format_coords(text):
+    """Clean coordinate text by removing unwanted characters and formatting coordinate pairs as 'lat@lon'.
+    Returns the tuple of points of coord_tokens. With the cache enabled, a text is only formatted if no previous run
+    did it: the cache is keyed on the text as it is, whitespace included, since lex_coords splits on it.
+    """
+    if coords_cache is not None:
+        return tuple(coords_cache.lookup(text, coord_tokens))
+    return coord_tokens(text)
+
+
+def coords_json(coords):
+    """Write the points of a parsed row as the JSON array of its first cell, as stages 4 and 40 read it back."""
+    return json.dumps(list(coords), ensure_ascii=False)
+
+
+# ===============================
+# Coordinate cache
+# ===============================
+
+# Most coordinate cells are the same from one AIRAC cycle to the next: format_coords results are kept between runs
+COORDS_CACHE_FILE = "format_coords_cache.json"
+COORDS_CACHE_SIZE = 100000
+
+# Memo of format_coords, set by enable_coords_cache
+coords_cache = None
+
+
+def coords_cache_version():
+    """The results of format_coords depend on this file and on the patterns: a cache written with other versions of
+    them is dropped."""
+    digest = hashlib.sha1()
+    for path in (__file__, patterns.__file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def enable_coords_cache(cache_file=COORDS_CACHE_FILE, max_entries=COORDS_CACHE_SIZE):
+    """Memoize format_coords with the results saved in cache_file, keeping the max_entries most recently used.
+    Returns the cache, whose save() writes it back to cache_file.
+    """
+    global coords_cache
+    coords_cache = PersistentMemo(cache_file, coords_cache_version(), max_entries)
+    return coords_cache
+
+
+def use_coords_cache(cache_file, workers=0):
+    """Enable the coordinate cache with cache_file, if given, when the tables are processed in this process.
+    Worker processes would neither read nor update it: it is left disabled, with a warning.
+    """
+    if not cache_file:
+        return None
+    if workers:
+        print(f"[WARN] The format_coords cache '{cache_file}' is not used with workers, run without -j to use and "
+              f"update it, or disable it with --coords-cache ''")
+        return None
+    return enable_coords_cache(cache_file)
+
+
+def save_coords_cache():
+    """Save and disable the cache of enable_coords_cache."""
+    global coords_cache
+    coords_cache.save()
+    print(f"[INFO] format_coords cache: {coords_cache.hits} hits, {coords_cache.misses} misses, "
+          f"{len(coords_cache.entries)} entries saved to '{coords_cache.path}'")
+    coords_cache = None
 
 # Add helper function to clean parsed text (remove control characters and normalize whitespace)
 
 def remove_control_characters(text):
     """Remove control characters and normalize whitespace in the given text."""
-    cleaned_text = re.sub(r'[\r\n\t\x00-\x1F\x7F]', '', text)
-    normalized_text = re.sub(r'\s+', ' ', cleaned_text).strip()
+    cleaned_text = CONTROL_CHAR_PATTERN.sub('', text)
+    normalized_text = WHITESPACE_PATTERN.sub(' ', cleaned_text).strip()
     # Collapse multiple spaces into one (normalizes whitespace)
     # normalized_text = " ".join(normalized_text.split())
     # print(normalized_text)
@@ -44,44 +168,179 @@ def remove_control_characters(text):
 
 # Add the common helper function after remove_control_characters
 
-def compute_array_str(cell_text, prev_parsed_coords):
-    """Compute the array string from cell text. If cell_text is empty, return prev_parsed_coords if available, otherwise return "[]"."""
+def compute_coords(row, cell_text, prev_parsed_coords):
+    """Compute the points of cell text, the coordinate cell of row. If cell_text is empty, return prev_parsed_coords
+    if available, the row being marked as carried, otherwise NO_COORDS."""
     if cell_text and cell_text.strip():
         return format_coords(cell_text)
-    else:
-        return prev_parsed_coords if prev_parsed_coords is not None else "[]"
+    if prev_parsed_coords is None:
+        return NO_COORDS
+    mark_carried(row)
+    return prev_parsed_coords
+
+# ===============================
+# Altitude cells
+# ===============================
+
+# Strings of the cells, as get_text and stripped_strings read them
+TEXT_TYPES = (NavigableString, CData)
+
+
+def split_altitude_cell(cell):
+    """Return the (upper, lower) limits of an altitude cell, read from its strings without parsing it again.
+    The limits are separated by a paragraph of dashes, or in cells without one, the upper limit ends with the first
+    span, or else the first paragraph. Returns None for a cell with neither.
+    """
+    texts = []
+    separator = None
+    for node in cell.descendants:
+        if type(node) in TEXT_TYPES:
+            text = node.strip()
+            if text:
+                if separator is None and ALTITUDE_SEPARATOR_PATTERN.fullmatch(text):
+                    separator = len(texts)
+                texts.append(text)
+    if separator is not None:
+        return " ".join(texts[:separator]), " ".join(texts[separator + 1:])
+
+    boundary = cell.find("span") or cell.find("p")
+    if boundary is None:
+        return None
+    # Count the strings up to the last node of the boundary
+    boundary_end = boundary
+    while getattr(boundary_end, "contents", None):
+        boundary_end = boundary_end.contents[-1]
+    split = 0
+    for node in cell.descendants:
+        if type(node) in TEXT_TYPES and node.strip():
+            split += 1
+        if node is boundary_end:
+            break
+    return " ".join(texts[:split]), " ".join(texts[split:])
+
+
+def altitude_cell_text(cell):
+    """Return the text of an altitude cell as written in the parsed rows, see table_specs.altitude_text."""
+    limits = split_altitude_cell(cell)
+    if limits is None:
+        return " ".join(cell.stripped_strings)
+    return altitude_text(*limits)
+
+
+# ===============================
+# Row analysis
+# ===============================
+
+def analyze_row(tr):
+    """Walk the cells of a row once and return what the table processors need from it: a dict with the row ("tr"),
+    its <td> cells ("tds"), its first <td> or <th> with class 'strong' ("strong", None if there is none) and whether
+    it has a <th> ("has_th"). The cell texts are joined on first use by cell_texts.
+    """
+    tds = []
+    strong = None
+    has_th = False
+    for cell in tr.find_all(["td", "th"]):
+        if cell.name == "td":
+            tds.append(cell)
+        else:
+            has_th = True
+        if strong is None and "strong" in cell.get("class", []):
+            strong = cell
+    return {"tr": tr, "tds": tds, "strong": strong, "has_th": has_th, "texts": None}
+
+
+def analyze_rows(container):
+    """Analyze every .eaip-row of the container, in document order."""
+    return [analyze_row(tr) for tr in container.select(".eaip-row")]
+
+
+def cell_texts(row):
+    """Return the stripped strings of each <td> of the row joined with spaces, computed once per row.
+    Cells are changed with set_cell_text, which keeps them up to date.
+    """
+    if row["texts"] is None:
+        row["texts"] = [" ".join(td.stripped_strings) for td in row["tds"]]
+    return row["texts"]
+
+
+# ===============================
+# Row annotations
+# ===============================
+
+# The processors do not change the tables: they record on the analyzed rows what the annotated HTML would show, the
+# classes, cleaned cells and parsed name and parsed rows of each row. The parsed name and parsed rows are records,
+# ("name", text) and ("row", cells) tuples, read by table_records or written into the tables by render_table.
+
+def add_class(row, class_name):
+    row.setdefault("classes", []).append(class_name)
+
+
+def has_class(row, class_name):
+    return class_name in row.get("classes", ())
+
+
+def set_cell_text(row, element, text):
+    """Replace the content of a cell of the row, a <td> or its 'strong' cell, with text."""
+    row.setdefault("rewrites", []).append((element, text))
+    texts = cell_texts(row)
+    for i, td in enumerate(row["tds"]):
+        if td is element:
+            texts[i] = text.strip()
+
+
+def mark_carried(row):
+    """Note that the parsed row of the row took the coordinates of the previous content row."""
+    row["carried"] = True
+
+
+def insert_after(row, record):
+    """Place a record just after the row; like insert_after on the tags, the last one placed comes first."""
+    row.setdefault("after", []).insert(0, record)
+
+
+def insert_name_before(row, found_name):
+    """Place a parsed name record just before the row and return the row the main passes of the tables see in its
+    place."""
+    row.setdefault("before", []).append(("name", found_name))
+    return {"tr": None, "tds": [], "strong": None, "has_th": False, "texts": [found_name.strip()], "parsed_name": True}
+
 
-# Add helper function for creating a parsed row after compute_array_str
+# ===============================
+# Table rendering
+# ===============================
 
-def create_parsed_row(array_str, other_texts):
-    """Create a new parsed row with the first cell as array_str and subsequent cells with texts from other_texts."""
-    new_tr = soup.new_tag("tr")
+def create_parsed_row(coords, other_texts):
+    """Create a new parsed row with the points of coords as first cell and subsequent cells with texts from
+    other_texts."""
+    new_tr = new_tag("tr")
     new_tr["class"] = ["eaip-row", "parsed-row"]
     # First cell
-    first_td = soup.new_tag("td")
-    first_td.string = array_str
+    first_td = new_tag("td")
+    first_td.string = coords_json(coords)
     new_tr.append(first_td)
     # Create tds for each text in list
     for text in other_texts:
-        new_td = soup.new_tag("td")
+        new_td = new_tag("td")
         new_td.string = text
         new_tr.append(new_td)
     return new_tr
 
-# Add helper functions for determining a name row and extracting its text
 
-def is_name_row(tr):
-    """Return True if the row (tr) is considered a name row based on presence of a <td> or <th> with class 'strong'."""
-    return tr.find(lambda tag: tag.name in ['td', 'th'] and 'strong' in tag.get('class', [])) is not None
+def create_parsed_name_row(raw_text):
+    """Create and return a new parsed name row with the given raw text."""
+    new_tr = new_tag("tr")
+    new_tr["class"] = ["eaip-row", "parsed-name"]
+    new_td = new_tag("td")
+    new_td.string = raw_text
+    new_tr.append(new_td)
+    return new_tr
 
 
-def get_name_text(tr):
-    """Extract and return the concatenated stripped strings from the first <td> or <th> that contains 'strong' in its class."""
-    name_td = tr.find(lambda tag: tag.name in ['td', 'th'] and 'strong' in tag.get('class', []))
-    if name_td:
-        # Return the joined stripped strings
-        return remove_control_characters(" ".join(name_td.stripped_strings))
-    return ""
+def create_record_row(record):
+    kind, value = record
+    if kind == "name":
+        return create_parsed_name_row(value)
+    return create_parsed_row(value[0], value[1:])
 
 
 def update_header(container, table_number):
@@ -90,126 +349,153 @@ def update_header(container, table_number):
     if h3:
         h3.string = f"Table number: {table_number}"
 
-def process_name_row(tr):
-    """Process a name row: update its strong element, mark as highlighted, and insert a parsed name row."""
-    raw_text = get_name_text(tr)
-    # Clear and set the text for the element that was flagged
-    elt = tr.find(lambda tag: tag.name in ['td', 'th'] and 'strong' in tag.get('class', []))
-    if elt:
-        elt.clear()
-        elt.string = raw_text
-    tr["class"] = tr.get("class", []) + ["highlighted"]
-    name_tr = create_parsed_name_row(raw_text)
-    tr.insert_after(name_tr)
 
-def create_parsed_name_row(raw_text):
-    """Create and return a new parsed name row with the given raw text."""
-    new_tr = soup.new_tag("tr")
-    new_tr["class"] = ["eaip-row", "parsed-name"]
-    new_td = soup.new_tag("td")
-    new_td.string = raw_text
-    new_tr.append(new_td)
-    return new_tr
+def render_table(container, table_number, rows, annotated=True):
+    """Write the records of the processed rows of a table into its container and return it.
+    annotated keeps the original rows with their classes and cleaned cells, as in eaip_selected_tables_stage1.html;
+    otherwise they are removed, leaving only the parsed name and parsed rows stage 3 keeps.
+    """
+    update_header(container, table_number)
+    for row in rows:
+        tr = row["tr"]
+        for record in row.get("before", ()):
+            tr.insert_before(create_record_row(record))
+        for record in reversed(row.get("after", ())):
+            tr.insert_after(create_record_row(record))
+        if not annotated:
+            tr.extract()
+            continue
+        for class_name in row.get("classes", ()):
+            tr["class"] = tr.get("class", []) + [class_name]
+        for element, text in row.get("rewrites", ()):
+            element.clear()
+            element.string = text
+    return container
 
 
+def table_records(rows):
+    """Return the (name, cells) of the parsed rows of a processed table, in document order, as stages 4 and 40 read
+    them from the cleaned file: name is the text of the last parsed name before the row, None before the first one.
+    The first cell is the tuple of points of the row rather than its JSON text, see row_coords in table_specs.
+    """
+    records = []
+    name = None
+    for row in rows:
+        for kind, value in row.get("before", []) + row.get("after", []):
+            if kind == "name":
+                name = value.strip()
+            else:
+                records.append((name, [value[0]] + [text.strip() for text in value[1:]]))
+    return records
 
 
-# Add helper function for generic content row processing with a transform function (default: join stripped strings)
+# ===============================
+# Table processors
+# ===============================
 
-def process_content_row_generic(tr, expected_tds, prev_parsed_coords, transform=lambda td, j: " ".join(td.stripped_strings)):
-    """Process a content row if it has the expected number of <td> cells using a transform function. Returns the updated prev_parsed_coords."""
-    tds = tr.find_all("td")
-    if len(tds) == expected_tds:
-        first_cell = tds[0]
-        cell_text = first_cell.get_text(" ", strip=True)
-        array_str = compute_array_str(cell_text, prev_parsed_coords)
-        other_texts = [transform(td, j) for j, td in enumerate(tds[1:])]
-        new_tr = create_parsed_row(array_str, other_texts)
-        tr.insert_after(new_tr)
-        return array_str
-    return prev_parsed_coords
+# A processor takes the container of a table and returns its analyzed rows with their annotations, see
+# analyze_rows and the row annotations above. The container is left as it is.
 
+def is_name_row(row):
+    """Return True if the row is considered a name row based on presence of a <td> or <th> with class 'strong'."""
+    return row["strong"] is not None
 
-# Redefine process_content_row to call the generic version with default transform
 
-def process_content_row(tr, expected_tds, prev_parsed_coords):
-    return process_content_row_generic(tr, expected_tds, prev_parsed_coords)
+def get_name_text(row):
+    """Extract and return the concatenated stripped strings from the first <td> or <th> that contains 'strong' in its class."""
+    name_td = row["strong"]
+    if name_td:
+        # Return the joined stripped strings
+        return remove_control_characters(" ".join(name_td.stripped_strings))
+    return ""
 
 
-def process_table_0(container):
-    update_header(container, 0)
+def process_name_row(row, raw_text, rewrite_name=True):
+    """Process a name row: update its strong element with raw_text, mark as highlighted, and insert a parsed name
+    row."""
+    # Clear and set the text for the element that was flagged
+    elt = row["strong"]
+    if elt and rewrite_name:
+        set_cell_text(row, elt, raw_text)
+    add_class(row, "highlighted")
+    insert_after(row, ("name", raw_text))
+
+
+def process_content_row(row, expected_tds, prev_parsed_coords, coords_column=0, carry_coords=True,
+                        altitudes_column=None):
+    """Process a content row if it has the expected number of <td> cells. Returns the updated prev_parsed_coords."""
+    if len(row["tds"]) == expected_tds:
+        texts = cell_texts(row)
+        if altitudes_column is not None:
+            texts = texts[:altitudes_column] + [altitude_cell_text(row["tds"][altitudes_column])] + \
+                texts[altitudes_column + 1:]
+        coords = compute_coords(row, texts[coords_column], prev_parsed_coords if carry_coords else None)
+        insert_after(row, ("row", [coords] + texts[:coords_column] + texts[coords_column + 1:]))
+        return coords
+    return prev_parsed_coords
 
-    # Track previous non-name row's parsed coordinates
-    prev_parsed_coords = None
 
-    # Process <tr> rows
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            raw_text = get_name_text(tr)
-            # Clear and set the text for the element that was flagged
-            elt = tr.find(lambda tag: tag.name in ['td', 'th'] and 'strong' in tag.get('class', []))
-            if elt:
-                elt.clear()
-                elt.string = raw_text
-            tr["class"] = tr.get("class", []) + ["highlighted"]
-            # Use new helper to create parsed name row
-            name_tr = create_parsed_name_row(raw_text)
-            tr.insert_after(name_tr)
-        else:
-            # Content row: must have 5 cells
-            tds = tr.find_all("td")
-            if len(tds) == 5:
-                # First cell: Extract raw text from first cell and split by ' - '
-                first_cell = tds[0]
-                cell_text = first_cell.get_text(" ", strip=True)
-                # Use the common compute_array_str helper
-                array_str = compute_array_str(cell_text, prev_parsed_coords)
-                # Use the new helper to create parsed row
-                other_texts = [" ".join(td.stripped_strings) for td in tds[1:]]
-                new_tr = create_parsed_row(array_str, other_texts)
-                tr.insert_after(new_tr)
-                # Update previous parsed coordinates
-                prev_parsed_coords = array_str
+def compile_table(table_number, spec):
+    """Return the processor of a table with a regular layout, described by its spec in table_specs.
+    The spec is read once here, the returned processor only runs the row loop.
+    """
+    strong_names = spec["name_row"] == "strong"
+    rewrite_name = spec.get("rewrite_name", True)
+    reject_names = set(spec.get("reject_names", ()))
+    expected_tds = spec["cells"]
+    coords_column = spec.get("coords", 0)
+    carry_coords = spec.get("carry_coords", True)
+    # Column of the altitude cell in the content rows, the parsed rows having the coordinates first
+    altitudes_column = spec["fields"].get("altitudes")
+    if altitudes_column is not None and altitudes_column - 1 < coords_column:
+        altitudes_column -= 1
+
+    def process_table(container):
+        # Track previous non-name row's parsed coordinates
+        prev_parsed_coords = None
+        rejected_row = None
+
+        # Process <tr> rows
+        all_rows = analyze_rows(container)
+        for i, row in enumerate(all_rows):
+            if strong_names:
+                if is_name_row(row):
+                    raw_text = get_name_text(row)
+                    if raw_text in reject_names:
+                        add_class(row, "rejected")
+                        # Reject the next row if it exists (assumed content row)
+                        if i + 1 < len(all_rows):
+                            add_class(all_rows[i + 1], "rejected")
+                            rejected_row = i + 1
+                    else:
+                        process_name_row(row, raw_text, rewrite_name)
+                    continue
+            elif len(row["tds"]) == 2:
+                # Name row of 2 cells: combine raw text from both cells
+                add_class(row, "highlighted")
+                insert_after(row, ("name", " ".join(cell_texts(row))))
+                continue
 
-    return container
+            if i != rejected_row:
+                prev_parsed_coords = process_content_row(row, expected_tds, prev_parsed_coords, coords_column,
+                                                         carry_coords, altitudes_column)
 
+        return all_rows
 
-
-def process_table_1(container):
-    update_header(container, 1)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            raw_text = get_name_text(tr)
-            if raw_text == "LTA FRANCE partie 2":
-                tr["class"] = tr.get("class", []) + ["rejected"]
-                # Reject the next row if it exists (assumed content row)
-                if i + 1 < len(all_rows):
-                    next_tr = all_rows[i + 1]
-                    next_tr["class"] = next_tr.get("class", []) + ["rejected"]
-            else:
-                process_name_row(tr)
-                
-            continue
-        else:
-            if len(tr.find_all("td")) == 5 and "rejected" not in tr.get("class", []):
-                prev_parsed_coords = process_content_row(tr, 5, prev_parsed_coords)
-    return container
+    process_table.__name__ = f"process_table_{table_number}"
+    return process_table
 
 
 def process_table_2(container):
-    update_header(container, 2)
-
-    # Pre-pass: Create name rows for 5-cell rows with text before coordinates
-    all_rows = container.select(".eaip-row")
-    for tr in all_rows:
-        tds = tr.find_all("td")
-        if len(tds) == 5:
-            first_td = tds[0]
-            full_text = " ".join(first_td.stripped_strings)
-            coord_match = re.search(r"\d{2}°\d{2}(?:'|’)\d{2}(?:\"|”)[NSEW]", full_text)
+    # Pre-pass: Create name rows for 5-cell rows with text before coordinates. The rows of the main pass are
+    # collected at the same time, with the inserted name rows in front of their row.
+    rows = analyze_rows(container)
+    all_rows = []
+    for row in rows:
+        if len(row["tds"]) == 5:
+            first_td = row["tds"][0]
+            full_text = cell_texts(row)[0]
+            coord_match = DMS_COORD_PATTERN.search(full_text)
 
             # Debugging prints
             # print(f"Raw text: '{full_text}'")
@@ -220,169 +506,80 @@ def process_table_2(container):
                     found_name = full_text[:coord_start].strip()
                     # print(f"Found name: '{found_name}'")
                     # Create parsed name row just before the current row
-                    name_tr = soup.new_tag("tr")
-                    name_tr["class"] = ["eaip-row", "parsed-name"]
-                    name_td = soup.new_tag("td")
-                    name_td.string = found_name
-                    name_tr.append(name_td)
-                    tr.insert_before(name_tr)
+                    all_rows.append(insert_name_before(row, found_name))
 
                     # Remove name from first cell, keep only coordinate text
-                    coord_text = full_text[coord_start:]
-                    first_td.clear()
-                    first_td.string = coord_text
+                    set_cell_text(row, first_td, full_text[coord_start:])
             else:
                 # print("No coordinate pattern found")
                 pass
+        all_rows.append(row)
 
     # Track previous non-name row's parsed coordinates
     prev_parsed_coords = None
     ta_info = "33"  # Default sentinel value
 
     # Main pass: Process <tr> rows
-    all_rows = container.select(".eaip-row")  # Refresh after insertions
-    for i, tr in enumerate(all_rows):
-        tds = tr.find_all("td")
+    for i, row in enumerate(all_rows):
+        tds = row["tds"]
 
         # Handle 2-cell rows
         if len(tds) == 2:
-            second_cell_text = " ".join(tds[1].stripped_strings)
+            second_cell_text = cell_texts(row)[1]
             if "TA" in second_cell_text.upper():
                 ta_info = second_cell_text
             else:
                 ta_info = "33"
-            tr["class"] = tr.get("class", []) + ["rejected"]
+            add_class(row, "rejected")
             continue
 
         # Process 5-cell rows (content)
-        if len(tds) == 5 and "parsed-name" not in tr.get("class", []):
-            first_cell = tds[0]
-            cell_text = first_cell.get_text(" ", strip=True)
-            array_str = compute_array_str(cell_text, prev_parsed_coords)
+        if len(tds) == 5 and not row.get("parsed_name"):
+            texts = cell_texts(row)
+            coords = compute_coords(row, texts[0], prev_parsed_coords)
             other_texts = []
-            for j, td in enumerate(tds[1:]):
-                raw_text = " ".join(td.stripped_strings)
-                if j == 3 and ta_info != "33":
+            for j, raw_text in enumerate(texts[1:]):
+                if j == 1:
+                    other_texts.append(altitude_cell_text(tds[2]))
+                elif j == 3 and ta_info != "33":
                     other_texts.append(f"{ta_info} {raw_text}" if raw_text else ta_info)
                 else:
                     other_texts.append(raw_text)
-            new_tr = create_parsed_row(array_str, other_texts)
-            tr.insert_after(new_tr)
+            insert_after(row, ("row", [coords] + other_texts))
 
             # Update previous parsed coordinates
-            prev_parsed_coords = array_str
-
-    return container
-
-
-# Refactor process_table_3 to use helper functions
-
-def process_table_3(container):
-    update_header(container, 3)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            process_name_row(tr)
-        else:
-            if len(tr.find_all("td")) == 5:
-                prev_parsed_coords = process_content_row(tr, 5, prev_parsed_coords)
-    return container
-
-
-def process_table_4(container):
-    update_header(container, 4)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            process_name_row(tr)
-            continue
-        else:
-            if len(tr.find_all("td")) == 4:
-                prev_parsed_coords = process_content_row(tr, 4, prev_parsed_coords)
-    return container
+            prev_parsed_coords = coords
 
+    return rows
 
-def process_table_5(container):
-    update_header(container, 5)
 
-    # Track previous non-name row's parsed coordinates
-    prev_parsed_coords = None
-
-    # Process <tr> rows
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        # Check if this is a name row based on having exactly 2 cells
-        tds = tr.find_all("td")
-        if len(tds) == 2:
-            tr["class"] = tr.get("class", []) + ["highlighted"]
-
-            # Combine raw text from both cells
-            combined_text = " ".join(
-                td.get_text(" ", strip=True) for td in tds)
-            # Create a new parsed name row
-            name_tr = soup.new_tag("tr")
-            name_tr["class"] = ["eaip-row", "parsed-name"]
-            name_td = soup.new_tag("td")
-            name_td.string = combined_text
-            name_tr.append(name_td)
-            tr.insert_after(name_tr)
-            continue
-
-        else:
-            # Content row: must have 5 cells
-            tds = tr.find_all("td")
-            if len(tds) == 5:
-                # First cell: Extract raw text from first cell and split by ' - '
-                first_cell = tds[0]
-                cell_text = first_cell.get_text(" ", strip=True)
-                array_str = compute_array_str(cell_text, prev_parsed_coords)
-                other_texts = [" ".join(td.stripped_strings) for td in tds[1:]]
-                new_tr = create_parsed_row(array_str, other_texts)
-                tr.insert_after(new_tr)
-                # Update previous parsed coordinates
-                prev_parsed_coords = array_str
-
-
-
-    return container
-
-
-# Refactor process_table_6 to use helper functions
-
-def process_table_6(container):
-    update_header(container, 6)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            raw_text = get_name_text(tr)
-            tr["class"] = tr.get("class", []) + ["highlighted"]
-            name_tr = create_parsed_name_row(raw_text)
-            tr.insert_after(name_tr)
-        else:
-            if len(tr.find_all("td")) == 5:
-                prev_parsed_coords = process_content_row(tr, 5, prev_parsed_coords)
-    return container
+def normalize_lf_name(found_name):
+    """Write the LF-R, LF - R, LF-P and LF-D prefixes of the area names as LF R, LF P and LF D."""
+    #if  "LF-R " or "LF - R " in name   , replace with "LF R "
+    if "LF-R " in found_name or "LF - R " in found_name:
+        found_name = found_name.replace("LF-R ", "LF R ").replace("LF - R ", "LF R ")
+    if "LF-P " in found_name :
+        found_name = found_name.replace("LF-P ", "LF P ")
+    if "LF-D " in found_name :
+        found_name = found_name.replace("LF-D ", "LF D ")
+    return found_name
 
 
 def process_table_7(container):
-    update_header(container, 7)
+    # Pre-pass: Create name rows for 3-cell rows with text before coordinates. The rows of the main pass are
+    # collected at the same time, with the inserted name rows in front of their row.
+    rows = analyze_rows(container)
+    all_rows = []
+    for row in rows:
+        if len(row["tds"]) == 3:
+            first_td = row["tds"][0]
 
-    # Pre-pass: Create name rows for 3-cell rows with text before coordinates
-    all_rows = container.select(".eaip-row")
-    for tr in all_rows:
-        tds = tr.find_all("td")
-        if len(tds) == 3:
-            first_td = tds[0]
-
-            full_text = " ".join(first_td.stripped_strings)
+            full_text = cell_texts(row)[0]
 
             if not full_text.strip():
-                tr["class"] = tr.get("class", []) + ["rejected"]
+                add_class(row, "rejected")
 
-            coord_match = re.search(r"Cercle|Secteur|(\d{2}°\d{2}(?:'|’)\d{2}(?:\"|”)[NSEW])|(\d{6}[NSEW])|(\d{6} [NSEW])", full_text)
+            coord_match = GEOMETRY_START_PATTERN.search(full_text)
 
             # Debugging prints
             # print(f"Raw text: '{full_text}'")
@@ -392,29 +589,17 @@ def process_table_7(container):
                 if coord_start > 0:  # Text before coordinate exists
                     found_name = full_text[:coord_start].strip()
                     found_name = remove_control_characters(found_name)
-                    #if  "LF-R " or "LF - R " in name   , replace with "LF R "
-                    if "LF-R " in found_name or "LF - R " in found_name:
-                        found_name = found_name.replace("LF-R ", "LF R ").replace("LF - R ", "LF R ")
-                    if "LF-P " in found_name :
-                        found_name = found_name.replace("LF-P ", "LF P ")
-                    if "LF-D " in found_name :
-                        found_name = found_name.replace("LF-D ", "LF D ")
+                    found_name = normalize_lf_name(found_name)
                     # print(f"Found name: '{found_name}'")
                     # Create parsed name row just before the current row
-                    name_tr = soup.new_tag("tr")
-                    name_tr["class"] = ["eaip-row", "parsed-name"]
-                    name_td = soup.new_tag("td")
-                    name_td.string = found_name
-                    name_tr.append(name_td)
-                    tr.insert_before(name_tr)
+                    all_rows.append(insert_name_before(row, found_name))
 
                     # Remove name from first cell, keep only coordinate text
-                    coord_text = full_text[coord_start:]
-                    first_td.clear()
-                    first_td.string = coord_text
+                    set_cell_text(row, first_td, full_text[coord_start:])
             else:
                 # print("No coordinate pattern found")
                 pass
+        all_rows.append(row)
 
     # Track previous non-name row's parsed coordinates
     prev_parsed_coords = None
@@ -422,151 +607,88 @@ def process_table_7(container):
     lf_r_prefix = None  # To store the prefix from rows starting with "LF-R 213 NORD-EST"
 
     # Main pass: Process <tr> rows
-    all_rows = container.select(".eaip-row")  # Refresh after insertions
     prev_name_text = ""
-    for i, tr in enumerate(all_rows):
-        tds = tr.find_all("td")
+    for i, row in enumerate(all_rows):
+        tds = row["tds"]
 
         # if rejected row, skip
-        if "rejected" in tr.get("class", []):
+        if has_class(row, "rejected"):
             continue
 
         # if parsed name row, set previous name text to the name text
-        if "parsed-name" in tr.get("class", []):
-            prev_name_text = tds[0].get_text(" ", strip=True)
+        if row.get("parsed_name"):
+            prev_name_text = cell_texts(row)[0]
             # print(f"prev_name_text set to: {prev_name_text}")
 
         # process 3-cell row (name row): if cell 2 and 3 are empty, treat as name row
-        if len(tds) == 3 and not list(tds[1].stripped_strings) and not list(tds[2].stripped_strings):
+        if len(tds) == 3 and not cell_texts(row)[1] and not cell_texts(row)[2]:
             # print("Name row detected")
-            name_tr = soup.new_tag("tr")
-            name_tr["class"] = ["eaip-row", "parsed-name"]
-            name_td = soup.new_tag("td")
-            found_name = tds[0].get_text(" ", strip=True)
+            found_name = cell_texts(row)[0]
             found_name = remove_control_characters(found_name)
-            if "LF-R " in found_name or "LF - R " in found_name:
-                found_name = found_name.replace("LF-R ", "LF R ").replace("LF - R ", "LF R ")
-            if "LF-P " in found_name :
-                found_name = found_name.replace("LF-P ", "LF P ")
-            if "LF-D " in found_name :
-                found_name = found_name.replace("LF-D ", "LF D ")
+            found_name = normalize_lf_name(found_name)
             # print(f"Found name: '{found_name}'")
-            name_td.string = found_name
-            prev_name_text = name_td.string
+            prev_name_text = found_name
             # print(f"prev_name_text set to: {prev_name_text}")
-            name_tr.append(name_td)
-            tr.insert_after(name_tr)
+            insert_after(row, ("name", found_name))
             continue
-        
+
 
         # Process 3-cell rows (content)
-        if len(tds) == 3 and "parsed-name" not in tr.get("class", []):
-            first_cell = tds[0]
-            cell_text = first_cell.get_text(" ", strip=True)
+        if len(tds) == 3 and not row.get("parsed_name"):
+            texts = cell_texts(row)
+            cell_text = texts[0]
 
             # Check if first cell starts with the specific string
             if cell_text.startswith("LF-R 213 NORD-EST"):
                 # Obtain prefix from the third cell of this row
-                current_prefix = tds[2].get_text(" ", strip=True)
+                current_prefix = texts[2]
                 if not lf_r_prefix:
                     lf_r_prefix = current_prefix
                 # set this row's class to deleted
-                tr["class"] = tr.get("class", []) + ["rejected"]
+                add_class(row, "rejected")
                 continue
 
             if not cell_text:
                 # Use previous non-name row's parsed coordinates if available and previous row is not a name row
                 if prev_parsed_coords and i > 0:
                     prev_tr = all_rows[i - 1]
-                    if len(prev_tr.find_all("td")) == 3 and "parsed-name" not in prev_tr.get("class", []):
-                        array_str = prev_parsed_coords
+                    if len(prev_tr["tds"]) == 3 and not prev_tr.get("parsed_name"):
+                        coords = prev_parsed_coords
+                        mark_carried(row)
                     else:
-                        array_str = "[]"
+                        coords = NO_COORDS
                 else:
-                    array_str = "[]"
+                    coords = NO_COORDS
             else:
-                array_str = format_coords(cell_text)
+                coords = format_coords(cell_text)
 
             # Create new parsed row with eaip-row class
             other_texts = []
             for j, td in enumerate(tds[1:]):
-                raw_text = " ".join(td.stripped_strings).strip()
+                raw_text = texts[j + 1]
                 if j == 0:
                     print(raw_text)
-                    # For cell index 1, insert ' ------------ ' just after the first <p> tag
-                    original_html = td.decode_contents()
-                    inner_soup = BeautifulSoup(original_html, "html.parser")
-                    first_p = inner_soup.find("p")
-                    first_span = inner_soup.find("span")
-                    if first_span:
-                        first_span.insert_after(" ------------ ")
-                    else:
-                        first_p.insert_after(" ------------ ")
-                    # convert inner_soup to raw text and clean it using the helper function
-                    raw_text = inner_soup.get_text(" ", strip=True).strip()
-                    raw_text = remove_control_characters(raw_text)
+                    # Cell index 1 holds the limits, the upper one in the first span or <p>
+                    raw_text = remove_control_characters(altitude_cell_text(td))
                     print(raw_text)
                     other_texts.append(raw_text)
                 elif j == 1 and prev_name_text.startswith("LF-R 213 NORD-EST") and lf_r_prefix:
-                    raw_text = " ".join(td.stripped_strings).strip()
                     other_texts.append(lf_r_prefix + " " + raw_text if raw_text else lf_r_prefix)
                 else:
                     other_texts.append(raw_text)
 
-            new_tr = create_parsed_row(array_str, other_texts)
-            tr.insert_after(new_tr)
+            insert_after(row, ("row", [coords] + other_texts))
 
             # Update previous parsed coordinates
-            prev_parsed_coords = array_str
-
-    return container
-
-
-# Refactor process_table_8 to use helper functions
+            prev_parsed_coords = coords
 
-def process_table_8(container):
-    update_header(container, 8)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        tds = tr.find_all("td")
-        if len(tds) == 2:
-            tr["class"] = tr.get("class", []) + ["highlighted"]
-            combined_text = " ".join(td.get_text(" ", strip=True) for td in tds)
-            name_tr = soup.new_tag("tr")
-            name_tr["class"] = ["eaip-row", "parsed-name"]
-            name_td = soup.new_tag("td")
-            name_td.string = combined_text
-            name_tr.append(name_td)
-            tr.insert_after(name_tr)
-            continue
-        else:
-            if len(tds) == 5:
-                prev_parsed_coords = process_content_row(tr, 5, prev_parsed_coords)
-    return container
-
-
-# Refactor process_table_9 to use helper functions
-
-def process_table_9(container):
-    update_header(container, 9)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            process_name_row(tr)
-        else:
-            if len(tr.find_all("td")) == 5:
-                prev_parsed_coords = process_content_row(tr, 5, prev_parsed_coords)
-    return container
+    return rows
 
 
 def process_table_10(container):
-    update_header(container, 10)
-
-
     # Get all rows
-    all_rows = [row for row in container.select(".eaip-row") if row.find("th") is None]
+    rows = analyze_rows(container)
+    all_rows = [row for row in rows if not row["has_th"]]
     # Process rows in pairs: even row holds info, odd row holds content
     i = 0
     while i < len(all_rows) - 1:
@@ -574,260 +696,395 @@ def process_table_10(container):
         content_row = all_rows[i+1]
 
         # Extract tds from info row
-        info_tds = info_row.find_all("td")
-        if len(info_tds) < 3:
+        if len(info_row["tds"]) < 3:
             i += 2
             continue
+        info_texts = cell_texts(info_row)
 
         # Even row: second cell is name (ignored), third cell holds upper altitude
         # name is content of cell 0 and cell 1
-        name_text = " ".join(info_tds[0].stripped_strings) + " " + " ".join(info_tds[1].stripped_strings)
+        name_text = info_texts[0] + " " + info_texts[1]
         # Transform 'parachutage' into 'para' (case insensitive) and remove 'Aérodrom' and any text after that
-        name_text = re.sub(r'(?i)parachutage', 'para', name_text)
-        name_text = re.sub(r'Aérodrome.*', '', name_text)
+        name_text = PARACHUTAGE_PATTERN.sub('para', name_text)
+        name_text = AERODROME_SUFFIX_PATTERN.sub('', name_text)
         name_text = name_text.strip()
         # Extract raw text for name row, ignoring <span> structure
-        all_rows[i]["class"] = all_rows[i].get("class", []) + ["highlighted"]
+        add_class(info_row, "highlighted")
         # Create a new parsed name row
-        name_tr = soup.new_tag("tr")
-        name_tr["class"] = ["eaip-row", "parsed-name"]
-        name_td = soup.new_tag("td")
-        name_td.string = name_text
-        name_tr.append(name_td)
-        info_row.insert_after(name_tr)
-        
-        upper_alt = info_tds[2].get_text(" ", strip=True)
-        hor_val = info_tds[3].get_text(" ", strip=True)
+        insert_after(info_row, ("name", name_text))
+
+        upper_alt = info_texts[2]
+        hor_val = info_texts[3]
 
         # Process content row
-        content_tds = content_row.find_all("td")
-        if len(content_tds) < 3:
+        if len(content_row["tds"]) < 3:
             i += 2
             continue
+        content_texts = cell_texts(content_row)
 
         # First cell: coordinates parsing as in other tables
-        coord_text = content_tds[0].get_text(" ", strip=True)
+        coord_text = content_texts[0]
         if coord_text:
-            array_str = format_coords(coord_text)
+            coords = format_coords(coord_text)
         else:
-            array_str = "[]"
+            coords = NO_COORDS
 
         # Second cell: lower altitude, prepend upper_alt
-        lower_alt = content_tds[1].get_text(" ", strip=True)
-        new_lower = (upper_alt + " ------------ " + lower_alt).strip() if lower_alt else upper_alt
+        lower_alt = content_texts[1]
+        new_lower = altitude_text(upper_alt, lower_alt) if lower_alt else upper_alt
 
         # Third cell: parse as usual but prepend hor_val
-        third_text = content_tds[2].get_text(" ", strip=True)
+        third_text = content_texts[2]
         new_third = (hor_val + " " + third_text).strip() if third_text else hor_val
 
         # Create new parsed row
         other_texts = [new_lower, new_third]
-        new_tr = create_parsed_row(array_str, other_texts)
 
         # Insert the new parsed row after the content row
-        content_row.insert_after(new_tr)
+        insert_after(content_row, ("row", [coords] + other_texts))
 
         i += 2
 
-    return container
-
-def process_table_11(container):
-    update_header(container, 11)
+    return rows
 
 
+def process_table_11(container):
     # Get all rows
-    all_rows = container.select(".eaip-row")
+    all_rows = analyze_rows(container)
     # Process rows in pairs: even row holds info, odd row holds content
     i = 1
     while i < len(all_rows) - 1:
         name_row = all_rows[i]
         content_row = all_rows[i+1]
 
-        name_tds = name_row.find_all("td")
-        # print(len(name_tds))
-        if len(name_tds) == 0:
+        # print(len(name_row["tds"]))
+        if len(name_row["tds"]) == 0:
             # print("No name row")
             i += 2
             continue
         # name is content of cell 0 and cell 1
-        name_text = " ".join(name_tds[0].stripped_strings)
+        name_text = cell_texts(name_row)[0]
         # print(name_text)
-        all_rows[i]["class"] = all_rows[i].get("class", []) + ["highlighted"]
+        add_class(name_row, "highlighted")
         # Create a new parsed name row
-        name_tr = soup.new_tag("tr")
-        name_tr["class"] = ["eaip-row", "parsed-name"]
-        name_td = soup.new_tag("td")
-        name_td.string = name_text
-        name_tr.append(name_td)
-        name_row.insert_after(name_tr)
-        
+        insert_after(name_row, ("name", name_text))
+
 
         # Process content row
-        content_tds = content_row.find_all("td")
-        # if len(content_tds) < 4:
+        content_texts = cell_texts(content_row)
+        # if len(content_texts) < 4:
         #     i += 2
         #     continue
 
         # First cell: coordinates parsing as in other tables
-        coord_text = content_tds[0].get_text(" ", strip=True)
+        coord_text = content_texts[0]
         if coord_text:
-            array_str = format_coords(coord_text)
+            coords = format_coords(coord_text)
         else:
-            array_str = "[]"
+            coords = NO_COORDS
 
         # Create new parsed row
-        other_texts = [" ".join(td.stripped_strings) for td in content_tds[1:]]
-        new_tr = create_parsed_row(array_str, other_texts)
+        other_texts = content_texts[1:]
 
         # Insert the new parsed row after the content row
-        content_row.insert_after(new_tr)
+        insert_after(content_row, ("row", [coords] + other_texts))
 
         i += 2
 
-    return container
-
-
-# Refactor process_table_12 to use helper functions
-
-def process_table_12(container):
-    update_header(container, 12)
-    prev_parsed_coords = None
-    all_rows = container.select(".eaip-row")
-    for i, tr in enumerate(all_rows):
-        if is_name_row(tr):
-            process_name_row(tr)
-        else:
-            if len(tr.find_all("td")) == 5:
-                prev_parsed_coords = process_content_row(tr, 5, prev_parsed_coords)
-    return container
+    return all_rows
 
 
-# Add more as needed based on your selected tables count
-# Map table numbers to processing functions
-table_processors = {
-    0: process_table_0,
-    1: process_table_1,
+# Map table numbers to processing functions: the tables with a regular layout are processed from their spec, the
+# others by their own function
+table_processors = {table_number: compile_table(table_number, spec)
+                    for table_number, spec in TABLE_SPECS.items() if "name_row" in spec}
+table_processors.update({
     2: process_table_2,
-    3: process_table_3,
-    4: process_table_4,
-    5: process_table_5,
-    6: process_table_6,
     7: process_table_7,
-    8: process_table_8,
-    9: process_table_9,
     10: process_table_10,
     11: process_table_11,
-    12: process_table_12,
-
-    # Extend this as needed
-}
-
-# Extract all table containers
-containers = soup.select(".table-container")
-
-# Process all containers (each table has one container) and process using the appropriate table processor
-processed_containers = []
-for container in containers:
+})
+
+
+# ===============================
+# Table metrics
+# ===============================
+
+# Counters of a processed table, in the order of the summary
+METRICS = ("rows", "names", "parsed", "rejected", "carried")
+
+
+def table_metrics(table_number, rows, seconds):
+    """Return the counters of a processed table: its rows, the parsed name and parsed rows written for them, the
+    rejected rows, the parsed rows whose coordinates were carried from the previous content row, and the time its
+    processor took."""
+    metrics = dict.fromkeys(METRICS, 0)
+    metrics["table"] = table_number
+    metrics["seconds"] = seconds
+    for row in rows:
+        metrics["rows"] += 1
+        for kind, _ in row.get("before", []) + row.get("after", []):
+            metrics["names" if kind == "name" else "parsed"] += 1
+        if has_class(row, "rejected"):
+            metrics["rejected"] += 1
+        if row.get("carried"):
+            metrics["carried"] += 1
+    return metrics
+
+
+def print_table_metrics(metrics):
+    """Print the counters of the processed tables, one line per table and their total."""
+    print("[INFO] Table processors:")
+    print(f"  {'table':>5} " + " ".join(f"{name:>8}" for name in METRICS) + f" {'ms':>9}")
+    for table in metrics:
+        print(f"  {table['table']:>5} " + " ".join(f"{table[name]:>8}" for name in METRICS) +
+              f" {table['seconds'] * 1000:>9.1f}")
+    print(f"  {'total':>5} " + " ".join(f"{sum(table[name] for table in metrics):>8}" for name in METRICS) +
+          f" {sum(table['seconds'] for table in metrics) * 1000:>9.1f}")
+
+
+def run_processor(table_number, container):
+    """Run the processor of a table on its container and return its processed rows and their table_metrics."""
+    start = time.perf_counter()
+    rows = table_processors[table_number](container)
+    return rows, table_metrics(table_number, rows, time.perf_counter() - start)
+
+
+# ===============================
+# Containers
+# ===============================
+
+def get_table_number(container):
+    """Return the X of the 'Table number: X' heading of the container, None if it cannot be read."""
     h3 = container.find("h3")
-    if h3:
-        # Assume h3.text format is 'Table number: X'
-        try:
-            table_number = int(h3.text.split(":")[1].strip())
-        except Exception:
-            table_number = None
-        if table_number is not None and table_number in table_processors:
-            processor = table_processors[table_number]
-            processed_container = processor(container)
-            processed_containers.append(processed_container)
+    # Assume h3.text format is 'Table number: X'
+    try:
+        return int(h3.text.split(":")[1].strip())
+    except Exception:
+        return None
+
+
+def process_fragment(table_number, html, annotated=True):
+    """Process the container of table_number given as HTML and return the rendered container HTML and the table
+    metrics. This is the work process_containers gives to its worker processes.
+    """
+    container = BeautifulSoup(html, "html.parser").select_one(".table-container")
+    rows, metrics = run_processor(table_number, container)
+    return str(render_table(container, table_number, rows, annotated)), metrics
+
+
+def fragment_records(table_number, html):
+    """Process the container of table_number given as HTML and return its records, see table_records, and the table
+    metrics. This is the work container_records gives to its worker processes.
+    """
+    container = BeautifulSoup(html, "html.parser").select_one(".table-container")
+    rows, metrics = run_processor(table_number, container)
+    return table_records(rows), metrics
+
+
+def container_html_records(html, metrics=None):
+    """Return the (name, cells) records of one .table-container given as HTML, see container_records.
+    This lets a reader of eaip_selected_tables.html process the tables one at a time, without parsing the whole file.
+    """
+    container = BeautifulSoup(html, "html.parser").select_one(".table-container")
+    return [(name, cells) for _, name, cells in container_records([container], metrics=metrics)]
+
+
+def table_jobs(containers):
+    """Pair each container with its table number, None for containers without h3 that are kept as they are.
+    Tables without a processor are left out.
+    """
+    jobs = []
+    for container in containers:
+        if container.find("h3"):
+            table_number = get_table_number(container)
+            if table_number is not None and table_number in table_processors:
+                jobs.append((table_number, container))
+            else:
+                print(
+                    f"WARNING: Table number {table_number} not found in table_processors - Table will be missing")
         else:
-            print(
-                f"WARNING: Table number {table_number} not found in table_processors - Table will be missing")
-    else:
-        # Append container even without h3
-        processed_containers.append(container)
-
-# Create new HTML with only Table 0, keeping collapsible functionality
-html_content = "<!DOCTYPE html>\n<html>\n<head>\n"
-html_content += "<meta charset=\"UTF-8\">\n"
-html_content += "<title>eAIP Selected Tables Stage 1</title>\n"
-
-# CSS with collapsible functionality and highlighting
-html_content += "<style>\n"
-html_content += "  body { font-family: Arial, sans-serif; }\n"
-html_content += "  .eaip-table { display: block; margin-bottom: 20px; width: 100%; transition: max-height 0.3s ease; }\n"
-html_content += "  .eaip-row { display: flex; max-height: 80px; overflow: hidden; transition: max-height 0.3s ease; cursor: pointer; }\n"
-html_content += "  .eaip-row.expanded { max-height: none; }\n"
-html_content += "  .eaip-table.collapsed { max-height: 150px; overflow: hidden; }\n"
-html_content += "  .eaip-row td, .eaip-row th { flex: 1; padding: 5px; border: 1px solid black; box-sizing: border-box; }\n"
-html_content += "  .table-container { position: relative; margin: 20px; }\n"
-html_content += "  .table-buttons { position: absolute; top: 0; right: 0; display: flex; gap: 5px; }\n"
-html_content += "  .table-buttons button { padding: 5px 10px; cursor: pointer; }\n"
-# Light green for highlighted rows
-html_content += "  .eaip-row.highlighted { background-color: #90ee90; }\n"
-html_content += "  .parsed-row { font-size: 12px; font-family: arial; }\n"
-html_content += "  .parsed-name { font-size: 12px; font-family: arial; }\n"
-html_content += "  .highlight-span { background-color: yellow; }\n"
-# Red for rejected rows
-html_content += "  .rejected { background-color: #ff0000; }\n"
-html_content += "  h3 { font-size: 1.2em; margin-bottom: 10px; }\n"
-html_content += "</style>\n"
-
-# JavaScript for collapsing/expanding rows and tables
-html_content += "<script>\n"
-html_content += "  document.addEventListener('DOMContentLoaded', function() {\n"
-html_content += "    var rows = document.querySelectorAll('.eaip-row');\n"
-html_content += "    var tables = document.querySelectorAll('.eaip-table');\n"
-html_content += "    // Row-level toggling\n"
-html_content += "    rows.forEach(function(row) {\n"
-html_content += "      row.addEventListener('click', function() {\n"
-html_content += "        this.classList.toggle('expanded');\n"
-html_content += "      });\n"
-html_content += "    });\n"
-html_content += "    // Per-table expand all rows\n"
-html_content += "    document.querySelectorAll('.expand-rows-btn').forEach(function(button) {\n"
-html_content += "      button.addEventListener('click', function() {\n"
-html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
-html_content += "        table.querySelectorAll('.eaip-row').forEach(function(row) {\n"
-html_content += "          row.classList.add('expanded');\n"
-html_content += "        });\n"
-html_content += "      });\n"
-html_content += "    });\n"
-html_content += "    // Per-table collapse all rows\n"
-html_content += "    document.querySelectorAll('.collapse-rows-btn').forEach(function(button) {\n"
-html_content += "      button.addEventListener('click', function() {\n"
-html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
-html_content += "        table.querySelectorAll('.eaip-row').forEach(function(row) {\n"
-html_content += "          row.classList.remove('expanded');\n"
-html_content += "        });\n"
-html_content += "      });\n"
-html_content += "    });\n"
-html_content += "    // Per-table collapse table\n"
-html_content += "    document.querySelectorAll('.collapse-table-btn').forEach(function(button) {\n"
-html_content += "      button.addEventListener('click', function() {\n"
-html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
-html_content += "        table.classList.add('collapsed');\n"
-html_content += "      });\n"
-html_content += "    });\n"
-html_content += "    // Per-table expand table\n"
-html_content += "    document.querySelectorAll('.expand-table-btn').forEach(function(button) {\n"
-html_content += "      button.addEventListener('click', function() {\n"
-html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
-html_content += "        table.classList.remove('collapsed');\n"
-html_content += "      });\n"
-html_content += "    });\n"
-html_content += "  });\n"
-html_content += "</script>\n"
-
-html_content += "</head>\n<body>\n"
-
-# Add only Table 0
-for container in processed_containers:
-    html_content += str(container) + "\n"
-
-html_content += "</body>\n</html>"
-
-# Save to new file
-output_file = "eaip_selected_tables_stage1.html"
-with open(output_file, "w", encoding="utf-8") as f:
-    f.write(html_content)
-print(f"Saved {len(processed_containers)} tables to '{output_file}'")
+            # Append container even without h3
+            jobs.append((None, container))
+    return jobs
+
+
+def run_jobs(jobs, workers, process, fragment_function, skipped, *args):
+    """Run process(table_number, container, *args) on each job, or fragment_function in that many worker
+    processes, each on a copy of its container. Containers without table number give skipped(container).
+    The results are returned in table order.
+    """
+    if not workers:
+        return [process(table_number, container, *args) if table_number is not None else skipped(container)
+                for table_number, container in jobs]
+
+    stage_file = os.path.abspath(__file__)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(call_stage, stage_file, fragment_function, table_number, str(container), *args)
+                   if table_number is not None else None
+                   for table_number, container in jobs]
+        # Merge in table order
+        return [future.result() if future else skipped(container) for future, (_, container) in zip(futures, jobs)]
+
+
+def collect_metrics(results, metrics):
+    """Split the (result, table metrics) pairs of run_jobs, adding the metrics to the metrics list if one is given.
+    Returns the results."""
+    if metrics is not None:
+        metrics.extend(table for _, table in results if table is not None)
+    return [result for result, _ in results]
+
+
+def process_containers(containers, workers=0, annotated=True, metrics=None):
+    """Run the table processor of each container and render the result, see render_table.
+    Returns the processed containers, tables without a processor are left out. With workers, the tables are
+    processed in that many worker processes, and the processed containers are returned as HTML, in the same order.
+    metrics, a list, receives the table_metrics of each processed table.
+    """
+    def process(table_number, container, annotated):
+        rows, table = run_processor(table_number, container)
+        return render_table(container, table_number, rows, annotated), table
+
+    def skipped(container):
+        return (str(container) if workers else container), None
+
+    results = run_jobs(table_jobs(containers), workers, process, "process_fragment", skipped, annotated)
+    return collect_metrics(results, metrics)
+
+
+def container_records(containers, workers=0, metrics=None):
+    """Run the table processor of each container and return the records of the parsed rows, without creating or
+    changing any tag: (container_index, name, cells) tuples, the rows stages 4 and 40 read from the cleaned file.
+    metrics, a list, receives the table_metrics of each processed table.
+    """
+    def process(table_number, container):
+        rows, table = run_processor(table_number, container)
+        return table_records(rows), table
+
+    results = run_jobs(table_jobs(containers), workers, process, "fragment_records", lambda container: ([], None))
+    return [(container_index, name, cells)
+            for container_index, records in enumerate(collect_metrics(results, metrics)) for name, cells in records]
+
+
+def read_records(input_file="eaip_selected_tables.html", workers=0, metrics=None):
+    """Return the records of the tables of an eaip_selected_tables.html file, see container_records."""
+    with open(input_file, "r", encoding="utf-8") as f:
+        soup = BeautifulSoup(f, "html.parser")
+    return container_records(soup.select(".table-container"), workers, metrics)
+
+
+def make_html(containers):
+    """Return the eaip_selected_tables_stage1.html document of the processed containers."""
+    # Create new HTML with only Table 0, keeping collapsible functionality
+    html_content = "<!DOCTYPE html>\n<html>\n<head>\n"
+    html_content += "<meta charset=\"UTF-8\">\n"
+    html_content += "<title>eAIP Selected Tables Stage 1</title>\n"
+
+    # CSS with collapsible functionality and highlighting
+    html_content += "<style>\n"
+    html_content += "  body { font-family: Arial, sans-serif; }\n"
+    html_content += "  .eaip-table { display: block; margin-bottom: 20px; width: 100%; transition: max-height 0.3s ease; }\n"
+    html_content += "  .eaip-row { display: flex; max-height: 80px; overflow: hidden; transition: max-height 0.3s ease; cursor: pointer; }\n"
+    html_content += "  .eaip-row.expanded { max-height: none; }\n"
+    html_content += "  .eaip-table.collapsed { max-height: 150px; overflow: hidden; }\n"
+    html_content += "  .eaip-row td, .eaip-row th { flex: 1; padding: 5px; border: 1px solid black; box-sizing: border-box; }\n"
+    html_content += "  .table-container { position: relative; margin: 20px; }\n"
+    html_content += "  .table-buttons { position: absolute; top: 0; right: 0; display: flex; gap: 5px; }\n"
+    html_content += "  .table-buttons button { padding: 5px 10px; cursor: pointer; }\n"
+    # Light green for highlighted rows
+    html_content += "  .eaip-row.highlighted { background-color: #90ee90; }\n"
+    html_content += "  .parsed-row { font-size: 12px; font-family: arial; }\n"
+    html_content += "  .parsed-name { font-size: 12px; font-family: arial; }\n"
+    html_content += "  .highlight-span { background-color: yellow; }\n"
+    # Red for rejected rows
+    html_content += "  .rejected { background-color: #ff0000; }\n"
+    html_content += "  h3 { font-size: 1.2em; margin-bottom: 10px; }\n"
+    html_content += "</style>\n"
+
+    # JavaScript for collapsing/expanding rows and tables
+    html_content += "<script>\n"
+    html_content += "  document.addEventListener('DOMContentLoaded', function() {\n"
+    html_content += "    var rows = document.querySelectorAll('.eaip-row');\n"
+    html_content += "    var tables = document.querySelectorAll('.eaip-table');\n"
+    html_content += "    // Row-level toggling\n"
+    html_content += "    rows.forEach(function(row) {\n"
+    html_content += "      row.addEventListener('click', function() {\n"
+    html_content += "        this.classList.toggle('expanded');\n"
+    html_content += "      });\n"
+    html_content += "    });\n"
+    html_content += "    // Per-table expand all rows\n"
+    html_content += "    document.querySelectorAll('.expand-rows-btn').forEach(function(button) {\n"
+    html_content += "      button.addEventListener('click', function() {\n"
+    html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
+    html_content += "        table.querySelectorAll('.eaip-row').forEach(function(row) {\n"
+    html_content += "          row.classList.add('expanded');\n"
+    html_content += "        });\n"
+    html_content += "      });\n"
+    html_content += "    });\n"
+    html_content += "    // Per-table collapse all rows\n"
+    html_content += "    document.querySelectorAll('.collapse-rows-btn').forEach(function(button) {\n"
+    html_content += "      button.addEventListener('click', function() {\n"
+    html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
+    html_content += "        table.querySelectorAll('.eaip-row').forEach(function(row) {\n"
+    html_content += "          row.classList.remove('expanded');\n"
+    html_content += "        });\n"
+    html_content += "      });\n"
+    html_content += "    });\n"
+    html_content += "    // Per-table collapse table\n"
+    html_content += "    document.querySelectorAll('.collapse-table-btn').forEach(function(button) {\n"
+    html_content += "      button.addEventListener('click', function() {\n"
+    html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
+    html_content += "        table.classList.add('collapsed');\n"
+    html_content += "      });\n"
+    html_content += "    });\n"
+    html_content += "    // Per-table expand table\n"
+    html_content += "    document.querySelectorAll('.expand-table-btn').forEach(function(button) {\n"
+    html_content += "      button.addEventListener('click', function() {\n"
+    html_content += "        var table = this.closest('.table-container').querySelector('.eaip-table');\n"
+    html_content += "        table.classList.remove('collapsed');\n"
+    html_content += "      });\n"
+    html_content += "    });\n"
+    html_content += "  });\n"
+    html_content += "</script>\n"
+
+    html_content += "</head>\n<body>\n"
+
+    # Add only Table 0
+    for container in containers:
+        html_content += str(container) + "\n"
+
+    html_content += "</body>\n</html>"
+    return html_content
+
+
+def main(input_file="eaip_selected_tables.html", output_file="eaip_selected_tables_stage1.html", workers=0,
+         coords_cache_file=None):
+    # Load eaip_selected_tables.html
+    with open(input_file, "r", encoding="utf-8") as f:
+        soup = BeautifulSoup(f, "html.parser")
+
+    use_coords_cache(coords_cache_file, workers)
+
+    # Extract all table containers
+    containers = soup.select(".table-container")
+    metrics = []
+    processed_containers = process_containers(containers, workers, metrics=metrics)
+    if coords_cache is not None:
+        save_coords_cache()
+    print_table_metrics(metrics)
+
+    # Save to new file
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(make_html(processed_containers))
+    print(f"Saved {len(processed_containers)} tables to '{output_file}'")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Add the parsed rows to the selected eAIP tables.")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="Process the tables in this many worker processes (default: 0, all in this process)")
+    parser.add_argument("--coords-cache", default=COORDS_CACHE_FILE, metavar="FILE",
+                        help="Keep the formatted coordinates between runs in this file, empty to disable it; not used "
+                             f"with workers (default: {COORDS_CACHE_FILE})")
+    args = parser.parse_args()
+    main(workers=args.workers, coords_cache_file=args.coords_cache)
@@ -1,24 +1,163 @@
-from bs4 import BeautifulSoup
-
-# Input and output file paths
-input_file = "eaip_selected_tables_stage1.html"
-output_file = "eaip_selected_tables_stage1_cleaned.html"
-
-# Load the input HTML file
-with open(input_file, "r", encoding="utf-8") as f:
-    soup = BeautifulSoup(f, "html.parser")
-
-# Iterate over each table container
-for container in soup.select('.table-container'):
-    # Find all table row elements within the container
-    for tr in container.find_all('tr'):
-        classes = tr.get('class', [])
-        # Keep only rows that are parsed name rows or parsed rows
-        if not ("parsed-name" in classes or "parsed-row" in classes):
-            tr.decompose()
-
-# Write the cleaned HTML to output file
-with open(output_file, "w", encoding="utf-8") as f:
-    f.write(str(soup))
-
-print(f"Cleaned {len(soup.select('.table-container'))} tables to '{output_file}'")
\ No newline at end of file
+import html
+import re
+import sys
+
+# Size of the blocks the input file is read in
+CHUNK_SIZE = 1 << 16
+
+# Rows kept in the cleaned tables, every other row of a table container is dropped
+KEPT_ROW_CLASSES = {"parsed-name", "parsed-row"}
+
+# The table containers of the stage1 file are written by BeautifulSoup, so every tag is closed, attribute values
+# are quoted and a literal "<" only appears in comments, scripts and styles: a regular expression is enough to
+# tokenize it. Groups: comment, declaration, closing slash, tag name, attributes.
+TOKEN_PATTERN = re.compile(r'<(?:(!--)|!([^>]*)>|(/?)([a-zA-Z][a-zA-Z0-9]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>)')
+ATTRIBUTE_PATTERN = re.compile(r'([^\s=/>]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?')
+CLASS_PATTERN = re.compile(r'\sclass="([^"]*)"')
+RAW_TEXT_TAGS = {"script", "style"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track",
+             "wbr"}
+
+
+def iter_chunks(input_file, chunk_size=CHUNK_SIZE):
+    with open(input_file, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def normalize_start_tag(tag, attrs):
+    """Serialize a start tag the way BeautifulSoup does: double-quoted attributes, void elements closed with "/>"
+    and the charset of meta tags replaced by utf-8.
+    """
+    parts = [tag]
+    for name, value in ATTRIBUTE_PATTERN.findall(attrs):
+        if value[:1] in ("\"", "'"):
+            value = value[1:-1]
+        value = html.unescape(value)
+        if tag == "meta" and name.lower() == "charset":
+            value = "utf-8"
+        value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        if '"' in value and "'" not in value:
+            parts.append(f"{name.lower()}='{value}'")
+        else:
+            parts.append(f'{name.lower()}="{value.replace(chr(34), "&quot;")}"')
+    return "<" + " ".join(parts) + ("/>" if tag in VOID_TAGS else ">")
+
+
+def normalize_declaration(declaration):
+    """BeautifulSoup writes the doctype on a line of its own."""
+    if declaration.startswith("DOCTYPE"):
+        return f"<!{declaration}>\n"
+    return f"<!{declaration}>"
+
+
+def clean_chunks(chunks, out):
+    """Write the stage1 HTML given as an iterable of text chunks to out, without the rows of the table containers
+    that are not parsed name or parsed rows. The text is tokenized in one pass, only the kept markup is written. The
+    containers are copied as they are, the tags around them are normalized so that the output is the one of
+    BeautifulSoup.
+    Returns the number of table containers.
+    """
+    containers = 0
+    div_depth = 0          # depth of nested divs, counted from the current table container
+    skip_depth = 0         # depth of nested rows, counted from the row being dropped
+    raw_text_end = None    # end of the comment, script or style the previous chunk ended in
+    buffer = ""
+
+    for chunk in chunks:
+        buffer += chunk
+        pos = 0
+        while True:
+            if raw_text_end:
+                end = buffer.find(raw_text_end, pos)
+                if end < 0:
+                    break
+                end += len(raw_text_end)
+                if not skip_depth:
+                    out.write(buffer[pos:end])
+                pos = end
+                raw_text_end = None
+                continue
+
+            match = TOKEN_PATTERN.search(buffer, pos)
+            if not match:
+                break
+            if not skip_depth:
+                out.write(buffer[pos:match.start()])
+            pos = match.start()
+            comment, declaration, closing, tag, attrs = match.groups()
+            if comment:
+                raw_text_end = "-->"
+                continue
+            token = match.group(0)
+            if declaration is not None:
+                if not skip_depth:
+                    out.write(normalize_declaration(declaration) if not div_depth else token)
+                pos = match.end()
+                continue
+
+            tag = tag.lower()
+            if not div_depth and not closing:
+                token = normalize_start_tag(tag, attrs)
+            if tag == "tr" and div_depth:
+                if closing:
+                    if skip_depth:
+                        skip_depth -= 1
+                        pos = match.end()
+                        continue
+                elif skip_depth:
+                    skip_depth += 1
+                else:
+                    class_match = CLASS_PATTERN.search(attrs)
+                    classes = class_match.group(1).split() if class_match else []
+                    if KEPT_ROW_CLASSES.isdisjoint(classes):
+                        skip_depth = 1
+            elif tag == "div":
+                if closing:
+                    div_depth = max(div_depth - 1, 0)
+                elif div_depth:
+                    div_depth += 1
+                else:
+                    class_match = CLASS_PATTERN.search(attrs)
+                    if class_match and "table-container" in class_match.group(1).split():
+                        containers += 1
+                        div_depth = 1
+            elif tag in RAW_TEXT_TAGS and not closing:
+                raw_text_end = f"</{tag}>"
+
+            if not skip_depth:
+                out.write(token)
+            pos = match.end()
+
+        # Keep the unfinished tag or text at the end of the buffer for the next chunk
+        if raw_text_end:
+            tail = pos
+        else:
+            tail = buffer.find("<", pos)
+            if tail < 0:
+                tail = len(buffer)
+        if not skip_depth:
+            out.write(buffer[pos:tail])
+        buffer = buffer[tail:]
+
+    if not skip_depth:
+        out.write(buffer)
+    return containers
+
+
+def clean_tables(input_file, output_file, chunk_size=CHUNK_SIZE):
+    """Clean input_file into output_file with clean_chunks, reading it chunk_size characters at a time."""
+    with open(output_file, "w", encoding="utf-8") as out:
+        return clean_chunks(iter_chunks(input_file, chunk_size), out)
+
+
+def main(input_file="eaip_selected_tables_stage1.html", output_file="eaip_selected_tables_stage1_cleaned.html"):
+    containers = clean_tables(input_file, output_file)
+    print(f"Cleaned {containers} tables to '{output_file}'")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
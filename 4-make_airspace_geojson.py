@@ -1,17 +1,15 @@
 import json
-import re
 from bs4 import BeautifulSoup
 import math
-# from preprocess_border_file import read_border_geojson
 
 # ===============================
 # Regex Patterns
 # ===============================
 
-REGEX_ARC = r'arc\s+(anti-horaire|horaire)\s+de\s+([\d.]+)\s*(NM|m|km)\s+de\s+rayon\s+centré\s+sur\s+(\d{6}[NS])(?:\s*@\s*(\d{7}[EW]))?'
-REGEX_CIRCLE = r'cercle\s+de\s+([\d.]+)\s*(NM|m|km)\s+de\s+rayon\s+centré\s+sur\s+(\d{6}[NS])(?:\s*@\s*(\d{7}[EW]))?'
-REGEX_COORD_PAIR = r'\d{6}[NSEW]\s*@\s*\d{7}[NSEW]'
-REGEX_COORD_SINGLE = r'\d{6,7}[NSEW]'
+from patterns import (ARC_PATTERN, CIRCLE_PATTERN, COORD_PAIR_PATTERN, CASED_COORD_PAIR_PATTERN,
+                      COORD_PAIR_GROUPS_PATTERN, COORD_SINGLE_PATTERN, token_keywords)
+from borders import load_border, ring_border, border_path, load_parks
+from table_specs import row_fields, row_coords
 
 
 # ===============================
@@ -74,42 +72,12 @@ def format_dms(value, is_latitude):
         # For longitude, degrees should be 3 digits
         hem = 'E' if value >= 0 else 'W'
         return f"{deg:03d}{minutes:02d}{seconds:02d}{hem}"
-# New function to parse textual arc descriptions and return polygon coordinates
-def read_border_geojson(border_file):
-    try:
-        with open(border_file, 'r', encoding='utf-8') as bf:
-            france_geo = json.load(bf)
-            if 'features' in france_geo and len(france_geo['features']) > 0:
-                feature = france_geo['features'][0]
-                geom = feature.get('geometry', {})
-                geo_type = geom.get('type', '').lower()
-                if geo_type == 'polygon':
-                    border_coords = geom.get('coordinates', [])
-                    if border_coords and isinstance(border_coords, list):
-                        border_coords = border_coords[0]
-                    else:
-                        border_coords = []
-                elif geo_type == 'linestring':
-                    border_coords = geom.get('coordinates', [])
-                else:
-                    border_coords = []
-            else:
-                border_coords = []
-            # print(f"[INFO] Loaded border from '{border_file}' with {len(border_coords)} coordinates.")
-            return border_coords
-    except Exception as e:
-        print(f"[ERROR] Error reading {border_file}: {e}")
-        return []
 def read_parks_json(parks_file):
-    try:
-        with open(parks_file, 'r', encoding='utf-8') as pf:
-            return json.load(pf)
-    except Exception as e:
-        print(f"[ERROR] Error reading park file {parks_file}: {e}")
-    return None
+    """Return the parks of parks_file, read once per process, None if it cannot be read."""
+    return load_parks(parks_file)
 
 def parse_circle_text(text):
-    m = re.search(REGEX_CIRCLE, text, re.IGNORECASE)
+    m = CIRCLE_PATTERN.search(text)
     if not m:
         print(f"No match found for circle description: {text}")
         return None
@@ -143,7 +111,7 @@ def parse_circle_text(text):
 
 def construct_arc(prev_pt, arc_text, next_pt,name   ):
 
-    m = re.search(REGEX_ARC, arc_text, re.IGNORECASE)
+    m = ARC_PATTERN.search(arc_text)
     if not m:
         print(f"[ERROR] No match found for arc description: {arc_text}")
         return None
@@ -223,14 +191,14 @@ def process_arc_token(token, prev_token, next_token,name):
         #     print(f"Previous token is also an arc: {prev_token}")
         # if "arc" in next_token.lower():
         #     print(f"Next token is also an arc: {next_token}")
-        m_prev = re.search(REGEX_COORD_PAIR, prev_token, re.IGNORECASE)
-        m_next = re.search(REGEX_COORD_PAIR, next_token, re.IGNORECASE)
+        m_prev = COORD_PAIR_PATTERN.search(prev_token)
+        m_next = COORD_PAIR_PATTERN.search(next_token)
         # print(f"[DEBUG] Neighbour prev_token: '{prev_token}' -> m_prev: {m_prev.group(0) if m_prev else None}")
         # print(f"[DEBUG] Neighbour next_token: '{next_token}' -> m_next: {m_next.group(0) if m_next else None}")
         if m_prev and m_next:
             # Extract the first coordinate pair from each token
-            prev_match = re.search(rf'({REGEX_COORD_SINGLE})\s*@\s*({REGEX_COORD_SINGLE})', prev_token, re.IGNORECASE)
-            next_match = re.search(rf'({REGEX_COORD_SINGLE})\s*@\s*({REGEX_COORD_SINGLE})', next_token, re.IGNORECASE)
+            prev_match = COORD_PAIR_GROUPS_PATTERN.search(prev_token)
+            next_match = COORD_PAIR_GROUPS_PATTERN.search(next_token)
             # print(f"[DEBUG] Detailed prev_match: {prev_match.groups() if prev_match else None}")
             # print(f"[DEBUG] Detailed next_match: {next_match.groups() if next_match else None}")
             if prev_match and next_match:
@@ -267,7 +235,7 @@ def process_circle_token(token):
     return ([], False)
 
 def get_coordinates(token):
-    return re.findall(REGEX_COORD_PAIR, token, re.IGNORECASE)
+    return COORD_PAIR_PATTERN.findall(token)
 
 def get_lonLat  (token):
     pairs = get_coordinates(token)
@@ -278,9 +246,9 @@ def get_lonLat  (token):
                 print(f"Invalid coordinate pair format in pair: {pair}")
                 continue
             lat_str, lon_str = parts[0], parts[1]
-            if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-                m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-                m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+            if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+                m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+                m_lon = COORD_SINGLE_PATTERN.search(lon_str)
                 if m_lat and m_lon:
                     lat_str = m_lat.group(0)
                     lon_str = m_lon.group(0)
@@ -297,9 +265,9 @@ def get_lonLat  (token):
                 print(f"Invalid coordinate pair format: {token}")
             return []
         lat_str, lon_str = parts[0], parts[1]
-        if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-            m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-            m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+        if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+            m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+            m_lon = COORD_SINGLE_PATTERN.search(lon_str)
             if m_lat and m_lon:
                 lat_str = m_lat.group(0)
                 lon_str = m_lon.group(0)
@@ -311,7 +279,7 @@ def get_lonLat  (token):
         return [[lon, lat]]
 
 def substract_lonLat(text):
-    m = re.compile(REGEX_COORD_PAIR).search(text)
+    m = CASED_COORD_PAIR_PATTERN.search(text)
     if m:
         extracted = m.group(0)
         remaining_text = text.replace(extracted, '').strip()
@@ -320,8 +288,8 @@ def substract_lonLat(text):
         return None,text
 
 def substract_alllonLat(text):
-    matches = re.findall(REGEX_COORD_PAIR, text, re.IGNORECASE)
-    remaining_text = re.sub(REGEX_COORD_PAIR, '', text, flags=re.IGNORECASE).strip()
+    matches = COORD_PAIR_PATTERN.findall(text)
+    remaining_text = COORD_PAIR_PATTERN.sub('', text).strip()
     return matches, remaining_text
        
 def is_pure_lonLat(token):
@@ -339,9 +307,9 @@ def split_twin_tokens(token):
                 print(f"Invalid coordinate pair format in pair: {pair}")
                 continue
             lat_str, lon_str = parts[0], parts[1]
-            if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-                m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-                m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+            if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+                m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+                m_lon = COORD_SINGLE_PATTERN.search(lon_str)
                 if m_lat and m_lon:
                     lat_str = m_lat.group(0)
                     lon_str = m_lon.group(0)
@@ -359,9 +327,9 @@ def split_twin_tokens(token):
                 print(f"Invalid coordinate pair format: {token}")
             return []
         lat_str, lon_str = parts[0], parts[1]
-        if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-            m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-            m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+        if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+            m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+            m_lon = COORD_SINGLE_PATTERN.search(lon_str)
             if m_lat and m_lon:
                 lat_str = m_lat.group(0)
                 lon_str = m_lon.group(0)
@@ -383,75 +351,37 @@ def make_triplet(token,prev_token,next_token):
 
 def get_shortest_path_for_triplet(triplet, border_file):
     """For a given triplet with 'prev_token' and 'next_token' in 'lat@lon' format,
-    find the closest points in border_coords and return the shortest path between them
+    find the closest points of the border and return the shortest path between them
     as a list of coordinate pairs [lon, lat].
-    border_coords is a list of [lon, lat] pairs.
+    The border is read once per process, see load_border, and the walk shared with the airspaces following the same
+    stretch of border, see border_path.
     """
-    try:
-        border_coords = read_border_geojson(border_file)
-    except Exception as e:
-        print(f"[ERROR] Failed to read border file: {e}")
-        return [], False
+    border = load_border(border_file)
     # Convert triplet beginning and end to [lon, lat] using convert_coord
     try:
         b_lat_str, b_lon_str = triplet["prev_token"].split('@')
         b_lat = convert_coord(b_lat_str)
         b_lon = convert_coord(b_lon_str)
-        triplet_begin = (b_lon, b_lat)  # border_coords order
+        triplet_begin = (b_lon, b_lat)  # border order
     except Exception as e:
         return [], False
     try:
         e_lat_str, e_lon_str = triplet["next_token"].split('@')
         e_lat = convert_coord(e_lat_str)
         e_lon = convert_coord(e_lon_str)
-        triplet_end = (e_lon, e_lat)  # border_coords order
+        triplet_end = (e_lon, e_lat)  # border order
     except Exception as e:
         return [], False
-    
-    def find_closest_index(pt, coords):
-        best_idx = None
-        best_dist = None
-        for idx, coord in enumerate(coords):
-            dist = (pt[0] - coord[0])**2 + (pt[1] - coord[1])**2
-            if best_dist is None or dist < best_dist:
-                best_dist = dist
-                best_idx = idx
-        return best_idx
-    
-    i_begin = find_closest_index(triplet_begin, border_coords)
-    i_end = find_closest_index(triplet_end, border_coords)
-    if i_begin is None or i_end is None:
+
+    chosen_path = border_path(border_file, border, triplet_begin, triplet_end)
+    if chosen_path is None:
         print(f"[DEBUG] No closest index found for triplet {triplet['token']}")
         return [], False
-    
-    # print(triplet["prev_token"],triplet["next_token"])
-    # print(border_coords[i_begin],border_coords[i_end])
-    # print(i_begin,i_end)
-    
-    def circular_path(i, j, coords):
-        if i <= j:
-            return coords[i:j+1]
-        else:
-            return coords[i:] + coords[:j+1]
-    
-    path1 = circular_path(i_begin, i_end, border_coords)
-    path2 = circular_path(i_end, i_begin, border_coords)[::-1]  # reverse to go from begin to end
-    
-    def path_length(path):
-        total = 0.0
-        for k in range(len(path) - 1):
-            dx = path[k+1][0] - path[k][0]
-            dy = path[k+1][1] - path[k][1]
-            total += (dx*dx + dy*dy)**0.5
-        return total
-    
-    length1 = path_length(path1)
-    length2 = path_length(path2)
-    chosen_path = path1 if length1 <= length2 else path2
-    
+
     if len(chosen_path) == 0:
         return [], False
-    return chosen_path, True
+    # The points of the walk are shared with the other airspaces following it
+    return [list(point) for point in chosen_path], True
 
 def process_france_token(token,prev_token,next_token,border_files):
     points=[]
@@ -503,7 +433,7 @@ def process_france_token(token,prev_token,next_token,border_files):
     return [], False
 
 def get_first_latLon(token):
-    match_list = re.findall(REGEX_COORD_PAIR, token, re.IGNORECASE)
+    match_list = COORD_PAIR_PATTERN.findall(token)
     if match_list:
         return [match_list[0]]
     else:
@@ -547,44 +477,31 @@ def valid_ring(ring):
             return False
     return True
 
-def process_parc_ecrins_token(token, prev_token, next_token):
+def process_parc_ecrins_token(token, prev_token, next_token, parks_data=None):
     """
     Expects token to be a string representing the key in parks.json,
     along with its previous and next tokens (in 'lat@lon' format).
+    parks_data is the content of the parks file, parks.json (read once per process) if not given.
     Returns the shortest path between the points on the park border (from parks.json) and a success flag.
     """
     # Build a triplet from the provided tokens
     triplet = make_triplet(token, prev_token, next_token)
 
-    import json
-    try:
-        with open('parks.json', 'r', encoding='utf-8') as pf:
-            parks = json.load(pf)
-    except Exception as e:
-        print(f"[ERROR] Failed to read parks.json: {e}")
+    if parks_data is None:
+        parks_data = load_parks()
+    if parks_data is None:
         return [], False
 
     key = "420 . PARC NATIONAL DES ECRINS"
-    if key not in parks:
+    if key not in parks_data:
         print(f"[WARN] Park key '{key}' not found in parks.json")
         return [], False
 
-    border_coords = parks[key].get('coordinates', [])
+    border_coords = parks_data[key].get('coordinates', [])
     if not border_coords:
         print(f"[WARN] No coordinates found for park key: {key}")
         return [], False
 
-    # Helper function to find the closest index in border_coords for a given point
-    def find_closest_index(pt, coords):
-        best_idx = None
-        best_dist = None
-        for idx, coord in enumerate(coords):
-            dist = (pt[0] - coord[0])**2 + (pt[1] - coord[1])**2
-            if best_dist is None or dist < best_dist:
-                best_dist = dist
-                best_idx = idx
-        return best_idx
-
     # Convert previous token to coordinate (expecting format 'lat@lon')
     try:
         b_lat_str, b_lon_str = triplet["prev_token"].split('@')
@@ -605,37 +522,17 @@ def process_parc_ecrins_token(token, prev_token, next_token):
         print(f"[ERROR] Failed to parse next token: {e}")
         return [], False
 
-    i_begin = find_closest_index(triplet_begin, border_coords)
-    i_end = find_closest_index(triplet_end, border_coords)
-    if i_begin is None or i_end is None:
+    border = ring_border(('parks.json', key), border_coords)
+    chosen_path = border_path(('parks.json', key), border, triplet_begin, triplet_end)
+    if chosen_path is None:
         print(f"[DEBUG] No closest index found for triplet {triplet}")
         return [], False
-
-    def circular_path(i, j, coords):
-        if i <= j:
-            return coords[i:j+1]
-        else:
-            return coords[i:] + coords[:j+1]
-
-    path1 = circular_path(i_begin, i_end, border_coords)
-    path2 = circular_path(i_end, i_begin, border_coords)[::-1]  
-
-    def path_length(path):
-        total = 0.0
-        for k in range(len(path) - 1):
-            dx = path[k+1][0] - path[k][0]
-            dy = path[k+1][1] - path[k][1]
-            total += (dx*dx + dy*dy)**0.5
-        return total
-
-    length1 = path_length(path1)
-    length2 = path_length(path2)
-    chosen_path = path1 if length1 <= length2 else path2
     if len(chosen_path) == 0:
         return [], False
-    return chosen_path, True
+    # The points of the walk are shared with the other airspaces following it
+    return [list(point) for point in chosen_path], True
 
-def process_coordinates(name,all_coords,border_files):
+def process_coordinates(name,all_coords,border_files, parks_data=None):
     """
     Expects all_coords to be a list of coordinate tokens.
     Processes each token using arc, circle, or plain coordinate logic.
@@ -652,32 +549,32 @@ def process_coordinates(name,all_coords,border_files):
         if 'cercle de' in all_coords[0].lower() and 'de rayon centré sur' in all_coords[0].lower():
             pass
         elif any(x in name.lower() for x in [" para "]):
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1:
                 all_coords = [f"cercle de 3 NM de rayon centré sur {match_list[0]}"]
         elif any(x in name.lower() for x in [" treuillage "]):
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1:
                 all_coords = [f"cercle de 600m de rayon centré sur {match_list[0]}"]
         elif any(x in name.lower() for x in ["aéromodélisme"]):
             all_coords = get_first_latLon(all_coords[0])
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1:
                 all_coords = [f"cercle de 600m de rayon centré sur {match_list[0]}"]
         elif any(x in name.lower() for x in [" voltige "]):
             all_coords = get_first_latLon(all_coords[0])
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1:
                 all_coords = [f"cercle de 1 NM de rayon centré sur {match_list[0]}"]
                 # TODO : check if what we simplify is actually correct
         elif any(x in name.lower() for x in [" activité particulière "]):
             all_coords = get_first_latLon(all_coords[0])
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1:
                 all_coords = [f"cercle de 1 km de rayon centré sur {match_list[0]}"]
         elif any(x in name.lower() for x in ["lf d "]):
             all_coords = get_first_latLon(all_coords[0])
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1 and name== "LF D 562 - LA VALETTE":
                 all_coords = [f"cercle de 1.35 NM de rayon centré sur {match_list[0]}"]
             elif len(match_list) == 1 and name== "LF D 595 LASER HAUTE PROVENCE":
@@ -694,30 +591,29 @@ def process_coordinates(name,all_coords,border_files):
         next_index = i + 1 if i != total - 1 else 0
         prev_token = all_coords[prev_index]
         next_token = all_coords[next_index]
+        keywords = token_keywords(token)
 
-
-
-        if "arc horaire" in token.lower() or "arc anti-horaire" in token.lower():
+        if "arc horaire" in keywords or "arc anti-horaire" in keywords:
             token_points, complete = process_arc_token(token, prev_token, next_token,name)
             if not complete: 
                 had_missing = True
                 print(f"[WARN] Unprocessed item: {name} - {token}")
-        elif "cercle de" in token.lower() and "centré sur" in token.lower():
+        elif "cercle de" in keywords and "centré sur" in keywords:
             token_points, complete = process_circle_token(token)
             if not complete: 
                 had_missing = True
                 print(f"[WARN] Unprocessed item: {name} - {token}")
-        elif "frontière" in token.lower() or "la côte atlantique française" in token.lower() or "côte corse" in token.lower() or ("côte méditérrannéenne" in token.lower() and len(token)==21) or "limite des eaux territoriales atlantique françaises" in token.lower(): 
+        elif "frontière" in keywords or "la côte atlantique française" in keywords or "côte corse" in keywords or ("côte méditérrannéenne" in keywords and len(token)==21) or "limite des eaux territoriales atlantique françaises" in keywords:
             token_points, complete = process_france_token(token, prev_token, next_token, border_files)
             if not complete:
                 had_missing = True
                 print(f"[WARN] Unprocessed item: {name} - {token}")
-        elif "parc national des écrins" in token.lower() :
-            token_points, complete = process_parc_ecrins_token(token, prev_token, next_token)
+        elif "parc national des écrins" in keywords:
+            token_points, complete = process_parc_ecrins_token(token, prev_token, next_token, parks_data)
             if not complete:
                 had_missing = True
                 print(f"[WARN] Unprocessed item: {name} - {token}")
-        elif "axe" in token.lower() or "limite des eaux" in token.lower():
+        elif "axe" in keywords or "limite des eaux" in keywords:
             print(f"[DEBUG] token: {token} : {name}")
             had_missing = True
         else:
@@ -735,168 +631,105 @@ def process_coordinates(name,all_coords,border_files):
 
 
 
-def main(input_file, geojson_file, border_files, parks_file):
-    # Parse the cleaned HTML file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
+def new_stats():
+    """Counters of the parsed rows that were skipped, reported by print_stats."""
+    return {
+        "airspaces": 0,
+        "empty_airspaces": 0,
+        "incomplete_airspaces": 0,
+        "skipped_airspaces": 0,
+        "empty_coords": 0,
+        "points": 0,
+        "segments": 0,
+        "not_valid_rings": 0,
+        "missing_parks": 0
+    }
 
-    # Load the parks data from JSON file
-    parks_data = read_parks_json(parks_file)
 
-    features = []
-    airspaces = 0
-    empty_airspaces = 0
-    incomplete_airspaces = 0
-    skipped_airspaces = 0
-    empty_coords = 0
-    points = 0
-    segments = 0
-    not_valid_rings = 0
-    missing_parks = 0
+def get_row_fields(container_index, cells):
+    """Return (icao_class, upperAltitude, lowerAltitude, radio, schedule, restrictions, remarks) from the cell texts
+    of a parsed row, according to the spec of its table."""
+    fields = row_fields(container_index, cells)
+    return (fields["icao_class"], fields["upper"], fields["lower"], fields["radio"], fields["schedule"],
+            fields["restrictions"], fields["remarks"])
 
-    # For every table container, process rows in document order to associate parsed rows with the previous parsed name row
-    for container_index, container in enumerate(soup.select('.table-container')):
-        current_name = None
-        for tr in container.find_all('tr'):
-            classes = tr.get('class', [])
-            if 'parsed-name' in classes:
-                td = tr.find('td')
-                if td:
-                    current_name = td.get_text(strip=True)
-            elif 'parsed-row' in classes:
-                airspaces += 1
-                icao_class = ""
-                upperAltitude = ""
-                lowerAltitude = ""
-                radio = ""
-                schedule = ""
-                restrictions = ""
-                remarks = ""
-
-                tds = tr.find_all('td')
-                if not tds:
-                    continue
-                cell_text = tds[0].get_text(strip=True)
-
-                if container_index in [0, 1, 2, 3, 12]:
-                    icao_class = tds[1].get_text(strip=True)
-                    altitude_text = tds[2].get_text(strip=True)
-                    alt_parts = altitude_text.split("------------")
-                    upperAltitude = alt_parts[0].strip()
-                    lowerAltitude = alt_parts[1].strip()
-                    radio = tds[3].get_text(strip=True)
-                    remarks = tds[4].get_text(strip=True)
-                elif container_index == 4:
-                    altitude_text = tds[1].get_text(strip=True)
-                    alt_parts = altitude_text.split("------------")
-                    upperAltitude = alt_parts[0].strip()
-                    lowerAltitude = alt_parts[1].strip()
-                    radio = tds[2].get_text(strip=True)
-                    remarks = tds[3].get_text(strip=True)
-                elif container_index in [5, 6]:
-                    altitude_text = tds[1].get_text(strip=True)
-                    alt_parts = altitude_text.split("------------")
-                    upperAltitude = alt_parts[0].strip()
-                    lowerAltitude = alt_parts[1].strip()
-                    schedule = tds[2].get_text(strip=True)
-                    restrictions = tds[3].get_text(strip=True)
-                    remarks = tds[4].get_text(strip=True)
-                elif container_index == 7:
-                    altitude_text = tds[1].get_text(strip=True)
-                    alt_parts = altitude_text.split("------------")
-                    upperAltitude = alt_parts[0].strip()
-                    lowerAltitude = alt_parts[1].strip()
-                    restrictions = tds[2].get_text(strip=True)
-                elif container_index in [8, 9]:
-                    altitude_text = tds[1].get_text(strip=True)
-                    alt_parts = altitude_text.split("------------")
-                    upperAltitude = alt_parts[0].strip()
-                    lowerAltitude = alt_parts[1].strip()
-                    schedule = tds[2].get_text(strip=True)
-                    restrictions = tds[3].get_text(strip=True)
-                    remarks = tds[4].get_text(strip=True)
-                elif container_index == 10:
-                    altitude_text = tds[1].get_text(strip=True)
-                    alt_parts = altitude_text.split("------------")
-                    upperAltitude = alt_parts[0].strip()
-                    lowerAltitude = alt_parts[1].strip()
-                    remarks = tds[2].get_text(strip=True)
-                elif container_index == 11:
-                    upperAltitude = tds[1].get_text(strip=True)
-                    lowerAltitude = "GND"
-                    restrictions = tds[2].get_text(strip=True)
-                    remarks = tds[3].get_text(strip=True)
 
-                try:
-                    clean_text = re.sub(r'[\x00-\x1F]+', ' ', cell_text)
-                    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                    coords = json.loads(clean_text)
-                except Exception as e:
-                    print(f"Error parsing coordinates: {e}")
-                    print(f"Cell text: {cell_text}")
-                    continue
+def make_airspace_feature(current_name, container_index, cells, parks_data, border_files, stats):
+    """Build the GeoJSON feature of one parsed row from its cell texts.
+    Returns None when the row is skipped, the reason being counted in stats.
+    """
+    stats["airspaces"] += 1
+    if not cells:
+        return None
+    cell_text = cells[0]
+    icao_class, upperAltitude, lowerAltitude, radio, schedule, restrictions, remarks = get_row_fields(container_index, cells)
 
-                if len(coords) == 0:
-                    empty_airspaces += 1
-                    continue
+    try:
+        coords = row_coords(cells)
+    except Exception as e:
+        print(f"Error parsing coordinates: {e}")
+        print(f"Cell text: {cell_text}")
+        return None
 
-                # Check if the current name exists in parks data
-                if parks_data and current_name in parks_data:
-                    # print(f"[INFO] Found {current_name} in parks data, using coordinates from there")
-                    polygon_points = parks_data[current_name]["coordinates"]
-                    if len(polygon_points):
-                        current_name = "PARC/RESERVE " + current_name
-                        feature = create_geojson_feature(current_name, polygon_points, icao_class, upperAltitude, lowerAltitude, radio, schedule, restrictions, remarks)
-                        features.append(feature)
-                        continue
-                    else:
-                        missing_parks += 1
-                
-                polygon_points, had_missing = process_coordinates(current_name, coords, border_files)
-                if had_missing:
-                    # print(f"[DEBUG] had_missing: {current_name}")
-                    incomplete_airspaces += 1
-                    continue
-                if not had_missing and len(polygon_points) < 4:
-                    if len(polygon_points) == 0:
-                        empty_coords += 1
-                        print(f"[WARN] Empty coords: {current_name} - {polygon_points}")
-                    elif len(polygon_points) == 1:
-                        points += 1
-                        print(f"[WARN] Point: {current_name} - {polygon_points}")
-                    elif len(polygon_points) == 2:
-                        segments += 1
-                        print(f"[WARN] Segment: {current_name} - {polygon_points}")
-                    elif len(polygon_points) == 3:
-                        segments += 1  # triangle case, but not valid as linear ring
-                        print(f"[WARNING] Triangle (invalid linear ring): {current_name} - {polygon_points}")
-                    skipped_airspaces += 1
-                    continue
+    if len(coords) == 0:
+        stats["empty_airspaces"] += 1
+        return None
 
-                # Create the GeoJSON feature using the new function
-                if not valid_ring(polygon_points):
-                    not_valid_rings += 1
-                    continue
-                feature = create_geojson_feature(current_name, polygon_points, icao_class, upperAltitude, lowerAltitude, radio, schedule, restrictions, remarks)
-                # if any(token and "frontière" in token.lower() for token in coords if isinstance(token, str)):
-                features.append(feature)
-
-
-    print(f"[INFO] {airspaces} airspaces encountered")
-    print(f"[INFO] Exported {len(features)} features")
-    total_missing =  incomplete_airspaces + skipped_airspaces
-    print(f"[INFO] Skipped airspaces (no valid polygon): {skipped_airspaces} of which {empty_coords} empty coords, {points} points, {segments} segments")
-    print(f"[INFO] Empty airspaces: {empty_airspaces}")
-    print(f"[INFO] Not valid rings: {not_valid_rings}")
-    print(f"[INFO] Missing parks: {missing_parks}")
-    print(f"[INFO] Airspaces with incomplete processing and not exported: {incomplete_airspaces}")
-    print(f"[WARNING] Total missing airspaces: {total_missing} ({airspaces - len(features)} expected)")
-
-    # Insert new code to process zsm.geojson before creating the FeatureCollection
-    zsm = 0
+    # Check if the current name exists in parks data
+    if parks_data and current_name in parks_data:
+        # print(f"[INFO] Found {current_name} in parks data, using coordinates from there")
+        polygon_points = parks_data[current_name]["coordinates"]
+        if len(polygon_points):
+            current_name = "PARC/RESERVE " + current_name
+            return create_geojson_feature(current_name, polygon_points, icao_class, upperAltitude, lowerAltitude, radio, schedule, restrictions, remarks)
+        else:
+            stats["missing_parks"] += 1
+
+    polygon_points, had_missing = process_coordinates(current_name, coords, border_files, parks_data)
+    if had_missing:
+        # print(f"[DEBUG] had_missing: {current_name}")
+        stats["incomplete_airspaces"] += 1
+        return None
+    if not had_missing and len(polygon_points) < 4:
+        if len(polygon_points) == 0:
+            stats["empty_coords"] += 1
+            print(f"[WARN] Empty coords: {current_name} - {polygon_points}")
+        elif len(polygon_points) == 1:
+            stats["points"] += 1
+            print(f"[WARN] Point: {current_name} - {polygon_points}")
+        elif len(polygon_points) == 2:
+            stats["segments"] += 1
+            print(f"[WARN] Segment: {current_name} - {polygon_points}")
+        elif len(polygon_points) == 3:
+            stats["segments"] += 1  # triangle case, but not valid as linear ring
+            print(f"[WARNING] Triangle (invalid linear ring): {current_name} - {polygon_points}")
+        stats["skipped_airspaces"] += 1
+        return None
+
+    # Create the GeoJSON feature using the new function
+    if not valid_ring(polygon_points):
+        stats["not_valid_rings"] += 1
+        return None
+    return create_geojson_feature(current_name, polygon_points, icao_class, upperAltitude, lowerAltitude, radio, schedule, restrictions, remarks)
+
+
+def print_stats(stats, exported):
+    print(f"[INFO] {stats['airspaces']} airspaces encountered")
+    print(f"[INFO] Exported {exported} features")
+    total_missing = stats["incomplete_airspaces"] + stats["skipped_airspaces"]
+    print(f"[INFO] Skipped airspaces (no valid polygon): {stats['skipped_airspaces']} of which {stats['empty_coords']} empty coords, {stats['points']} points, {stats['segments']} segments")
+    print(f"[INFO] Empty airspaces: {stats['empty_airspaces']}")
+    print(f"[INFO] Not valid rings: {stats['not_valid_rings']}")
+    print(f"[INFO] Missing parks: {stats['missing_parks']}")
+    print(f"[INFO] Airspaces with incomplete processing and not exported: {stats['incomplete_airspaces']}")
+    print(f"[WARNING] Total missing airspaces: {total_missing} ({stats['airspaces'] - exported} expected)")
+
+
+def zsm_features(zsm_file='zsm.geojson'):
+    """Yield the ZSM features of zsm.geojson with the properties of the eAIP features."""
     try:
-        with open('zsm.geojson', 'r', encoding='utf-8') as zsm_file:
-            zsm_data = json.load(zsm_file)
+        with open(zsm_file, 'r', encoding='utf-8') as f:
+            zsm_data = json.load(f)
         for feature in zsm_data.get('features', []):
             props = feature.get('properties', {})
             # Convert _max to int, default to 0 if conversion fails
@@ -912,15 +745,48 @@ def main(input_file, geojson_file, border_files, parks_file):
             new_props["icaoClass"] = "Other"
             new_props["upperAltitude"] = upper_alt
             new_props["lowerAltitude"] = "0ft GND"
-            new_feature = {
+            yield {
                 "type": "Feature",
                 "geometry": feature.get("geometry"),
                 "properties": new_props
             }
-            features.append(new_feature)
-            zsm += 1
     except Exception as e:
-        print(f"[ERROR] Failed to process zsm.geojson: {e}")
+        print(f"[ERROR] Failed to process {zsm_file}: {e}")
+
+
+def main(input_file, geojson_file, border_files, parks_file):
+    # Parse the cleaned HTML file
+    with open(input_file, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f, 'html.parser')
+
+    # Load the parks data from JSON file
+    parks_data = read_parks_json(parks_file)
+
+    features = []
+    stats = new_stats()
+
+    # For every table container, process rows in document order to associate parsed rows with the previous parsed name row
+    for container_index, container in enumerate(soup.select('.table-container')):
+        current_name = None
+        for tr in container.find_all('tr'):
+            classes = tr.get('class', [])
+            if 'parsed-name' in classes:
+                td = tr.find('td')
+                if td:
+                    current_name = td.get_text(strip=True)
+            elif 'parsed-row' in classes:
+                cells = [td.get_text(strip=True) for td in tr.find_all('td')]
+                feature = make_airspace_feature(current_name, container_index, cells, parks_data, border_files, stats)
+                if feature:
+                    features.append(feature)
+
+    print_stats(stats, len(features))
+
+    # Add the ZSM features of zsm.geojson before creating the FeatureCollection
+    zsm = 0
+    for feature in zsm_features():
+        features.append(feature)
+        zsm += 1
 
     print(f"[INFO] ZSM airspaces: {zsm}")
 
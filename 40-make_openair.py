@@ -1,17 +1,16 @@
 import json
-import re
 from bs4 import BeautifulSoup
 import math
-# from preprocess_border_file import read_border_geojson
 
 # ===============================
 # Regex Patterns
 # ===============================
 
-REGEX_ARC = r'arc\s+(anti-horaire|horaire)\s+de\s+([\d.]+)\s*(NM|m|km)\s+de\s+rayon\s+centré\s+sur\s+(\d{6}[NS])(?:\s*@\s*(\d{7}[EW]))?'
-REGEX_CIRCLE = r'cercle\s+de\s+([\d.]+)\s*(NM|m|km)\s+de\s+rayon\s+centré\s+sur\s+(\d{6}[NS])(?:\s*@\s*(\d{7}[EW]))?'
-REGEX_COORD_PAIR = r'\d{6}[NSEW]\s*@\s*\d{7}[NSEW]'
-REGEX_COORD_SINGLE = r'\d{6,7}[NSEW]'
+from patterns import (ARC_PATTERN, CIRCLE_PATTERN, COORD_PAIR_PATTERN, CASED_COORD_PAIR_PATTERN, COORD_SINGLE_PATTERN,
+                      FLIGHT_LEVEL_PATTERN, FLIGHT_LEVEL_VALUE_PATTERN, ALTITUDE_REFERENCES, VALUE_UNIT_PATTERN,
+                      DIGIT_PATTERN, token_keywords)
+from borders import load_border, ring_border, border_path, load_parks
+from table_specs import row_fields, row_coords
 
 
 # ===============================
@@ -74,43 +73,13 @@ def format_dms(value, is_latitude):
         # For longitude, degrees should be 3 digits
         hem = 'E' if value >= 0 else 'W'
         return f"{deg:03d}{minutes:02d}{seconds:02d}{hem}"
-# New function to parse textual arc descriptions and return polygon coordinates
-def read_border_geojson(border_file):
-    try:
-        with open(border_file, 'r', encoding='utf-8') as bf:
-            france_geo = json.load(bf)
-            if 'features' in france_geo and len(france_geo['features']) > 0:
-                feature = france_geo['features'][0]
-                geom = feature.get('geometry', {})
-                geo_type = geom.get('type', '').lower()
-                if geo_type == 'polygon':
-                    border_coords = geom.get('coordinates', [])
-                    if border_coords and isinstance(border_coords, list):
-                        border_coords = border_coords[0]
-                    else:
-                        border_coords = []
-                elif geo_type == 'linestring':
-                    border_coords = geom.get('coordinates', [])
-                else:
-                    border_coords = []
-            else:
-                border_coords = []
-            # print(f"[INFO] Loaded border from '{border_file}' with {len(border_coords)} coordinates.")
-            return border_coords
-    except Exception as e:
-        print(f"[ERROR] Error reading {border_file}: {e}")
-        return []
 def read_parks_json(parks_file):
-    try:
-        with open(parks_file, 'r', encoding='utf-8') as pf:
-            return json.load(pf)
-    except Exception as e:
-        print(f"[ERROR] Error reading park file {parks_file}: {e}")
-    return None
+    """Return the parks of parks_file, read once per process, None if it cannot be read."""
+    return load_parks(parks_file)
 
 def parse_circle_text(text):
     """Parse circle description and return structured data for OpenAir output"""
-    m = re.search(REGEX_CIRCLE, text, re.IGNORECASE)
+    m = CIRCLE_PATTERN.search(text)
     if not m:
         print(f"No match found for circle description: {text}")
         return None
@@ -154,7 +123,7 @@ def process_arc_token(token, prev_token, next_token, name):
     """Process arc token and return structured data for OpenAir output"""
     lower_token = token.lower()
     if "arc horaire" in lower_token or "arc anti-horaire" in lower_token:
-        m = re.search(REGEX_ARC, token, re.IGNORECASE)
+        m = ARC_PATTERN.search(token)
         if not m:
             print(f"[ERROR] No match found for arc description: {token}")
             return (None, False)
@@ -178,8 +147,8 @@ def process_arc_token(token, prev_token, next_token, name):
             return (None, False)
             
         # Get start and end points from prev and next tokens
-        m_prev = re.search(REGEX_COORD_PAIR, prev_token, re.IGNORECASE)
-        m_next = re.search(REGEX_COORD_PAIR, next_token, re.IGNORECASE)
+        m_prev = COORD_PAIR_PATTERN.search(prev_token)
+        m_next = COORD_PAIR_PATTERN.search(next_token)
         # print(f"[DEBUG] Neighbour prev_token: '{prev_token}' -> m_prev: {m_prev.group(0) if m_prev else None}")
         # print(f"[DEBUG] Neighbour next_token: '{next_token}' -> m_next: {m_next.group(0) if m_next else None}")
         if m_prev and m_next:
@@ -198,7 +167,7 @@ def process_arc_token(token, prev_token, next_token, name):
     return (None, False)
 
 def get_coordinates(token):
-    return re.findall(REGEX_COORD_PAIR, token, re.IGNORECASE)
+    return COORD_PAIR_PATTERN.findall(token)
 
 def get_lonLat  (token):
     pairs = get_coordinates(token)
@@ -209,9 +178,9 @@ def get_lonLat  (token):
                 print(f"Invalid coordinate pair format in pair: {pair}")
                 continue
             lat_str, lon_str = parts[0], parts[1]
-            if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-                m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-                m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+            if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+                m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+                m_lon = COORD_SINGLE_PATTERN.search(lon_str)
                 if m_lat and m_lon:
                     lat_str = m_lat.group(0)
                     lon_str = m_lon.group(0)
@@ -228,9 +197,9 @@ def get_lonLat  (token):
                 print(f"Invalid coordinate pair format: {token}")
             return []
         lat_str, lon_str = parts[0], parts[1]
-        if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-            m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-            m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+        if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+            m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+            m_lon = COORD_SINGLE_PATTERN.search(lon_str)
             if m_lat and m_lon:
                 lat_str = m_lat.group(0)
                 lon_str = m_lon.group(0)
@@ -242,7 +211,7 @@ def get_lonLat  (token):
         return [[lon, lat]]
 
 def substract_lonLat(text):
-    m = re.compile(REGEX_COORD_PAIR).search(text)
+    m = CASED_COORD_PAIR_PATTERN.search(text)
     if m:
         extracted = m.group(0)
         remaining_text = text.replace(extracted, '').strip()
@@ -251,8 +220,8 @@ def substract_lonLat(text):
         return None,text
 
 def substract_alllonLat(text):
-    matches = re.findall(REGEX_COORD_PAIR, text, re.IGNORECASE)
-    remaining_text = re.sub(REGEX_COORD_PAIR, '', text, flags=re.IGNORECASE).strip()
+    matches = COORD_PAIR_PATTERN.findall(text)
+    remaining_text = COORD_PAIR_PATTERN.sub('', text).strip()
     return matches, remaining_text
        
 def is_pure_lonLat(token):
@@ -270,9 +239,9 @@ def split_twin_tokens(token):
                 print(f"Invalid coordinate pair format in pair: {pair}")
                 continue
             lat_str, lon_str = parts[0], parts[1]
-            if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-                m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-                m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+            if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+                m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+                m_lon = COORD_SINGLE_PATTERN.search(lon_str)
                 if m_lat and m_lon:
                     lat_str = m_lat.group(0)
                     lon_str = m_lon.group(0)
@@ -290,9 +259,9 @@ def split_twin_tokens(token):
                 print(f"Invalid coordinate pair format: {token}")
             return []
         lat_str, lon_str = parts[0], parts[1]
-        if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-            m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-            m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+        if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+            m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+            m_lon = COORD_SINGLE_PATTERN.search(lon_str)
             if m_lat and m_lon:
                 lat_str = m_lat.group(0)
                 lon_str = m_lon.group(0)
@@ -314,72 +283,32 @@ def make_triplet(token,prev_token,next_token):
 
 def get_shortest_path_for_triplet(triplet, border_file):
     """For a given triplet with 'prev_token' and 'next_token' in 'lat@lon' format,
-    find the closest points in border_coords and return the shortest path between them
+    find the closest points of the border and return the shortest path between them
     as a list of coordinate pairs [lon, lat].
-    border_coords is a list of [lon, lat] pairs.
+    The border is read once per process, see load_border, and the walk made once per process, see border_path.
     """
-    try:
-        border_coords = read_border_geojson(border_file)
-    except Exception as e:
-        print(f"[ERROR] Failed to read border file: {e}")
-        return [], False
+    border = load_border(border_file)
     # Convert triplet beginning and end to [lon, lat] using convert_coord
     try:
         b_lat_str, b_lon_str = triplet["prev_token"].split('@')
         b_lat = convert_coord(b_lat_str)
         b_lon = convert_coord(b_lon_str)
-        triplet_begin = (b_lon, b_lat)  # border_coords order
+        triplet_begin = (b_lon, b_lat)  # border order
     except Exception as e:
         return [], False
     try:
         e_lat_str, e_lon_str = triplet["next_token"].split('@')
         e_lat = convert_coord(e_lat_str)
         e_lon = convert_coord(e_lon_str)
-        triplet_end = (e_lon, e_lat)  # border_coords order
+        triplet_end = (e_lon, e_lat)  # border order
     except Exception as e:
         return [], False
-    
-    def find_closest_index(pt, coords):
-        best_idx = None
-        best_dist = None
-        for idx, coord in enumerate(coords):
-            dist = (pt[0] - coord[0])**2 + (pt[1] - coord[1])**2
-            if best_dist is None or dist < best_dist:
-                best_dist = dist
-                best_idx = idx
-        return best_idx
-    
-    i_begin = find_closest_index(triplet_begin, border_coords)
-    i_end = find_closest_index(triplet_end, border_coords)
-    if i_begin is None or i_end is None:
+
+    chosen_path = border_path(border_file, border, triplet_begin, triplet_end)
+    if chosen_path is None:
         print(f"[DEBUG] No closest index found for triplet {triplet['token']}")
         return [], False
-    
-    # print(triplet["prev_token"],triplet["next_token"])
-    # print(border_coords[i_begin],border_coords[i_end])
-    # print(i_begin,i_end)
-    
-    def circular_path(i, j, coords):
-        if i <= j:
-            return coords[i:j+1]
-        else:
-            return coords[i:] + coords[:j+1]
-    
-    path1 = circular_path(i_begin, i_end, border_coords)
-    path2 = circular_path(i_end, i_begin, border_coords)[::-1]  # reverse to go from begin to end
-    
-    def path_length(path):
-        total = 0.0
-        for k in range(len(path) - 1):
-            dx = path[k+1][0] - path[k][0]
-            dy = path[k+1][1] - path[k][1]
-            total += (dx*dx + dy*dy)**0.5
-        return total
-    
-    length1 = path_length(path1)
-    length2 = path_length(path2)
-    chosen_path = path1 if length1 <= length2 else path2
-    
+
     if len(chosen_path) == 0:
         return [], False
     return chosen_path, True
@@ -434,7 +363,7 @@ def process_france_token(token,prev_token,next_token,border_files):
     return [], False
 
 def get_first_latLon(token):
-    match_list = re.findall(REGEX_COORD_PAIR, token, re.IGNORECASE)
+    match_list = COORD_PAIR_PATTERN.findall(token)
     if match_list:
         return match_list[0]
     else:
@@ -478,44 +407,31 @@ def valid_ring(ring):
             return False
     return True
 
-def process_parc_ecrins_token(token, prev_token, next_token):
+def process_parc_ecrins_token(token, prev_token, next_token, parks_data=None):
     """
     Expects token to be a string representing the key in parks.json,
     along with its previous and next tokens (in 'lat@lon' format).
+    parks_data is the content of the parks file, parks.json (read once per process) if not given.
     Returns the shortest path between the points on the park border (from parks.json) and a success flag.
     """
     # Build a triplet from the provided tokens
     triplet = make_triplet(token, prev_token, next_token)
 
-    import json
-    try:
-        with open('parks.json', 'r', encoding='utf-8') as pf:
-            parks = json.load(pf)
-    except Exception as e:
-        print(f"[ERROR] Failed to read parks.json: {e}")
+    if parks_data is None:
+        parks_data = load_parks()
+    if parks_data is None:
         return [], False
 
     key = "420 . PARC NATIONAL DES ECRINS"
-    if key not in parks:
+    if key not in parks_data:
         print(f"[WARN] Park key '{key}' not found in parks.json")
         return [], False
 
-    border_coords = parks[key].get('coordinates', [])
+    border_coords = parks_data[key].get('coordinates', [])
     if not border_coords:
         print(f"[WARN] No coordinates found for park key: {key}")
         return [], False
 
-    # Helper function to find the closest index in border_coords for a given point
-    def find_closest_index(pt, coords):
-        best_idx = None
-        best_dist = None
-        for idx, coord in enumerate(coords):
-            dist = (pt[0] - coord[0])**2 + (pt[1] - coord[1])**2
-            if best_dist is None or dist < best_dist:
-                best_dist = dist
-                best_idx = idx
-        return best_idx
-
     # Convert previous token to coordinate (expecting format 'lat@lon')
     try:
         b_lat_str, b_lon_str = triplet["prev_token"].split('@')
@@ -536,32 +452,11 @@ def process_parc_ecrins_token(token, prev_token, next_token):
         print(f"[ERROR] Failed to parse next token: {e}")
         return [], False
 
-    i_begin = find_closest_index(triplet_begin, border_coords)
-    i_end = find_closest_index(triplet_end, border_coords)
-    if i_begin is None or i_end is None:
+    border = ring_border(('parks.json', key), border_coords)
+    chosen_path = border_path(('parks.json', key), border, triplet_begin, triplet_end)
+    if chosen_path is None:
         print(f"[DEBUG] No closest index found for triplet {triplet}")
         return [], False
-
-    def circular_path(i, j, coords):
-        if i <= j:
-            return coords[i:j+1]
-        else:
-            return coords[i:] + coords[:j+1]
-
-    path1 = circular_path(i_begin, i_end, border_coords)
-    path2 = circular_path(i_end, i_begin, border_coords)[::-1]  
-
-    def path_length(path):
-        total = 0.0
-        for k in range(len(path) - 1):
-            dx = path[k+1][0] - path[k][0]
-            dy = path[k+1][1] - path[k][1]
-            total += (dx*dx + dy*dy)**0.5
-        return total
-
-    length1 = path_length(path1)
-    length2 = path_length(path2)
-    chosen_path = path1 if length1 <= length2 else path2
     if len(chosen_path) == 0:
         return [], False
     return chosen_path, True
@@ -577,9 +472,9 @@ def process_polygon_token(token):
                 print(f"Invalid coordinate pair format in pair: {pair}")
                 continue
             lat_str, lon_str = parts[0], parts[1]
-            if not (re.fullmatch(REGEX_COORD_SINGLE, lat_str) and re.fullmatch(REGEX_COORD_SINGLE, lon_str)):
-                m_lat = re.search(REGEX_COORD_SINGLE, lat_str)
-                m_lon = re.search(REGEX_COORD_SINGLE, lon_str)
+            if not (COORD_SINGLE_PATTERN.fullmatch(lat_str) and COORD_SINGLE_PATTERN.fullmatch(lon_str)):
+                m_lat = COORD_SINGLE_PATTERN.search(lat_str)
+                m_lon = COORD_SINGLE_PATTERN.search(lon_str)
                 if m_lat and m_lon:
                     lat_str = m_lat.group(0)
                     lon_str = m_lon.group(0)
@@ -596,7 +491,7 @@ def process_polygon_token(token):
     
     return (None, False)
 
-def process_coordinates(name, all_coords, border_files):
+def process_coordinates(name, all_coords, border_files, parks_data=None):
     """
     Process raw coordinate tokens into OpenAir format commands.
     Returns (commands_list, had_missing) where commands_list is a list of OpenAir commands
@@ -616,7 +511,7 @@ def process_coordinates(name, all_coords, border_files):
         else:
             # Clean the coordinate first
             all_coords[0] = get_first_latLon(all_coords[0])
-            match_list = re.findall(REGEX_COORD_PAIR, all_coords[0], re.IGNORECASE)
+            match_list = COORD_PAIR_PATTERN.findall(all_coords[0])
             if len(match_list) == 1:
                 center = match_list[0]
                 if any(x in name.lower() for x in [" para "]):
@@ -650,8 +545,9 @@ def process_coordinates(name, all_coords, border_files):
         next_index = i + 1 if i != total - 1 else 0
         prev_token = all_coords[prev_index]
         next_token = all_coords[next_index]
+        keywords = token_keywords(token)
 
-        if "arc horaire" in token.lower() or "arc anti-horaire" in token.lower():
+        if "arc horaire" in keywords or "arc anti-horaire" in keywords:
             geometry, complete = process_arc_token(token, prev_token, next_token, name)
             if complete:
                 # Write arc commands - note the reordered commands
@@ -663,7 +559,7 @@ def process_coordinates(name, all_coords, border_files):
                 had_missing = True
                 print(f"[WARN] Unprocessed arc: {name} - {token}")
 
-        elif "cercle de" in token.lower() and "centré sur" in token.lower():
+        elif "cercle de" in keywords and "centré sur" in keywords:
             geometry, complete = process_circle_token(token)
             if complete:
                 # Write circle commands
@@ -673,36 +569,28 @@ def process_coordinates(name, all_coords, border_files):
                 had_missing = True
                 print(f"[WARN] Unprocessed circle: {name} - {token}")
 
-        elif ("frontière" in token.lower() or 
-              "la côte atlantique française" in token.lower() or 
-              "côte corse" in token.lower() or
-              "limite des eaux territoriales atlantique françaises" in token.lower() or
-              "côte méditérrannéenne" in token.lower()):
+        elif ("frontière" in keywords or
+              "la côte atlantique française" in keywords or
+              "côte corse" in keywords or
+              "limite des eaux territoriales atlantique françaises" in keywords or
+              "côte méditérrannéenne" in keywords):
             points, complete = process_france_token(token, prev_token, next_token, border_files)
             if complete:
                 # Convert border points to DP commands
-                for point in points:
-                    lat = format_dms(point[1], True)
-                    lon = format_dms(point[0], False)
-                    coord_str = f"{lat}@{lon}"
-                    token_commands.append(f"DP {formatDMS(coord_str)}")
+                token_commands.extend(border_commands(points))
             else:
                 had_missing = True
                 print(f"[WARN] Unprocessed border: {name} - {token}")
 
-        elif "axe" in token.lower():
+        elif "axe" in keywords:
             print(f"[DEBUG] Unsupported token type: {token} : {name}")
             had_missing = True
 
-        elif "parc national des écrins" in token.lower():
-            points, complete = process_parc_ecrins_token(token, prev_token, next_token)
+        elif "parc national des écrins" in keywords:
+            points, complete = process_parc_ecrins_token(token, prev_token, next_token, parks_data)
             if complete:
                 # Convert park points to DP commands
-                for point in points:
-                    lat = format_dms(point[1], True)
-                    lon = format_dms(point[0], False)
-                    coord_str = f"{lat}@{lon}"
-                    token_commands.append(f"DP {formatDMS(coord_str)}")
+                token_commands.extend(border_commands(points))
             else:
                 had_missing = True
                 print(f"[WARN] Unprocessed park: {name} - {token}")
@@ -724,6 +612,23 @@ def process_coordinates(name, all_coords, border_files):
 
     return (commands, had_missing)
 
+def dp_command(point):
+    """Return the DP command of a [lon, lat] point."""
+    lat = format_dms(point[1], True)
+    lon = format_dms(point[0], False)
+    coord_str = f"{lat}@{lon}"
+    return f"DP {formatDMS(coord_str)}"
+
+
+def border_commands(points):
+    """Return the DP commands of the points of a border or park walk. The commands of a walk are formatted once per
+    process and shared by the airspaces following the same stretch of border, see borders.border_path."""
+    segment = getattr(points, "segment", None)
+    if segment is None:
+        return [dp_command(point) for point in points]
+    return segment.format(dp_command)
+
+
 def formatDMS(coord_str):
     """Convert a lat@lon string to OpenAir DMS format.
     Input format: "DDMMSS[NS]@DDDMMSS[EW]"
@@ -757,8 +662,8 @@ def parse_altitude(alt_str):
     formatted = alt_str.upper()
     
     # Handle FL cases first
-    if re.search(r'\b[Ff][Ll]\s*\d', formatted):
-        m = re.search(r'\b[Ff][Ll]\s*(\d+)\b', formatted)
+    if FLIGHT_LEVEL_PATTERN.search(formatted):
+        m = FLIGHT_LEVEL_VALUE_PATTERN.search(formatted)
         if m:
             return f"FL{m.group(1)}"  # Direct return for FL cases
         else:
@@ -766,10 +671,8 @@ def parse_altitude(alt_str):
             return None
 
     # Standard replacements
-    formatted = re.sub(r"\bSFC\b", "GND", formatted)
-    formatted = re.sub(r"\bASFC\b", "AGL", formatted)
-    formatted = re.sub(r"\bAMSL\b", "MSL", formatted)
-    formatted = re.sub(r"\bUNL\b", "UNL", formatted)
+    for pattern, reference in ALTITUDE_REFERENCES:
+        formatted = pattern.sub(reference, formatted)
 
     # Rest of the processing for non-FL altitudes...
 
@@ -788,8 +691,8 @@ def parse_altitude(alt_str):
 
     # Take only first altitude if multiple exist (first value-unit-ref triplet)
     if len(tokens) >= 2:
-        m = re.match(r"^(\d+)([a-zA-Z]+)$", tokens[0])
-        if m and not re.search(r"\d", tokens[1]):
+        m = VALUE_UNIT_PATTERN.match(tokens[0])
+        if m and not DIGIT_PATTERN.search(tokens[1]):
             value = m.group(1)
             unit = m.group(2).lower()
             ref = tokens[1].upper()
@@ -934,6 +837,138 @@ def format_airspace_name(name):
     # Join with spaces and remove any double spaces
     return ' '.join(result).strip()
 
+def new_stats():
+    """Counters of the airspaces read, written and skipped, reported at the end of main."""
+    return {
+        "airspaces": 0,
+        "processed": 0,
+        "empty_airspaces": 0,
+        "incomplete_airspaces": 0,
+        "skipped_airspaces": 0
+    }
+
+
+def get_row_limits(container_index, cells):
+    """Return (icao_class, upper_alt, lower_alt, frequency) from the cell texts of a parsed row,
+    according to the spec of its table."""
+    fields = row_fields(container_index, cells)
+    return fields["icao_class"], fields["upper"], fields["lower"], fields["radio"]
+
+
+def make_openair_airspace(current_name, container_index, cells, parks_data, border_files, stats):
+    """Build the OpenAir airspace of one parsed row from its cell texts.
+    Returns (name, icao_class, commands, upper_alt, lower_alt, frequency), the arguments of write_openair_feature,
+    or None when the row is skipped, the reason being counted in stats.
+    """
+    stats["airspaces"] += 1
+    if not cells:
+        print(f"[SKIP] No table cells found for airspace {current_name}")
+        return None
+
+    # Extract cell data based on container index
+    cell_text = cells[0]
+    icao_class, upper_alt, lower_alt, frequency = get_row_limits(container_index, cells)
+
+    # Print warning if altitude limits are missing
+    if not upper_alt or not lower_alt:
+        print(f"[WARN] Missing altitude limits for {current_name} (container {container_index})")
+        if not upper_alt:
+            print(f"       Upper limit missing")
+        if not lower_alt:
+            print(f"       Lower limit missing")
+
+    try:
+        # Points given by stage 2, or parsed from the cell text
+        coords = row_coords(cells)
+    except Exception as e:
+        print(f"[SKIP-PARSE] Error parsing coordinates for {current_name}: {e}")
+        print(f"[SKIP-PARSE] Cell text: {cell_text}")
+        stats["skipped_airspaces"] += 1
+        return None
+
+    if len(coords) == 0:
+        print(f"[SKIP-EMPTY] Empty coordinates for {current_name}")
+        stats["empty_airspaces"] += 1
+        return None
+
+    # Handle parks data
+    if parks_data and current_name in parks_data:
+        park_coords = parks_data[current_name]["coordinates"]
+        if park_coords:
+            current_name = "PARC/RESERVE " + current_name
+            # Convert park coordinates to OpenAir commands
+            commands = [dp_command(point) for point in park_coords]
+            return current_name, icao_class, commands, upper_alt, lower_alt, frequency
+
+    # Process coordinates into OpenAir commands
+    commands, had_missing = process_coordinates(current_name, coords, border_files, parks_data)
+    if had_missing:
+        print(f"[SKIP-INCOMPLETE] Incomplete processing for {current_name}")
+        print(f"[SKIP-INCOMPLETE] Coordinates: {coords}")
+        stats["incomplete_airspaces"] += 1
+        return None
+
+    # Validate commands based on type
+    is_valid = False
+    if any(cmd.startswith('DC ') for cmd in commands):
+        # Circle definitions need V X= and DC commands (2 commands)
+        is_valid = len(commands) >= 2
+    elif len(commands) == 1 and commands[0].startswith('DP '):
+        # Single point definitions are valid
+        is_valid = False
+    else:
+        # Other geometries (polygons, arcs) need at least 3 commands
+        is_valid = len(commands) >= 3
+
+    if not is_valid:
+        print(f"[SKIP-INVALID] Invalid command count for {current_name}")
+        print(f"[SKIP-INVALID] Commands generated: {commands}")
+        print(f"[SKIP-INVALID] From coordinates: {coords}")
+        stats["skipped_airspaces"] += 1
+        return None
+
+    return current_name, icao_class, commands, upper_alt, lower_alt, frequency
+
+
+def zsm_airspaces(stats, zsm_file='zsm.geojson'):
+    """Yield the write_openair_feature arguments of the ZSM polygons of zsm.geojson."""
+    try:
+        with open(zsm_file, 'r', encoding='utf-8') as f:
+            zsm_data = json.load(f)
+        for feature in zsm_data.get('features', []):
+            props = feature.get('properties', {})
+            name = props.get("code_zsm", "")
+            stats["airspaces"] += 1
+
+            # Convert altitude
+            try:
+                upper_alt = f"{int(float(props.get('_max', 0)))}ft MSL"
+            except:
+                upper_alt = "0ft MSL"
+
+            # Convert geometry to OpenAir commands
+            geom = feature.get('geometry', {})
+            if geom.get('type') == 'Polygon':
+                commands = [dp_command(coord) for coord in geom.get('coordinates', [[]])[0]]
+                yield name, "UNCLASSIFIED", commands, upper_alt, "GND", None
+
+    except Exception as e:
+        print(f"[ERROR] Failed to process {zsm_file}: {e}")
+
+
+def write_openair_file_header(outfile):
+    outfile.write("* Generated by airspace converter\n")
+    outfile.write("* Source: eAIP France\n\n")
+
+
+def print_stats(stats):
+    print(f"[INFO] {stats['airspaces']} airspaces encountered")
+    print(f"[INFO] {stats['processed']} airspaces written")
+    print(f"[INFO] {stats['empty_airspaces']} empty airspaces skipped")
+    print(f"[INFO] {stats['incomplete_airspaces']} incomplete airspaces")
+    print(f"[INFO] {stats['skipped_airspaces']} invalid airspaces skipped")
+
+
 def main(input_file, output_file, border_files, parks_file):
     # Parse the cleaned HTML file
     with open(input_file, 'r', encoding='utf-8') as f:
@@ -944,15 +979,8 @@ def main(input_file, output_file, border_files, parks_file):
 
     # Open output file in UTF-8 encoding
     with open(output_file, 'w', encoding='utf-8') as outfile:
-        # Write file header
-        outfile.write("* Generated by airspace converter\n")
-        outfile.write("* Source: eAIP France\n\n")
-
-        airspaces = 0
-        processed = 0
-        empty_airspaces = 0
-        incomplete_airspaces = 0
-        skipped_airspaces = 0
+        write_openair_file_header(outfile)
+        stats = new_stats()
 
         # Process each table container
         for container_index, container in enumerate(soup.select('.table-container')):
@@ -964,171 +992,22 @@ def main(input_file, output_file, border_files, parks_file):
                     if td:
                         current_name = td.get_text(strip=True)
                 elif 'parsed-row' in classes:
-                    airspaces += 1
-                    tds = tr.find_all('td')
-                    if not tds:
-                        print(f"[SKIP] No table cells found for airspace {current_name}")
-                        continue
-
-                    # Extract cell data based on container index
-                    cell_text = tds[0].get_text(strip=True)
-                    icao_class = ""
-                    upper_alt = ""
-                    lower_alt = ""
-                    frequency = ""
-
-                    # Different container types have different cell structures
-                    if container_index in [0, 1, 2, 3, 12]:  # Class A-E airspaces
-                        icao_class = tds[1].get_text(strip=True)
-                        altitude_text = tds[2].get_text(strip=True)
-                        alt_parts = altitude_text.split("------------")
-                        upper_alt = alt_parts[0].strip()
-                        lower_alt = alt_parts[1].strip()
-                        frequency = tds[3].get_text(strip=True)
-                    elif container_index == 4:  # Class G airspaces
-                        altitude_text = tds[1].get_text(strip=True)
-                        alt_parts = altitude_text.split("------------")
-                        upper_alt = alt_parts[0].strip()
-                        lower_alt = alt_parts[1].strip()
-                        frequency = tds[2].get_text(strip=True)
-                    elif container_index in [5, 6]:  # Restricted areas
-                        altitude_text = tds[1].get_text(strip=True)
-                        alt_parts = altitude_text.split("------------")
-                        upper_alt = alt_parts[0].strip()
-                        lower_alt = alt_parts[1].strip()
-                    elif container_index == 7:  # Prohibited areas
-                        altitude_text = tds[1].get_text(strip=True)
-                        alt_parts = altitude_text.split("------------")
-                        upper_alt = alt_parts[0].strip()
-                        lower_alt = alt_parts[1].strip()
-                    elif container_index in [8, 9]:  # Danger areas
-                        altitude_text = tds[1].get_text(strip=True)
-                        alt_parts = altitude_text.split("------------")
-                        upper_alt = alt_parts[0].strip()
-                        lower_alt = alt_parts[1].strip()
-                    elif container_index == 10:  # Training areas
-                        altitude_text = tds[1].get_text(strip=True)
-                        alt_parts = altitude_text.split("------------")
-                        upper_alt = alt_parts[0].strip()
-                        lower_alt = alt_parts[1].strip()
-                    elif container_index == 11:  # Low-level areas
-                        upper_alt = tds[1].get_text(strip=True)
-                        lower_alt = "GND"
-
-                    # Print warning if altitude limits are missing
-                    if not upper_alt or not lower_alt:
-                        print(f"[WARN] Missing altitude limits for {current_name} (container {container_index})")
-                        if not upper_alt:
-                            print(f"       Upper limit missing")
-                        if not lower_alt:
-                            print(f"       Lower limit missing")
-
-                    try:
-                        # Clean and parse coordinates
-                        clean_text = re.sub(r'[\x00-\x1F]+', ' ', cell_text)
-                        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                        coords = json.loads(clean_text)
-                    except Exception as e:
-                        print(f"[SKIP-PARSE] Error parsing coordinates for {current_name}: {e}")
-                        print(f"[SKIP-PARSE] Cell text: {cell_text}")
-                        skipped_airspaces += 1
-                        continue
-
-                    if len(coords) == 0:
-                        print(f"[SKIP-EMPTY] Empty coordinates for {current_name}")
-                        empty_airspaces += 1
-                        continue
-
-                    # Handle parks data
-                    if parks_data and current_name in parks_data:
-                        park_coords = parks_data[current_name]["coordinates"]
-                        if park_coords:
-                            current_name = "PARC/RESERVE " + current_name
-                            # Convert park coordinates to OpenAir commands
-                            commands = []
-                            for point in park_coords:
-                                lat = format_dms(point[1], True)
-                                lon = format_dms(point[0], False)
-                                coord_str = f"{lat}@{lon}"
-                                commands.append(f"DP {formatDMS(coord_str)}")
-                            
-                            # Write the airspace
-                            write_openair_feature(outfile, current_name, icao_class, 
-                                               commands, upper_alt, lower_alt, frequency)
-                            processed += 1
-                            continue
-
-                    # Process coordinates into OpenAir commands
-                    commands, had_missing = process_coordinates(current_name, coords, border_files)
-                    if had_missing:
-                        print(f"[SKIP-INCOMPLETE] Incomplete processing for {current_name}")
-                        print(f"[SKIP-INCOMPLETE] Coordinates: {coords}")
-                        incomplete_airspaces += 1
-                        continue
-
-                    # Validate commands based on type
-                    is_valid = False
-                    if any(cmd.startswith('DC ') for cmd in commands):
-                        # Circle definitions need V X= and DC commands (2 commands)
-                        is_valid = len(commands) >= 2
-                    elif len(commands) == 1 and commands[0].startswith('DP '):
-                        # Single point definitions are valid
-                        is_valid = False
-                    else:
-                        # Other geometries (polygons, arcs) need at least 3 commands
-                        is_valid = len(commands) >= 3
-
-                    if not is_valid:
-                        print(f"[SKIP-INVALID] Invalid command count for {current_name}")
-                        print(f"[SKIP-INVALID] Commands generated: {commands}")
-                        print(f"[SKIP-INVALID] From coordinates: {coords}")
-                        skipped_airspaces += 1
-                        continue
-
-                    # Write the airspace
-                    write_openair_feature(outfile, current_name, icao_class, commands, 
-                                       upper_alt, lower_alt, frequency)
-                    processed += 1
+                    cells = [td.get_text(strip=True) for td in tr.find_all('td')]
+                    airspace = make_openair_airspace(current_name, container_index, cells, parks_data, border_files, stats)
+                    if airspace:
+                        # Write the airspace
+                        write_openair_feature(outfile, *airspace)
+                        stats["processed"] += 1
 
         # Process ZSM data
-        try:
-            with open('zsm.geojson', 'r', encoding='utf-8') as zsm_file:
-                zsm_data = json.load(zsm_file)
-            for feature in zsm_data.get('features', []):
-                props = feature.get('properties', {})
-                name = props.get("code_zsm", "")
-                airspaces += 1
-                
-                # Convert altitude
-                try:
-                    upper_alt = f"{int(float(props.get('_max', 0)))}ft MSL"
-                except:
-                    upper_alt = "0ft MSL"
-                
-                # Convert geometry to OpenAir commands
-                geom = feature.get('geometry', {})
-                if geom.get('type') == 'Polygon':
-                    commands = []
-                    for coord in geom.get('coordinates', [[]])[0]:
-                        lat = format_dms(coord[1], True)
-                        lon = format_dms(coord[0], False)
-                        coord_str = f"{lat}@{lon}"
-                        commands.append(f"DP {formatDMS(coord_str)}")
-                    
-                    # Write the ZSM airspace
-                    write_openair_feature(outfile, name, "UNCLASSIFIED", commands, 
-                                       upper_alt, "GND")
-                    processed += 1
-
-        except Exception as e:
-            print(f"[ERROR] Failed to process zsm.geojson: {e}")
+        for airspace in zsm_airspaces(stats):
+            # Write the ZSM airspace
+            write_openair_feature(outfile, *airspace)
+            stats["processed"] += 1
 
         # Print statistics
-        print(f"[INFO] {airspaces} airspaces encountered")
-        print(f"[INFO] {processed} airspaces written")
-        print(f"[INFO] {empty_airspaces} empty airspaces skipped")
-        print(f"[INFO] {incomplete_airspaces} incomplete airspaces")
-        print(f"[INFO] {skipped_airspaces} invalid airspaces skipped")
+        print_stats(stats)
+
 
 if __name__ == '__main__':
     input_file = 'eaip_selected_tables_stage1_cleaned.html'
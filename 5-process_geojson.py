@@ -4,89 +4,95 @@ import re
 
 def process_geojson(data):
     for feature in data.get('features', []):
-        props = feature.get('properties', {})
-        # Set icaoClass to "Other" if not present or falsy
-        if 'icaoClass' not in props or not props['icaoClass']:
-            props['icaoClass'] = "Other"
-
-        # Determine the 'type' property based on the 'name'
-        name = props.get('name', '')
-        name_upper = name.upper()
-        name_lower = name.lower()
-        new_type = None
-
-        if ' aéromodélisme ' in name:
-            new_type = "aéromodélisme"
-        elif name.startswith("LF R"):
-            new_type = "Restricted"
-        elif name.startswith("TMA "):
-            new_type = "TMA"
-        elif name.startswith("SIV"):
-            new_type = "SIV"
-        elif ' treuillage ' in name:
-            new_type = "treuil"
-        elif (' para ' in name) or (' voltige ' in name):
-            new_type = "Para/voltige"
-        elif "activité particulière" in name:
-            new_type = "activité_particulière"
-        elif "AWY" in name_upper:
-            new_type = "AWY"
-        elif name.startswith("LF D"):
-            new_type = "Dangerous"
-        elif name.startswith("LF P"):
-            new_type = "Prohibited"
-        elif name.startswith("CTR "):
-            new_type = "CTR"
-        elif name.startswith("RMZ"):
-            new_type = "RMZ"
-        elif name.startswith("TMZ"):
-            new_type = "TMZ"
-        elif name.startswith("FIR"):
-            new_type = "FIR"
-        elif name.startswith("CTA"):
-            new_type = "CTA"
-        elif name.startswith("LF TRA "):
-            new_type = "TRA"
-        elif name.startswith("LTA "):
-            new_type = "LTA"
-        elif name.startswith("UIR "):
-            new_type = "UIR"
-        elif name.startswith("UTA "):
-            new_type = "UTA"
-        
-        # Check restrictions field for gliding conditions
-        restrictions = props.get('restrictions', '')
-        restrictions_lower = restrictions.lower()
-        if 'activité vélivole' in restrictions_lower: # or 'activité vélivole régie par protocole' in restrictions_lower:
-            new_type = "gliding"
-        if name.startswith("LTA") and props['icaoClass'] == "E":
-            new_type = "gliding"
-        if 'survol / overflight' in restrictions_lower :
-            new_type = "Park"
-
-        if props.get('code_zsm', ''):
-            new_type = "ZSM"
-
-        
-        props['type'] = new_type if new_type else "Other"
-
-        # Process upperAltitude
-        upper_alt = props.get('upperAltitude', '')
-        if isinstance(upper_alt, str) and upper_alt.strip() != "":
-            parsed_upper = parse_altitude(upper_alt, "upperAltitude", props.get('name', 'Unknown'))
-            if parsed_upper:
-                props["upperUlArray"] = json.dumps(parsed_upper)
-        
-        # Process lowerAltitude
-        lower_alt = props.get('lowerAltitude', '')
-        if isinstance(lower_alt, str) and lower_alt.strip() != "":
-            parsed_lower = parse_altitude(lower_alt, "lowerAltitude", props.get('name', 'Unknown'))
-            if parsed_lower:
-                props["lowerUlArray"] = json.dumps(parsed_lower)
-
+        process_feature(feature)
     return data
 
 
+def process_feature(feature):
+    """Set the icaoClass, type and altitude arrays of one feature, in place."""
+    props = feature.get('properties', {})
+    # Set icaoClass to "Other" if not present or falsy
+    if 'icaoClass' not in props or not props['icaoClass']:
+        props['icaoClass'] = "Other"
+
+    # Determine the 'type' property based on the 'name'
+    name = props.get('name', '')
+    name_upper = name.upper()
+    name_lower = name.lower()
+    new_type = None
+
+    if ' aéromodélisme ' in name:
+        new_type = "aéromodélisme"
+    elif name.startswith("LF R"):
+        new_type = "Restricted"
+    elif name.startswith("TMA "):
+        new_type = "TMA"
+    elif name.startswith("SIV"):
+        new_type = "SIV"
+    elif ' treuillage ' in name:
+        new_type = "treuil"
+    elif (' para ' in name) or (' voltige ' in name):
+        new_type = "Para/voltige"
+    elif "activité particulière" in name:
+        new_type = "activité_particulière"
+    elif "AWY" in name_upper:
+        new_type = "AWY"
+    elif name.startswith("LF D"):
+        new_type = "Dangerous"
+    elif name.startswith("LF P"):
+        new_type = "Prohibited"
+    elif name.startswith("CTR "):
+        new_type = "CTR"
+    elif name.startswith("RMZ"):
+        new_type = "RMZ"
+    elif name.startswith("TMZ"):
+        new_type = "TMZ"
+    elif name.startswith("FIR"):
+        new_type = "FIR"
+    elif name.startswith("CTA"):
+        new_type = "CTA"
+    elif name.startswith("LF TRA "):
+        new_type = "TRA"
+    elif name.startswith("LTA "):
+        new_type = "LTA"
+    elif name.startswith("UIR "):
+        new_type = "UIR"
+    elif name.startswith("UTA "):
+        new_type = "UTA"
+    
+    # Check restrictions field for gliding conditions
+    restrictions = props.get('restrictions', '')
+    restrictions_lower = restrictions.lower()
+    if 'activité vélivole' in restrictions_lower: # or 'activité vélivole régie par protocole' in restrictions_lower:
+        new_type = "gliding"
+    if name.startswith("LTA") and props['icaoClass'] == "E":
+        new_type = "gliding"
+    if 'survol / overflight' in restrictions_lower :
+        new_type = "Park"
+
+    if props.get('code_zsm', ''):
+        new_type = "ZSM"
+
+    
+    props['type'] = new_type if new_type else "Other"
+
+    # Process upperAltitude
+    upper_alt = props.get('upperAltitude', '')
+    if isinstance(upper_alt, str) and upper_alt.strip() != "":
+        parsed_upper = parse_altitude(upper_alt, "upperAltitude", props.get('name', 'Unknown'))
+        if parsed_upper:
+            props["upperUlArray"] = json.dumps(parsed_upper)
+    
+    # Process lowerAltitude
+    lower_alt = props.get('lowerAltitude', '')
+    if isinstance(lower_alt, str) and lower_alt.strip() != "":
+        parsed_lower = parse_altitude(lower_alt, "lowerAltitude", props.get('name', 'Unknown'))
+        if parsed_lower:
+            props["lowerUlArray"] = json.dumps(parsed_lower)
+
+    return feature
+
+
 def parse_altitude(alt_str, alt_type="Altitude", feature_name="Unknown"):
     formatted=alt_str
     # Process FL tokens: if FL (or fl/Fl) is found, replace patterns with numberFL STD, or warn if no number is found
@@ -68,43 +68,50 @@ def convert_altitude(ul_array_str):
     return None
 
 
+def convert_feature(feature):
+    """Replace the icaoClass, type and altitude properties of one feature with their openAIP codes, in place."""
+    global unknown_dynamic_counter
+    props = feature.get("properties", {})
+
+    # Reverse mapping for icaoClass
+    icao_str = props.get("icaoClass", "Other")
+    props["icaoClass"] = ICAO_CLASS_MAP_R.get(icao_str, 8)
+
+    # Reverse mapping for type
+    type_str = props.get("type", "Other")
+    if type_str in TYPE_MAP_R:
+        props["type"] = TYPE_MAP_R[type_str]
+    else:
+        if type_str not in unknown_type_map:
+            unknown_type_map[type_str] = unknown_dynamic_counter
+            unknown_dynamic_counter += 1
+        props["type"] = unknown_type_map[type_str]
+
+    # Convert upper altitude array to openAIP upperLimit
+    if "upperUlArray" in props:
+        converted = convert_altitude(props["upperUlArray"])
+        if converted:
+            props["upperLimit"] = converted
+        # del props["upperUlArray"]
+
+    # Convert lower altitude array to openAIP lowerLimit
+    if "lowerUlArray" in props:
+        converted = convert_altitude(props["lowerUlArray"])
+        if converted:
+            props["lowerLimit"] = converted
+        # del props["lowerUlArray"]
+
+    return feature
+
+
 def main():
     # Read the processed geojson
     with open('airspace_processed.geojson', 'r') as f:
         data = json.load(f)
 
-    global unknown_dynamic_counter
     features = data.get("features", [])
     for feature in features:
-        props = feature.get("properties", {})
-        
-        # Reverse mapping for icaoClass
-        icao_str = props.get("icaoClass", "Other")
-        props["icaoClass"] = ICAO_CLASS_MAP_R.get(icao_str, 8)
-
-        # Reverse mapping for type
-        type_str = props.get("type", "Other")
-        if type_str in TYPE_MAP_R:
-            props["type"] = TYPE_MAP_R[type_str]
-        else:
-            if type_str not in unknown_type_map:
-                unknown_type_map[type_str] = unknown_dynamic_counter
-                unknown_dynamic_counter += 1
-            props["type"] = unknown_type_map[type_str]
-
-        # Convert upper altitude array to openAIP upperLimit
-        if "upperUlArray" in props:
-            converted = convert_altitude(props["upperUlArray"])
-            if converted:
-                props["upperLimit"] = converted
-            # del props["upperUlArray"]
-
-        # Convert lower altitude array to openAIP lowerLimit
-        if "lowerUlArray" in props:
-            converted = convert_altitude(props["lowerUlArray"])
-            if converted:
-                props["lowerLimit"] = converted
-            # del props["lowerUlArray"]
+        convert_feature(feature)
 
     # Write the openAIP geojson
     # with open('/Users/gabrielbriffe/code/mountainCircles-map-beta/test2/merged_asp.geojson', 'w') as outfile:
@@ -0,0 +1,437 @@
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+import borders
+from stages import ROOT, BORDER_FILES, load_stage
+import make_synthetic_tables
+from patterns import COORD_PAIR_GROUPS_PATTERN
+from table_specs import row_coords
+
+# ===============================
+# Fixtures
+# ===============================
+
+# Excerpt of eaip_selected_tables.html (output of stage 1) and the matching output of stages 2 and 3
+SELECTED_TABLES_FILE = os.path.join(ROOT, "fixtures", "eaip_selected_tables.html")
+CLEANED_TABLES_FILE = os.path.join(ROOT, "fixtures", "eaip_selected_tables_stage1_cleaned.html")
+OPENAIR_FILE = os.path.join(ROOT, "airspace.openair")
+
+# Minimum duration of one sample, benchmarks are looped until they reach it
+MIN_SAMPLE_TIME = 0.05
+
+# Committed reference results the regression check compares against
+BASELINE_FILE = os.path.join(ROOT, "benchmark_baseline.json")
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_records(html_file):
+    """Read the parsed rows of a stage1_cleaned file the way stages 4 and 40 do.
+    Returns a list of dicts with the container index, the current name, the cell texts and the coordinate tokens.
+    """
+    soup = BeautifulSoup(read_text(html_file), "html.parser")
+    records = []
+    for container_index, container in enumerate(soup.select('.table-container')):
+        current_name = None
+        for tr in container.find_all('tr'):
+            classes = tr.get('class', [])
+            if 'parsed-name' in classes:
+                td = tr.find('td')
+                if td:
+                    current_name = td.get_text(strip=True)
+            elif 'parsed-row' in classes:
+                cells = [td.get_text(strip=True) for td in tr.find_all('td')]
+                try:
+                    coords = row_coords(cells)
+                except Exception:
+                    continue
+                records.append({
+                    "container": container_index,
+                    "name": current_name,
+                    "cells": cells,
+                    "coords": coords
+                })
+    return records
+
+
+def raw_coordinate_cells(html_file):
+    """Return the text of the first cell of every content row, i.e. the input of format_coords."""
+    soup = BeautifulSoup(read_text(html_file), "html.parser")
+    cells = []
+    for tr in soup.select(".eaip-row"):
+        tds = tr.find_all("td")
+        if len(tds) >= 3:
+            text = tds[0].get_text(" ", strip=True)
+            if text:
+                cells.append(text)
+    return cells
+
+
+def neighbours(coords):
+    """Yield (prev_token, token, next_token) with the same wrap-around as process_coordinates."""
+    total = len(coords)
+    for i, token in enumerate(coords):
+        yield coords[i - 1 if i != 0 else total - 1], token, coords[i + 1 if i != total - 1 else 0]
+
+
+def border_key(token):
+    lower_token = token.lower()
+    if "germano-suisse" in lower_token:
+        return "switzerland"
+    if "hispano-andorrane" in lower_token:
+        return "andorra"
+    return "france"
+
+
+def is_ctr_tma(name):
+    """Tell the control zones and terminal areas, the airspaces with the most arcs, from their name."""
+    return bool(name) and name.split(maxsplit=1)[0] in ("CTR", "TMA")
+
+
+# ===============================
+# Benchmarks
+# ===============================
+
+# Each benchmark is (name, setup, func, pure, items): setup() returns the arguments of func and runs untimed
+# before every sample. Pure benchmarks do not mutate their arguments and are looped on them within a sample; the
+# others get a new setup() before every call of the loop, see time_calls.
+# items is the number of cells, rows, tokens or airspaces one call of func goes through.
+
+def build_benchmarks():
+    stage2 = load_stage("2-process_tables.py")
+    stage4 = load_stage("4-make_airspace_geojson.py")
+    stage40 = load_stage("40-make_openair.py")
+    stage41 = load_stage("41-compare_openair.py")
+
+    selected_html = read_text(SELECTED_TABLES_FILE)
+    records = read_records(CLEANED_TABLES_FILE)
+    cells = raw_coordinate_cells(SELECTED_TABLES_FILE)
+
+    triplets = []
+    arcs = []
+    ctr_tma_arcs = []
+    circles = []
+    for record in records:
+        for prev_token, token, next_token in neighbours(record["coords"]):
+            lower_token = token.lower()
+            if "frontière" in lower_token:
+                triplet = stage4.make_triplet(token, prev_token, next_token)
+                if stage4.is_pure_lonLat(triplet["prev_token"]) and stage4.is_pure_lonLat(triplet["next_token"]):
+                    triplets.append((triplet, BORDER_FILES[border_key(token)]))
+            elif "arc horaire" in lower_token or "arc anti-horaire" in lower_token:
+                prev_match = COORD_PAIR_GROUPS_PATTERN.search(prev_token)
+                next_match = COORD_PAIR_GROUPS_PATTERN.search(next_token)
+                if prev_match and next_match:
+                    prev_pt = [stage4.convert_coord(prev_match.group(1)), stage4.convert_coord(prev_match.group(2))]
+                    next_pt = [stage4.convert_coord(next_match.group(1)), stage4.convert_coord(next_match.group(2))]
+                    arcs.append((prev_pt, token, next_pt, record["name"]))
+                    if is_ctr_tma(record["name"]):
+                        ctr_tma_arcs.append(arcs[-1])
+            elif "cercle de" in lower_token and "centré sur" in lower_token:
+                circles.append(token)
+
+    openair_airspaces = list(stage41.read_openair_file(OPENAIR_FILE).values())
+
+    def run_format_coords():
+        for text in cells:
+            stage2.format_coords(text)
+
+    def run_lex_coords():
+        for text in cells:
+            stage2.lex_coords(text)
+
+    def table_setup(table_number):
+        def setup():
+            soup = BeautifulSoup(selected_html, "html.parser")
+            return (soup.select(".table-container")[table_number],)
+        return setup
+
+    def run_process_coordinates(stage):
+        def run():
+            for record in records:
+                stage.process_coordinates(record["name"], list(record["coords"]), BORDER_FILES)
+        return run
+
+    def run_shortest_paths():
+        for triplet, border_file in triplets:
+            stage4.get_shortest_path_for_triplet(triplet, border_file)
+
+    def run_construct_arc(arcs):
+        def run():
+            for prev_pt, token, next_pt, name in arcs:
+                stage4.construct_arc(prev_pt, token, next_pt, name)
+        return run
+
+    def run_parse_circle_text():
+        for token in circles:
+            stage4.parse_circle_text(token)
+
+    def run_write_openair():
+        out = io.StringIO()
+        for airspace in openair_airspaces:
+            stage40.write_openair_feature(out, airspace["name"], airspace["class"], airspace["geometry"],
+                                          airspace["ceiling"], airspace["floor"])
+        return out
+
+    def run_read_openair():
+        stage41.read_openair_file(OPENAIR_FILE)
+
+    no_args = lambda: ()
+
+    # The border walks are cached per process: each call starts without them
+    def cold_border_walks():
+        borders.clear_segments()
+        return ()
+
+    benchmarks = [
+        ("2.format_coords", no_args, run_format_coords, True, len(cells)),
+        ("2.lex_coords", no_args, run_lex_coords, True, len(cells)),
+    ]
+    containers = BeautifulSoup(selected_html, "html.parser").select(".table-container")
+    for table_number, processor in sorted(stage2.table_processors.items()):
+        rows = len(containers[table_number].select(".eaip-row"))
+        benchmarks.append((f"2.process_table_{table_number}", table_setup(table_number), processor, False, rows))
+    benchmarks += [
+        ("4.process_coordinates", cold_border_walks, run_process_coordinates(stage4), False, len(records)),
+        ("40.process_coordinates", cold_border_walks, run_process_coordinates(stage40), False, len(records)),
+        ("4.get_shortest_path_for_triplet", cold_border_walks, run_shortest_paths, False, len(triplets)),
+        ("4.construct_arc", no_args, run_construct_arc(arcs), True, len(arcs)),
+        ("4.construct_arc_ctr_tma", no_args, run_construct_arc(ctr_tma_arcs), True, len(ctr_tma_arcs)),
+        ("4.parse_circle_text", no_args, run_parse_circle_text, True, len(circles)),
+        ("40.write_openair_feature", no_args, run_write_openair, True, len(openair_airspaces)),
+        ("41.read_openair_file", no_args, run_read_openair, True, len(openair_airspaces)),
+    ]
+    return benchmarks
+
+
+def time_calls(setup, func, pure, number):
+    """Return the time in seconds of number calls of func. A pure benchmark calls func on the arguments of one setup();
+    the others get the arguments of a new setup() before every call, which is left out of the time.
+    Like timeit, the garbage collector is off during the calls: its full collections walk every live object, so the
+    time would depend on what the benchmarks run before left in memory."""
+    gc.collect()
+    gc.disable()
+    try:
+        if pure:
+            args = setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                func(*args)
+            return time.perf_counter() - start
+        elapsed = 0.0
+        for _ in range(number):
+            args = setup()
+            start = time.perf_counter()
+            func(*args)
+            elapsed += time.perf_counter() - start
+        return elapsed
+    finally:
+        gc.enable()
+
+
+def calibrate(setup, func, pure):
+    """Return the number of calls of func one sample makes, the first power of two that takes MIN_SAMPLE_TIME."""
+    # A first call loads what the functions read lazily (borders, parks, ...), leave it out of the calibration
+    time_calls(setup, func, pure, 1)
+    # Calibrate like timeit.autorange so that short benchmarks are not dominated by timer noise
+    number = 1
+    while time_calls(setup, func, pure, number) < MIN_SAMPLE_TIME:
+        number *= 2
+    return number
+
+
+def run_benchmarks(repeat=5, selection=None):
+    """Run the benchmark suite and return the results as a JSON-serializable dict.
+    The samples are taken in rounds of one sample of every benchmark, so that those of one benchmark are spread over
+    the whole run: the speed of a shared machine drifts over a few seconds, which the samples of a benchmark taken one
+    after the other would all see."""
+    results = {}
+    # The pipeline functions report progress with print(); keep it out of the measurements' output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        benchmarks = [benchmark for benchmark in build_benchmarks()
+                      if not selection or any(s in benchmark[0] for s in selection)]
+        numbers = {name: calibrate(setup, func, pure) for name, setup, func, pure, items in benchmarks}
+        samples = {name: [] for name, setup, func, pure, items in benchmarks}
+        for _ in range(repeat):
+            for name, setup, func, pure, items in benchmarks:
+                samples[name].append(time_calls(setup, func, pure, numbers[name]) / numbers[name])
+    for name, setup, func, pure, items in benchmarks:
+        results[name] = {
+            "median": statistics.median(samples[name]),
+            "min": min(samples[name]),
+            "max": max(samples[name]),
+            "mean": statistics.mean(samples[name]),
+            "stdev": statistics.stdev(samples[name]) if len(samples[name]) > 1 else 0.0,
+            "repeat": repeat,
+            "number": numbers[name],
+            "items": items,
+            "samples": samples[name]
+        }
+        print(f"[BENCH] {name:<36} median {results[name]['median'] * 1000:10.3f} ms  ({items} items)")
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results
+    }
+
+
+def run_scaling(scales, seed=0):
+    """Time stages 2, 4 and 40 end to end on synthetic tables of scale times the size of the France eAIP.
+    Stage 2 reads a generated eaip_selected_tables.html, stages 4 and 40 a generated stage1_cleaned file.
+    """
+    stage2 = load_stage("2-process_tables.py")
+    stage4 = load_stage("4-make_airspace_geojson.py")
+    stage40 = load_stage("40-make_openair.py")
+    parks_file = os.path.join(ROOT, "parks.json")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.devnull, "w") as devnull:
+        selected_file = os.path.join(tmp_dir, "eaip_selected_tables.html")
+        cleaned_file = os.path.join(tmp_dir, "eaip_selected_tables_stage1_cleaned.html")
+        for scale in scales:
+            airspaces = round(make_synthetic_tables.FRANCE_AIRSPACES * scale)
+            make_synthetic_tables.write_tables(selected_file, airspaces, "selected", seed)
+            stats = make_synthetic_tables.write_tables(cleaned_file, airspaces, "cleaned", seed)
+            timings = {}
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                stage2.main(selected_file, os.path.join(tmp_dir, "eaip_selected_tables_stage1.html"))
+                timings["2"] = time.perf_counter() - start
+                start = time.perf_counter()
+                stage4.main(cleaned_file, os.path.join(tmp_dir, "airspace.geojson"), BORDER_FILES, parks_file)
+                timings["4"] = time.perf_counter() - start
+                start = time.perf_counter()
+                stage40.main(cleaned_file, os.path.join(tmp_dir, "airspace.openair"), BORDER_FILES, parks_file)
+                timings["40"] = time.perf_counter() - start
+            results.append({"scale": scale, "airspaces": stats["airspaces"], "stages": timings})
+            print(f"[SCALE] {scale:g}x {stats['airspaces']:>8} airspaces  " +
+                  "  ".join(f"stage {stage} {seconds:8.2f} s" for stage, seconds in timings.items()))
+    return results
+
+
+def compare_results(results, baseline, threshold, selection=None):
+    """Print the change of every benchmark median against the baseline.
+    Returns (regressions, unrecorded): the names of the benchmarks slower than the baseline by more than threshold
+    (0.2 = 20%), and of those the baseline has no result for, which are not checked until it is updated.
+    A median within the spread of the baseline samples, at most its slowest one, is not a regression: the speed of a
+    shared machine drifts by more than the threshold, which the baseline samples, taken over a whole run, show.
+    """
+    regressions = []
+    unrecorded = []
+    reference = baseline["benchmarks"]
+    print(f"{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'delta':>9}")
+    for name, result in results["benchmarks"].items():
+        current = result["median"] * 1000
+        if name not in reference:
+            print(f"{name:<36} {'-':>12} {current:12.3f} {'new':>9}  [NOT IN BASELINE]")
+            unrecorded.append(name)
+            continue
+        previous = reference[name]["median"] * 1000
+        delta = (current - previous) / previous
+        status = ""
+        if delta > threshold:
+            if current > reference[name]["max"] * 1000:
+                status = "  [REGRESSION]"
+                regressions.append(name)
+            else:
+                status = "  [within baseline spread]"
+        print(f"{name:<36} {previous:12.3f} {current:12.3f} {delta:+9.1%}{status}")
+    for name in reference:
+        if selection and not any(s in name for s in selection):
+            continue
+        if name not in results["benchmarks"]:
+            print(f"{name:<36} {reference[name]['median'] * 1000:12.3f} {'-':>12} {'missing':>9}")
+    return regressions, unrecorded
+
+
+def update_baseline(results, baseline_file=BASELINE_FILE):
+    """Record the results in the baseline, keeping the results of the benchmarks that were not run.
+    Run it in the commit that makes a hot path faster, so that --compare keeps the speedup in place.
+    """
+    baseline = {"benchmarks": {}}
+    if os.path.exists(baseline_file):
+        with open(baseline_file, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    benchmarks = dict(baseline["benchmarks"])
+    benchmarks.update(results["benchmarks"])
+    baseline = dict(results, benchmarks=benchmarks)
+    with open(baseline_file, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"[INFO] Recorded {len(results['benchmarks'])} benchmark results in '{baseline_file}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the parsing, geometry and serialization hot paths of the pipeline.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON file the results are written to")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of samples per benchmark")
+    parser.add_argument("-k", "--select", action="append", help="Only run benchmarks whose name contains this text (repeatable)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, metavar="BASELINE",
+                        help="Compare the medians to a baseline results file (default: benchmark_baseline.json) "
+                             "and exit with an error when a benchmark regressed")
+    parser.add_argument("--update-baseline", nargs="?", const=BASELINE_FILE, metavar="BASELINE",
+                        help="Record the results in a baseline results file (default: benchmark_baseline.json), "
+                             "keeping those of the benchmarks not run")
+    parser.add_argument("-t", "--threshold", type=float, default=0.25,
+                        help="Relative slowdown tolerated by --compare (default: 0.25, i.e. 25%%)")
+    parser.add_argument("--scaling", type=float, nargs="+", metavar="SCALE",
+                        help="Instead of the suite, time stages 2, 4 and 40 on synthetic tables of these sizes (1 = France)")
+    args = parser.parse_args()
+
+    if args.scaling:
+        results = {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scaling": run_scaling(args.scaling)
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {len(results['scaling'])} scaling results to '{args.output}'")
+        return
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except Exception as e:
+            print(f"[ERROR] Error reading baseline {args.compare}: {e}")
+            sys.exit(2)
+
+    results = run_benchmarks(args.repeat, args.select)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {len(results['benchmarks'])} benchmark results to '{args.output}'")
+
+    if baseline is not None:
+        regressions, unrecorded = compare_results(results, baseline, args.threshold, args.select)
+        if unrecorded:
+            print(f"[ERROR] {len(unrecorded)} benchmarks are not in {args.compare}: {', '.join(unrecorded)}; "
+                  f"record them with --update-baseline")
+        if regressions:
+            print(f"[ERROR] {len(regressions)} benchmarks regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        if unrecorded or regressions:
+            sys.exit(1)
+        print(f"[INFO] No benchmark regressed by more than {args.threshold:.0%}")
+
+    if args.update_baseline:
+        update_baseline(results, args.update_baseline)
+
+
+if __name__ == '__main__':
+    main()
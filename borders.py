@@ -0,0 +1,600 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+from stages import ROOT, BORDER_FILES
+
+# Border rings walked by the frontière and côte tokens of 4-make_airspace_geojson.py and 40-make_openair.py.
+# Each border file is read once per process and only its ring is kept, as arrays of doubles. The rings can be
+# prebuilt into a binary artifact (python borders.py), memory-mapped instead of parsing the GeoJSON files: the
+# processes of a run then share the same pages.
+
+
+# ===============================
+# Border files
+# ===============================
+
+def read_border_geojson(border_file):
+    """Return the [lon, lat] points of the first feature of a border file: the outer ring of a Polygon or the points
+    of a LineString, none for other geometries or if the file cannot be read."""
+    try:
+        with open(border_file, 'r', encoding='utf-8') as bf:
+            france_geo = json.load(bf)
+            if 'features' in france_geo and len(france_geo['features']) > 0:
+                feature = france_geo['features'][0]
+                geom = feature.get('geometry', {})
+                geo_type = geom.get('type', '').lower()
+                if geo_type == 'polygon':
+                    border_coords = geom.get('coordinates', [])
+                    if border_coords and isinstance(border_coords, list):
+                        border_coords = border_coords[0]
+                    else:
+                        border_coords = []
+                elif geo_type == 'linestring':
+                    border_coords = geom.get('coordinates', [])
+                else:
+                    border_coords = []
+            else:
+                border_coords = []
+            return border_coords
+    except Exception as e:
+        print(f"[ERROR] Error reading {border_file}: {e}")
+        return []
+
+
+def cumulative_lengths(lons, lats):
+    """Return the length of the ring from its first point to each of its points, in degrees, see arc_length."""
+    lengths = array('d', [0.0] * len(lons))
+    total = 0.0
+    for k in range(1, len(lons)):
+        dx = lons[k] - lons[k-1]
+        dy = lats[k] - lats[k-1]
+        total += (dx*dx + dy*dy)**0.5
+        lengths[k] = total
+    return lengths
+
+
+class Border:
+    """Ring of a border: the longitudes and latitudes of its points and the cumulative length of the ring at each of
+    them, as arrays of doubles (or memoryviews of the border artifact), and the GridIndex of its points."""
+
+    def __init__(self, lons, lats, lengths, index=None):
+        self.lons = lons
+        self.lats = lats
+        self.lengths = lengths
+        self._index = index
+
+    @property
+    def index(self):
+        """GridIndex of the points, built on first use unless the border comes from the artifact."""
+        if self._index is None:
+            self._index = GridIndex.build(self.lons, self.lats, self.lengths)
+        return self._index
+
+    @classmethod
+    def from_coords(cls, coords):
+        """Build the Border of [lon, lat] points, as read by read_border_geojson."""
+        lons = array('d', (coord[0] for coord in coords))
+        lats = array('d', (coord[1] for coord in coords))
+        return cls(lons, lats, cumulative_lengths(lons, lats))
+
+    def __len__(self):
+        return len(self.lons)
+
+    def points(self, start, stop):
+        """Return the points start to stop (excluded) as [lon, lat] lists, like the coordinates of a GeoJSON file."""
+        return [[lon, lat] for lon, lat in zip(self.lons[start:stop], self.lats[start:stop])]
+
+
+# ===============================
+# Spatial index
+# ===============================
+
+class GridIndex:
+    """Uniform grid over the points of a border, for the nearest point and the points around a position.
+    The points of cell c are order[starts[c]:starts[c + 1]], cells being numbered row by row from (x0, y0).
+    max_segment is the length of the longest segment of the ring, which bounds the search of the nearest segment.
+    """
+
+    def __init__(self, x0, y0, size, nx, ny, starts, order, max_segment):
+        self.x0 = x0
+        self.y0 = y0
+        self.size = size
+        self.nx = nx
+        self.ny = ny
+        self.starts = starts
+        self.order = order
+        self.max_segment = max_segment
+
+    @classmethod
+    def build(cls, lons, lats, lengths):
+        """Index the points of a ring, with about sqrt(n) cells along the longer side of its bounding box."""
+        n = len(lons)
+        if n == 0:
+            return cls(0.0, 0.0, 1.0, 1, 1, array('q', [0, 0]), array('q'), 0.0)
+        x0, y0 = min(lons), min(lats)
+        extent = max(max(lons) - x0, max(lats) - y0)
+        size = extent / max(1, int(math.sqrt(n))) if extent > 0 else 1.0
+        nx = int((max(lons) - x0) / size) + 1
+        ny = int((max(lats) - y0) / size) + 1
+        index = cls(x0, y0, size, nx, ny, None, None, 0.0)
+
+        cells = [index.cell(lon, lat) for lon, lat in zip(lons, lats)]
+        counts = [0] * (nx * ny + 1)
+        for cell in cells:
+            counts[cell + 1] += 1
+        for c in range(nx * ny):
+            counts[c + 1] += counts[c]
+        index.starts = array('q', counts)
+        # Points of a cell in increasing order, the order of the linear scan they replace
+        index.order = array('q', sorted(range(n), key=cells.__getitem__))
+        index.max_segment = max((lengths[k] - lengths[k-1] for k in range(1, n)), default=0.0)
+        return index
+
+    def column(self, x):
+        return math.floor((x - self.x0) / self.size)
+
+    def row(self, y):
+        return math.floor((y - self.y0) / self.size)
+
+    def cell(self, lon, lat):
+        """Return the cell of a point of the ring."""
+        return min(self.row(lat), self.ny - 1) * self.nx + min(self.column(lon), self.nx - 1)
+
+    def ring_cells(self, cx, cy, r):
+        """Yield the cells of the grid at Chebyshev distance r of the (possibly outside) cell (cx, cy)."""
+        columns = range(max(cx - r, 0), min(cx + r, self.nx - 1) + 1)
+        for cy_ in (cy - r, cy + r) if r else (cy,):
+            if 0 <= cy_ < self.ny:
+                for cx_ in columns:
+                    yield cy_ * self.nx + cx_
+        for cx_ in (cx - r, cx + r) if r else ():
+            if 0 <= cx_ < self.nx:
+                for cy_ in range(max(cy - r + 1, 0), min(cy + r - 1, self.ny - 1) + 1):
+                    yield cy_ * self.nx + cx_
+
+    def covers_grid(self, cx, cy, r):
+        return cx - r <= 0 and cy - r <= 0 and cx + r >= self.nx - 1 and cy + r >= self.ny - 1
+
+    def square_distance(self, x, y, cx, cy, r):
+        """Distance from (x, y) to the outside of the square of cells at most r from (cx, cy): points outside it are
+        at least that far."""
+        left = self.x0 + (cx - r) * self.size
+        bottom = self.y0 + (cy - r) * self.size
+        right = self.x0 + (cx + r + 1) * self.size
+        top = self.y0 + (cy + r + 1) * self.size
+        return min(x - left, right - x, y - bottom, top - y)
+
+    def nearest(self, lons, lats, x, y):
+        """Return the index of the point closest to (x, y), the lowest one among equally close points like a linear
+        scan, None if there is no point. The rings of cells around the cell of (x, y) are searched until no point
+        outside them can be closer.
+        """
+        if not len(self.order):
+            return None
+        cx, cy = self.column(x), self.row(y)
+        # Rings closer than the grid are empty
+        r = max(0, -cx, cx - self.nx + 1, -cy, cy - self.ny + 1)
+        order, starts = self.order, self.starts
+        best_idx = None
+        best_dist = None
+        while True:
+            for cell in self.ring_cells(cx, cy, r):
+                for k in order[starts[cell]:starts[cell + 1]]:
+                    dist = (x - lons[k])**2 + (y - lats[k])**2
+                    if best_dist is None or dist < best_dist or (dist == best_dist and k < best_idx):
+                        best_dist = dist
+                        best_idx = k
+            if self.covers_grid(cx, cy, r):
+                return best_idx
+            if best_dist is not None:
+                bound = self.square_distance(x, y, cx, cy, r)
+                # With a margin for the rounding of the squared distances
+                if best_dist * (1 + 1e-9) < bound * bound:
+                    return best_idx
+            r += 1
+
+    def within(self, x, y, radius):
+        """Return the indexes of the points of the cells that are less than radius from (x, y), a superset of the
+        points at most radius from it."""
+        first_column, last_column = max(self.column(x - radius), 0), min(self.column(x + radius), self.nx - 1)
+        first_row, last_row = max(self.row(y - radius), 0), min(self.row(y + radius), self.ny - 1)
+        indexes = []
+        for cy in range(first_row, last_row + 1):
+            for cell in range(cy * self.nx + first_column, cy * self.nx + last_column + 1):
+                indexes.extend(self.order[self.starts[cell]:self.starts[cell + 1]])
+        return indexes
+
+
+# ===============================
+# Border registry
+# ===============================
+
+# Borders by file, see load_border
+_borders = {}
+
+
+def load_border(border_file):
+    """Return the Border of a border file, read the first time it is asked for in the process: from the border
+    artifact when it holds the current version of the file, otherwise from the file itself."""
+    border = _borders.get(border_file)
+    if border is None:
+        border = artifact_border(border_file)
+        if border is None:
+            border = Border.from_coords(read_border_geojson(border_file))
+        _borders[border_file] = border
+    return border
+
+
+# Rings read from other files by key, with the list of points each was built from, see ring_border
+_rings = {}
+
+
+def ring_border(key, coords):
+    """Return the Border of the [lon, lat] points of a ring read from another file, such as a park of parks.json,
+    built the first time key is asked for in the process. It is built again if key comes with another list of points
+    (read from another parks file), the walks of the previous one being forgotten."""
+    ring = _rings.get(key)
+    if ring is None or ring[0] is not coords:
+        if ring is not None:
+            forget_segments(key)
+        ring = _rings[key] = (coords, Border.from_coords(coords))
+    return ring[1]
+
+
+# ===============================
+# Parks
+# ===============================
+
+PARKS_FILE = "parks.json"
+
+# Parks by file, None for a file that could not be read, see load_parks
+_parks = {}
+
+
+def load_parks(parks_file=PARKS_FILE):
+    """Return the parks of parks_file ({name: {"coordinates": [[lon, lat], ...]}}), read once per process.
+    Returns None, with an error printed the first time, if the file cannot be read."""
+    if parks_file not in _parks:
+        try:
+            with open(parks_file, 'r', encoding='utf-8') as pf:
+                _parks[parks_file] = json.load(pf)
+        except Exception as e:
+            print(f"[ERROR] Error reading park file {parks_file}: {e}")
+            _parks[parks_file] = None
+    return _parks[parks_file]
+
+
+# ===============================
+# Border artifact
+# ===============================
+
+# Layout, little-endian: the header, one entry per border, then for each border its longitudes, latitudes and
+# cumulative lengths, contiguous float64 arrays of its number of points, followed by the starts and order arrays of
+# its GridIndex, int64. An entry identifies its border file by name, size and modification time, an artifact built
+# from another version of the file is not used for it.
+ARTIFACT_FILE = os.path.join(ROOT, "borders.bin")
+ARTIFACT_MAGIC = b"BORDERS\0"
+ARTIFACT_VERSION = 2
+ARTIFACT_HEADER = struct.Struct("<8sII")   # magic, version, number of borders
+# file name, file size, file mtime_ns, offset of the arrays, points, then the GridIndex: x0, y0, size, max_segment,
+# nx, ny
+ARTIFACT_ENTRY = struct.Struct("<64sQqQQddddQQ")
+
+# Borders of the artifact by file name, read by open_artifact
+_artifact = None
+
+
+def file_signature(border_file):
+    stat = os.stat(border_file)
+    return os.path.basename(border_file), stat.st_size, stat.st_mtime_ns
+
+
+def build_artifact(border_files=BORDER_FILES, artifact_file=ARTIFACT_FILE):
+    """Write the rings of the border files to artifact_file, skipping the missing ones. Returns the number of
+    borders written."""
+    rings = []
+    for key, border_file in border_files.items():
+        if not os.path.exists(border_file):
+            print(f"[WARN] Border file '{border_file}' ({key}) not found, left out of the artifact")
+            continue
+        border = Border.from_coords(read_border_geojson(border_file))
+        rings.append((file_signature(border_file), border))
+
+    offset = ARTIFACT_HEADER.size + ARTIFACT_ENTRY.size * len(rings)
+    entries = []
+    for (name, size, mtime_ns), border in rings:
+        index = border.index
+        entries.append(ARTIFACT_ENTRY.pack(name.encode("utf-8"), size, mtime_ns, offset, len(border),
+                                           index.x0, index.y0, index.size, index.max_segment, index.nx, index.ny))
+        offset += 8 * (4 * len(border) + len(index.starts))
+
+    # Written through a temporary file so that the processes reading the artifact never see a partial one
+    tmp_file = artifact_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, len(rings)))
+        for entry in entries:
+            f.write(entry)
+        for _, border in rings:
+            for values in (border.lons, border.lats, border.lengths):
+                f.write(struct.pack(f"<{len(values)}d", *values))
+            for values in (border.index.starts, border.index.order):
+                f.write(struct.pack(f"<{len(values)}q", *values))
+    os.replace(tmp_file, artifact_file)
+    for (name, _, _), border in rings:
+        print(f"[INFO] {name}: {len(border)} points")
+    print(f"[INFO] Wrote {len(rings)} borders to '{artifact_file}'")
+    return len(rings)
+
+
+def open_artifact(artifact_file=ARTIFACT_FILE):
+    """Memory-map the border artifact and return its borders by file name, as ((size, mtime_ns), Border) pairs whose
+    arrays are views of the mapped file. Returns an empty dict when there is no usable artifact."""
+    if sys.byteorder != "little":
+        return {}
+    try:
+        with open(artifact_file, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return {}
+    try:
+        magic, version, count = ARTIFACT_HEADER.unpack_from(mapped)
+    except struct.error:
+        magic = version = count = None
+    if magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION:
+        print(f"[WARN] '{artifact_file}' is not a border artifact of this version, rebuild it with borders.py")
+        return {}
+
+    view = memoryview(mapped)
+    borders = {}
+    for i in range(count):
+        (name, size, mtime_ns, offset, points,
+         x0, y0, cell_size, max_segment, nx, ny) = ARTIFACT_ENTRY.unpack_from(mapped, ARTIFACT_HEADER.size +
+                                                                             i * ARTIFACT_ENTRY.size)
+        arrays = []
+        for length, typecode in ((points, "d"), (points, "d"), (points, "d"), (nx * ny + 1, "q"), (points, "q")):
+            arrays.append(view[offset:offset + 8 * length].cast(typecode))
+            offset += 8 * length
+        lons, lats, lengths, starts, order = arrays
+        index = GridIndex(x0, y0, cell_size, nx, ny, starts, order, max_segment)
+        borders[name.rstrip(b"\0").decode("utf-8")] = ((size, mtime_ns), Border(lons, lats, lengths, index))
+    return borders
+
+
+def artifact_border(border_file):
+    """Return the Border of border_file from the border artifact, None if the artifact does not hold this version of
+    the file."""
+    global _artifact
+    if _artifact is None:
+        _artifact = open_artifact()
+    try:
+        name, size, mtime_ns = file_signature(border_file)
+    except OSError:
+        return None
+    entry = _artifact.get(name)
+    if entry is None:
+        return None
+    if entry[0] != (size, mtime_ns):
+        print(f"[WARN] '{border_file}' changed since the border artifact was built, rebuild it with borders.py")
+        return None
+    return entry[1]
+
+
+# ===============================
+# Border walks
+# ===============================
+
+# Endpoints of the walks: the closest point of the border, or with project_endpoints, their projection on the
+# closest segment of the border. Set by enable_endpoint_projection.
+project_endpoints = False
+
+
+def enable_endpoint_projection():
+    """Start and end the border walks on the projection of their endpoints on the border, rather than on the closest
+    point of the border. Applies to this process: worker processes call it as their initializer."""
+    global project_endpoints
+    project_endpoints = True
+
+
+def closest_index(border, pt):
+    """Return the index of the point of the border closest to pt (lon, lat), None if the border has no point."""
+    return border.index.nearest(border.lons, border.lats, pt[0], pt[1])
+
+
+def closest_projection(border, pt):
+    """Return the projection of pt (lon, lat) on the closest segment of the border, as (k, t, point): the segment
+    goes from point k to point k + 1, t is the position of the projection along it, from 0 to 1. Returns None if the
+    border has less than 2 points.
+    """
+    lons, lats = border.lons, border.lats
+    n = len(lons)
+    k_closest = closest_index(border, pt)
+    if n < 2 or k_closest is None:
+        return None
+    x, y = pt
+    # A segment closer than the closest point has an end less than half its length further
+    radius = math.sqrt((x - lons[k_closest])**2 + (y - lats[k_closest])**2) + border.index.max_segment / 2
+    segments = set()
+    for k in border.index.within(x, y, radius):
+        if k > 0:
+            segments.add(k - 1)
+        if k < n - 1:
+            segments.add(k)
+
+    best = None
+    for k in sorted(segments):
+        ax, ay, bx, by = lons[k], lats[k], lons[k + 1], lats[k + 1]
+        dx, dy = bx - ax, by - ay
+        length2 = dx*dx + dy*dy
+        t = 0.0 if length2 == 0 else min(1.0, max(0.0, ((x - ax)*dx + (y - ay)*dy) / length2))
+        px, py = ax + t*dx, ay + t*dy
+        dist = (x - px)**2 + (y - py)**2
+        if best is None or dist < best[0]:
+            best = (dist, k, t, [px, py])
+    return best[1:]
+
+
+def circular_path(border, i, j):
+    """Return the points of the border from index i to index j, going round the end of the ring if j < i."""
+    if i <= j:
+        return border.points(i, j + 1)
+    return border.points(i, len(border)) + border.points(0, j + 1)
+
+
+def distance(p, q):
+    dx = q[0] - p[0]
+    dy = q[1] - p[1]
+    return (dx*dx + dy*dy)**0.5
+
+
+def arc_length(border, i, j):
+    """Return the length of circular_path(border, i, j) from the cumulative lengths of the border, without building
+    the path. Going round the end of the ring adds the segment from the last point to the first one."""
+    lengths = border.lengths
+    if i <= j:
+        return lengths[j] - lengths[i]
+    last = len(border) - 1
+    closing = distance((border.lons[last], border.lats[last]), (border.lons[0], border.lats[0]))
+    return lengths[last] - lengths[i] + closing + lengths[j]
+
+
+def point(border, k):
+    return border.lons[k], border.lats[k]
+
+
+def without_repeats(path):
+    """Drop the points equal to the point before them, left where a projection falls on a point of the border."""
+    return [pt for k, pt in enumerate(path) if k == 0 or pt != path[k - 1]]
+
+
+def projected_border_path(border, begin, end):
+    """Like shortest_border_path, from the projection of begin to the projection of end on the border."""
+    start = closest_projection(border, begin)
+    stop = closest_projection(border, end)
+    if start is None or stop is None:
+        return None
+    a, t_a, p_begin = start
+    b, t_b, p_end = stop
+
+    # Forward through the points a + 1 to b, backward through the points a down to b + 1
+    forward_direct = a == b and t_a <= t_b
+    backward_direct = a == b and t_a >= t_b
+    if forward_direct:
+        forward_length = distance(p_begin, p_end)
+    else:
+        forward_length = (distance(p_begin, point(border, a + 1)) + arc_length(border, a + 1, b) +
+                          distance(point(border, b), p_end))
+    if backward_direct:
+        backward_length = distance(p_begin, p_end)
+    else:
+        backward_length = (distance(p_begin, point(border, a)) + arc_length(border, b + 1, a) +
+                           distance(point(border, b + 1), p_end))
+
+    # Only the chosen path is built
+    if forward_length <= backward_length:
+        path = [p_begin, p_end] if forward_direct else [p_begin] + circular_path(border, a + 1, b) + [p_end]
+    else:
+        path = [p_begin, p_end] if backward_direct else [p_begin] + circular_path(border, b + 1, a)[::-1] + [p_end]
+    return without_repeats(path)
+
+
+def shortest_border_path(border, begin, end):
+    """Return the points of the border between the points closest to begin and end (lon, lat), as [lon, lat] lists
+    from begin to end, going the shorter way round the ring. Returns None if the border has no point.
+    With project_endpoints, the path goes from the projection of begin to the projection of end instead.
+    """
+    if project_endpoints:
+        return projected_border_path(border, begin, end)
+    i_begin = closest_index(border, begin)
+    i_end = closest_index(border, end)
+    if i_begin is None or i_end is None:
+        return None
+
+    # The shorter way round is chosen from the cumulative lengths, only its points are built
+    if arc_length(border, i_begin, i_end) <= arc_length(border, i_end, i_begin):
+        return circular_path(border, i_begin, i_end)
+    return circular_path(border, i_end, i_begin)[::-1]  # reverse to go from begin to end
+
+
+# ===============================
+# Segment cache
+# ===============================
+
+class BorderPath(list):
+    """Points of a border walk, as returned by border_path: a list of [lon, lat] lists, with the BorderSegment it
+    comes from. The [lon, lat] lists are those of the segment, shared by every walk of it: a caller keeping them
+    in its output copies them, see get_shortest_path_for_triplet of stage 4."""
+
+    def __init__(self, points, segment):
+        super().__init__(points)
+        self.segment = segment
+
+
+class BorderSegment:
+    """Walk of a border between two points, computed once per process, with its points as formatted by the output
+    stages."""
+
+    def __init__(self, points):
+        self.points = points
+        self.formatted = {}
+
+    def format(self, format_point):
+        """Return [format_point(point) for point in the points], computed once for each format_point."""
+        formatted = self.formatted.get(format_point)
+        if formatted is None:
+            formatted = self.formatted[format_point] = [format_point(point) for point in self.points]
+        return formatted
+
+
+# Walks by (border key, begin, end, project_endpoints), see border_path. Stacked airspaces follow each other in the
+# tables: keeping the most recently used walks is enough for them to share theirs, in constant memory.
+SEGMENT_CACHE_SIZE = 256
+_segments = OrderedDict()
+
+
+def clear_segments():
+    """Forget the walks of border_path."""
+    _segments.clear()
+
+
+def forget_segments(border_key):
+    """Forget the walks of border_path along the border of border_key."""
+    for key in [key for key in _segments if key[0] == border_key]:
+        del _segments[key]
+
+
+def border_path(border_key, border, begin, end):
+    """Return shortest_border_path(border, begin, end) as a BorderPath, None if the border has no point.
+    Stacked airspaces follow the same stretch of border between the same points: the walk is made once for a
+    border_key (the file of the border) and endpoints, and shared by the features of both output stages while it is
+    one of the SEGMENT_CACHE_SIZE most recently used.
+    """
+    key = (border_key, begin, end, project_endpoints)
+    segment = _segments.get(key)
+    if segment is None:
+        segment = _segments[key] = BorderSegment(shortest_border_path(border, begin, end))
+        if len(_segments) > SEGMENT_CACHE_SIZE:
+            _segments.popitem(last=False)
+    else:
+        _segments.move_to_end(key)
+    if segment.points is None:
+        return None
+    return BorderPath(segment.points, segment)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the border artifact: the rings of the border files as "
+                                                 "arrays memory-mapped by stages 4 and 40.")
+    parser.add_argument("-o", "--output", default=ARTIFACT_FILE, help=f"Artifact file (default: {ARTIFACT_FILE})")
+    args = parser.parse_args()
+    build_artifact(BORDER_FILES, args.output)
+
+
+if __name__ == '__main__':
+    main()
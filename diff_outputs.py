@@ -0,0 +1,334 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from stages import ROOT, BORDER_FILES, load_stage
+from benchmark import SELECTED_TABLES_FILE, CLEANED_TABLES_FILE, read_records, raw_coordinate_cells
+import make_synthetic_tables
+from table_specs import row_fields, row_coords
+
+# Scripts whose functions are compared between the reference revision and the working tree
+STAGE_FILES = ["2-process_tables.py", "4-make_airspace_geojson.py", "40-make_openair.py"]
+# Runs the reference scripts in a separate process, see its header
+REFERENCE_RUNNER = os.path.join(ROOT, "diff_reference.py")
+# Files the stage scripts read from the working directory, some of them when imported (stage 2 before it had a
+# main() read eaip_selected_tables.html and wrote eaip_selected_tables_stage1.html)
+CWD_INPUTS = ("parks.json", "zsm.geojson")
+# Coordinate cells compared besides those of the tables: only " - " separates points, a newline or tab next to the
+# dash does not
+SEPARATOR_CELLS = [
+    "455400N , 0040300E\n- 455200N , 0040500E - 455000N , 0040700E",
+    "455400N , 0040300E\t-\t455200N , 0040500E - 455000N , 0040700E",
+    "455400N , 0040300E -\n455200N , 0040500E - 455000N , 0040700E",
+]
+
+REGEX_OPENAIR_DMS = r'(\d+):(\d+):(\d+(?:\.\d+)?)\s*([NSEW])'
+REGEX_NUMBER = r'-?\d+(?:\.\d+)?'
+
+
+# ===============================
+# Reference scripts
+# ===============================
+
+def extract_revision(revision, tmp_dir):
+    """Extract the whole tree at a git revision into tmp_dir, so that the reference stage scripts import the shared
+    modules (borders, patterns, table_specs, ...) of the same revision."""
+    try:
+        archive = subprocess.run(["git", "archive", "--format=tar", revision], cwd=ROOT, check=True,
+                                 capture_output=True).stdout
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] Cannot read revision {revision}: {e.stderr.decode().strip()}")
+        sys.exit(2)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(tmp_dir, filter="data")
+        else:
+            tar.extractall(tmp_dir)
+
+
+def reference_outputs(revision, tmp_dir, selected_file, cells, records):
+    """Run the reference scripts on the inputs in another process, with the tree at revision as sys.path[0].
+    The current scripts, their modules and their caches (border walks, loaded borders) are never shared with them.
+    The process runs in a scratch directory holding selected_file as eaip_selected_tables.html and the CWD_INPUTS of
+    the working directory, so that whatever the reference scripts read or write there leaves the user's files alone.
+    Returns the outputs written by diff_reference.py.
+    """
+    tree_dir = os.path.join(tmp_dir, "reference")
+    os.mkdir(tree_dir)
+    work_dir = os.path.join(tmp_dir, "cwd")
+    os.mkdir(work_dir)
+    shutil.copyfile(selected_file, os.path.join(work_dir, "eaip_selected_tables.html"))
+    for filename in CWD_INPUTS:
+        if os.path.exists(filename):
+            shutil.copyfile(filename, os.path.join(work_dir, filename))
+    extract_revision(revision, tree_dir)
+    runner = os.path.join(tree_dir, os.path.basename(REFERENCE_RUNNER))
+    shutil.copyfile(REFERENCE_RUNNER, runner)
+    inputs_file = os.path.join(tmp_dir, "inputs.json")
+    outputs_file = os.path.join(tmp_dir, "outputs.json")
+    inputs = {
+        "stages": dict(zip(("2", "4", "40"), STAGE_FILES)),
+        "border_files": BORDER_FILES,
+        "cells": cells,
+        "records": [{"name": record["name"], "coords": record["coords"], "limits": record_limits(record)}
+                    for record in records],
+    }
+    with open(inputs_file, "w", encoding="utf-8") as f:
+        json.dump(inputs, f, ensure_ascii=False)
+    result = subprocess.run([sys.executable, runner, inputs_file, outputs_file], cwd=work_dir)
+    if result.returncode != 0:
+        print(f"[ERROR] The reference scripts at {revision} failed")
+        sys.exit(2)
+    with open(outputs_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ===============================
+# Comparison helpers
+# ===============================
+
+def dms_to_decimal(match):
+    value = int(match.group(1)) + int(match.group(2)) / 60 + float(match.group(3)) / 3600
+    return -value if match.group(4) in "SW" else value
+
+
+def split_command(line):
+    """Split an OpenAir geometry line into its text with the numbers blanked out and the numbers as floats.
+    'DP 47:04:56 N 002:10:08 E' -> ('DP # #', [47.082..., 2.168...])
+    """
+    values = []
+
+    def dms(match):
+        values.append(dms_to_decimal(match))
+        return "#"
+
+    def number(match):
+        values.append(float(match.group(0)))
+        return "#"
+
+    template = re.sub(REGEX_OPENAIR_DMS, dms, line)
+    template = re.sub(REGEX_NUMBER, number, template)
+    return template, values
+
+
+def compare_points(name, ref_points, cur_points, tolerance, diffs):
+    """Compare two lists of [lon, lat] points, recording every coordinate further apart than tolerance."""
+    if len(ref_points) != len(cur_points):
+        diffs.append(f"{name}: {len(ref_points)} points in reference, {len(cur_points)} in current")
+    for i, (ref_pt, cur_pt) in enumerate(zip(ref_points, cur_points)):
+        if any(abs(a - b) > tolerance for a, b in zip(ref_pt, cur_pt)):
+            diffs.append(f"{name}: point {i} reference {ref_pt} current {cur_pt}")
+
+
+def compare_lines(name, ref_lines, cur_lines, tolerance, diffs):
+    """Compare two lists of OpenAir lines. Geometry lines are compared number by number, others as text."""
+    if len(ref_lines) != len(cur_lines):
+        diffs.append(f"{name}: {len(ref_lines)} lines in reference, {len(cur_lines)} in current")
+    for i, (ref_line, cur_line) in enumerate(zip(ref_lines, cur_lines)):
+        if ref_line == cur_line:
+            continue
+        if ref_line.startswith(("DP", "DB", "DC", "V X=")):
+            ref_template, ref_values = split_command(ref_line)
+            cur_template, cur_values = split_command(cur_line)
+            if ref_template == cur_template and len(ref_values) == len(cur_values) and \
+                    all(abs(a - b) <= tolerance for a, b in zip(ref_values, cur_values)):
+                continue
+        diffs.append(f"{name}: line {i} reference '{ref_line}' current '{cur_line}'")
+
+
+def report(label, diffs, total, max_diffs):
+    for diff in diffs[:max_diffs]:
+        print(f"[DIFF] {label}: {diff}")
+    if len(diffs) > max_diffs:
+        print(f"[DIFF] {label}: ... {len(diffs) - max_diffs} more")
+    print(f"[INFO] {label}: {len(diffs)} differences over {total} inputs")
+    return len(diffs)
+
+
+# ===============================
+# Function comparisons
+# ===============================
+
+def diff_format_coords(ref_outputs, cur, cells):
+    diffs = []
+    for text, ref_out in zip(cells, ref_outputs):
+        # Compared as stages 4 and 40 read them, whether given as points or as JSON text
+        cur_out = row_coords([cur.format_coords(text)])
+        if ref_out != cur_out:
+            diffs.append(f"'{text[:60]}' reference {ref_out} current {cur_out}")
+    return diffs
+
+
+def diff_geojson_geometry(ref_outputs, cur, records, tolerance):
+    diffs = []
+    for record, (ref_points, ref_missing) in zip(records, ref_outputs):
+        cur_points, cur_missing = cur.process_coordinates(record["name"], list(record["coords"]), BORDER_FILES)
+        if ref_missing != cur_missing:
+            diffs.append(f"{record['name']}: had_missing reference {ref_missing} current {cur_missing}")
+        compare_points(record["name"], ref_points, cur_points, tolerance, diffs)
+    return diffs
+
+
+def diff_openair_geometry(ref_outputs, cur, records, tolerance):
+    diffs = []
+    for record, (ref_commands, ref_missing) in zip(records, ref_outputs):
+        cur_commands, cur_missing = cur.process_coordinates(record["name"], list(record["coords"]), BORDER_FILES)
+        if ref_missing != cur_missing:
+            diffs.append(f"{record['name']}: had_missing reference {ref_missing} current {cur_missing}")
+        compare_lines(record["name"], ref_commands, cur_commands, tolerance, diffs)
+    return diffs
+
+
+def record_limits(record):
+    """Return (class, upper, lower) of a record, from the cells stages 4 and 40 read them from."""
+    fields = row_fields(record["container"], record["cells"])
+    return fields["icao_class"], fields["upper"], fields["lower"]
+
+
+def diff_openair_writer(ref_geometry, ref_outputs, cur, records, tolerance):
+    """Write every record with the current write_openair_feature, from the geometry of the reference script, and
+    compare with what the reference one wrote."""
+    diffs = []
+    for record, (commands, had_missing), ref_text in zip(records, ref_geometry, ref_outputs):
+        if had_missing:
+            continue
+        icao_class, upper, lower = record_limits(record)
+        cur_out = io.StringIO()
+        cur.write_openair_feature(cur_out, record["name"], icao_class, commands, upper, lower)
+        compare_lines(record["name"], ref_text.splitlines(), cur_out.getvalue().splitlines(), tolerance, diffs)
+    return diffs
+
+
+def diff_functions(revision, selected_file, cleaned_file, tolerance, max_diffs):
+    """Run the reference and current functions on the same inputs and report the differences."""
+    cells = raw_coordinate_cells(selected_file) + SEPARATOR_CELLS
+    records = read_records(cleaned_file)
+    total = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reference = reference_outputs(revision, tmp_dir, selected_file, cells, records)
+    current = {filename: load_stage(filename) for filename in STAGE_FILES}
+    comparisons = [
+        ("2.format_coords", lambda: diff_format_coords(reference["format_coords"], current[STAGE_FILES[0]], cells), len(cells)),
+        ("4.process_coordinates", lambda: diff_geojson_geometry(reference["geojson"], current[STAGE_FILES[1]], records, tolerance), len(records)),
+        ("40.process_coordinates", lambda: diff_openair_geometry(reference["openair"], current[STAGE_FILES[2]], records, tolerance), len(records)),
+        ("40.write_openair_feature", lambda: diff_openair_writer(reference["openair"], reference["writer"], current[STAGE_FILES[2]], records, tolerance), len(records)),
+    ]
+    for label, compare, inputs in comparisons:
+        # The pipeline functions report progress with print(); keep it out of the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            diffs = compare()
+        total += report(label, diffs, inputs, max_diffs)
+    return total
+
+
+# ===============================
+# Output file comparisons
+# ===============================
+
+def diff_geojson_files(ref_file, cur_file, tolerance, max_diffs):
+    """Compare two airspace.geojson files feature by feature."""
+    with open(ref_file, "r", encoding="utf-8") as f:
+        ref_features = json.load(f)["features"]
+    with open(cur_file, "r", encoding="utf-8") as f:
+        cur_features = json.load(f)["features"]
+    diffs = []
+    if len(ref_features) != len(cur_features):
+        diffs.append(f"{len(ref_features)} features in reference, {len(cur_features)} in current")
+    for i, (ref_feature, cur_feature) in enumerate(zip(ref_features, cur_features)):
+        name = f"#{i} {ref_feature['properties'].get('name')}"
+        for key in sorted(set(ref_feature["properties"]) | set(cur_feature["properties"])):
+            if ref_feature["properties"].get(key) != cur_feature["properties"].get(key):
+                diffs.append(f"{name}: {key} reference '{ref_feature['properties'].get(key)}' "
+                             f"current '{cur_feature['properties'].get(key)}'")
+        ref_rings = ref_feature["geometry"]["coordinates"]
+        cur_rings = cur_feature["geometry"]["coordinates"]
+        if len(ref_rings) != len(cur_rings):
+            diffs.append(f"{name}: {len(ref_rings)} rings in reference, {len(cur_rings)} in current")
+        for ref_ring, cur_ring in zip(ref_rings, cur_rings):
+            compare_points(name, ref_ring, cur_ring, tolerance, diffs)
+    return report("airspace.geojson", diffs, len(ref_features), max_diffs)
+
+
+def read_openair_blocks(filename):
+    """Return the airspaces of an OpenAir file in order, as lists of lines (comments and blank lines dropped)."""
+    blocks = []
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("*"):
+                continue
+            if line.split()[0] == "AC" or not blocks:
+                blocks.append([])
+            blocks[-1].append(line)
+    return blocks
+
+
+def diff_openair_files(ref_file, cur_file, tolerance, max_diffs):
+    """Compare two airspace.openair files airspace by airspace."""
+    ref_blocks = read_openair_blocks(ref_file)
+    cur_blocks = read_openair_blocks(cur_file)
+    diffs = []
+    if len(ref_blocks) != len(cur_blocks):
+        diffs.append(f"{len(ref_blocks)} airspaces in reference, {len(cur_blocks)} in current")
+    for i, (ref_block, cur_block) in enumerate(zip(ref_blocks, cur_blocks)):
+        name = next((line[3:] for line in ref_block if line.startswith("AN ")), "")
+        compare_lines(f"#{i} {name}", ref_block, cur_block, tolerance, diffs)
+    return report("airspace.openair", diffs, len(ref_blocks), max_diffs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that changed parsing, geometry or serialization code "
+                                                 "gives the same results as the reference scripts.")
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("-t", "--tolerance", type=float, default=1e-9,
+                         help="Largest accepted difference between two coordinates, in degrees (default: 1e-9)")
+    options.add_argument("--max-diffs", type=int, default=20, help="Number of differences printed per comparison")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    functions = subparsers.add_parser("functions", parents=[options], help="Compare format_coords, process_coordinates (4 and 40) and "
+                                                        "write_openair_feature with their version at a git revision")
+    functions.add_argument("-r", "--reference", default="HEAD", help="Git revision of the reference scripts (default: HEAD)")
+    functions.add_argument("--selected", default=SELECTED_TABLES_FILE, help="eaip_selected_tables.html giving the format_coords inputs")
+    functions.add_argument("--cleaned", default=CLEANED_TABLES_FILE, help="stage1_cleaned file giving the process_coordinates inputs")
+    functions.add_argument("--synthetic", type=float, metavar="SCALE",
+                           help="Use synthetic tables of this size (1 = France) instead of --selected and --cleaned")
+
+    for command, label in (("geojson", "airspace.geojson"), ("openair", "airspace.openair")):
+        files = subparsers.add_parser(command, parents=[options], help=f"Compare two {label} files")
+        files.add_argument("reference", help=f"{label} made by the reference scripts")
+        files.add_argument("current", help=f"{label} made by the current scripts")
+
+    args = parser.parse_args()
+
+    if args.command == "functions":
+        if args.synthetic:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                selected_file = os.path.join(tmp_dir, "eaip_selected_tables.html")
+                cleaned_file = os.path.join(tmp_dir, "eaip_selected_tables_stage1_cleaned.html")
+                airspaces = round(make_synthetic_tables.FRANCE_AIRSPACES * args.synthetic)
+                make_synthetic_tables.write_tables(selected_file, airspaces, "selected")
+                make_synthetic_tables.write_tables(cleaned_file, airspaces, "cleaned")
+                differences = diff_functions(args.reference, selected_file, cleaned_file, args.tolerance, args.max_diffs)
+        else:
+            differences = diff_functions(args.reference, args.selected, args.cleaned, args.tolerance, args.max_diffs)
+    elif args.command == "geojson":
+        differences = diff_geojson_files(args.reference, args.current, args.tolerance, args.max_diffs)
+    else:
+        differences = diff_openair_files(args.reference, args.current, args.tolerance, args.max_diffs)
+
+    if differences:
+        print(f"[ERROR] {differences} differences found")
+        sys.exit(1)
+    print("[INFO] No differences found")
+
+
+if __name__ == '__main__':
+    main()
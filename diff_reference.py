@@ -0,0 +1,69 @@
+# Reference side of 'diff_outputs.py functions', run in a separate process.
+#
+# diff_outputs.py copies this script into a directory holding the whole tree at the reference revision and runs it
+# there, so that the stage scripts import the borders, patterns, table_specs and memo_cache modules of that revision,
+# with caches of their own. It reads the inputs from a JSON file and writes the reference outputs to another.
+# Only the standard library is imported here: the modules next to this script belong to the reference revision.
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_script(filename):
+    module_name = "reference_" + os.path.splitext(filename)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def coords_list(coords):
+    """Return the output of format_coords as a list, as row_coords reads it, whatever the revision returns."""
+    if isinstance(coords, str):
+        clean_text = re.sub(r'\s+', ' ', re.sub(r'[\x00-\x1F]+', ' ', coords)).strip()
+        return json.loads(clean_text)
+    return list(coords)
+
+
+def reference_outputs(inputs):
+    stage2 = load_script(inputs["stages"]["2"])
+    stage4 = load_script(inputs["stages"]["4"])
+    stage40 = load_script(inputs["stages"]["40"])
+    border_files = inputs["border_files"]
+    outputs = {"format_coords": [], "geojson": [], "openair": [], "writer": []}
+    for text in inputs["cells"]:
+        outputs["format_coords"].append(coords_list(stage2.format_coords(text)))
+    for record in inputs["records"]:
+        outputs["geojson"].append(stage4.process_coordinates(record["name"], list(record["coords"]), border_files))
+        commands, had_missing = stage40.process_coordinates(record["name"], list(record["coords"]), border_files)
+        outputs["openair"].append((commands, had_missing))
+        if had_missing:
+            outputs["writer"].append(None)
+            continue
+        icao_class, upper, lower = record["limits"]
+        out = io.StringIO()
+        stage40.write_openair_feature(out, record["name"], icao_class, commands, upper, lower)
+        outputs["writer"].append(out.getvalue())
+    return outputs
+
+
+def main():
+    inputs_file, outputs_file = sys.argv[1], sys.argv[2]
+    with open(inputs_file, "r", encoding="utf-8") as f:
+        inputs = json.load(f)
+    # The pipeline functions report progress with print(); keep it out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        outputs = reference_outputs(inputs)
+    with open(outputs_file, "w", encoding="utf-8") as f:
+        json.dump(outputs, f, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+import argparse
+import html
+import json
+import math
+import os
+import random
+
+from stages import ROOT
+
+# ===============================
+# Table layouts
+# ===============================
+
+# For every selected table: the number of airspaces it holds in the France eAIP (counted in airspace.openair),
+# the geometry kinds drawn for it and the name prefix. The counts give the default mix and the 1x size.
+TABLES = {
+    0: {"count": 7, "kinds": ["polygon", "border"], "prefix": "FIR"},
+    1: {"count": 19, "kinds": ["polygon", "border"], "prefix": "LTA"},
+    2: {"count": 461, "kinds": ["polygon", "arc", "border"], "prefix": "TMA"},
+    3: {"count": 46, "kinds": ["polygon", "arc"], "prefix": "CTA"},
+    4: {"count": 110, "kinds": ["polygon", "border"], "prefix": "SIV"},
+    5: {"count": 306, "kinds": ["polygon", "arc", "circle"], "prefix": "LF R"},
+    6: {"count": 307, "kinds": ["polygon", "arc", "circle", "border"], "prefix": "LF R"},
+    7: {"count": 106, "kinds": ["circle", "arc", "polygon"], "prefix": "LF P"},
+    8: {"count": 64, "kinds": ["polygon", "circle"], "prefix": "LF D"},
+    9: {"count": 64, "kinds": ["polygon", "circle", "border"], "prefix": "LF D"},
+    10: {"count": 162, "kinds": ["point"], "prefix": ""},
+    11: {"count": 21, "kinds": ["polygon"], "prefix": "RMZ"},
+    12: {"count": 96, "kinds": ["arc", "circle", "border"], "prefix": "CTR"}
+}
+
+FRANCE_AIRSPACES = sum(table["count"] for table in TABLES.values())
+
+# Relative frequency of the geometry kinds, restricted to the kinds allowed by each table
+KIND_WEIGHTS = {"polygon": 50, "arc": 25, "circle": 10, "border": 15, "point": 1}
+
+# Border files the "frontière" tokens are drawn on, with their share of the border airspaces
+BORDERS = [
+    ("France.geojson", None, 0.8),
+    ("Suisse.geojson", "frontière germano-suisse", 0.1),
+    ("Andorre.geojson", "frontière hispano-andorrane", 0.1)
+]
+
+# Bounding box the airspace centers are drawn in, and the point inland airspaces along a border are pulled towards
+LAT_RANGE = (42.5, 51.0)
+LON_RANGE = (-4.5, 7.5)
+FRANCE_CENTER = (46.6, 2.4)
+
+ALTITUDES = ["UNL", "FL 195", "FL 145", "FL 115", "FL 065", "5500 ft AMSL", "3500 ft AMSL", "2500 ft AMSL",
+             "1500 ft AMSL", "3000 ft ASFC", "1000 ft ASFC", "SFC"]
+
+HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>{title}</title>
+</head>
+<body>
+"""
+HEADER5 = "<thead><tr class=\"eaip-row\"><th>Limites latérales</th><th>Classe</th><th>Limites verticales</th><th>Unité</th><th>Remarques</th></tr></thead>"
+
+
+# ===============================
+# Geometry
+# ===============================
+
+def dms(value, is_latitude):
+    """Split a decimal coordinate into (degrees, minutes, seconds, hemisphere), rounded like format_dms."""
+    abs_val = abs(value)
+    degrees = int(abs_val)
+    remainder = (abs_val - degrees) * 60
+    minutes = int(remainder)
+    seconds = int(round((remainder - minutes) * 60))
+    if seconds == 60:
+        seconds = 0
+        minutes += 1
+    if minutes == 60:
+        minutes = 0
+        degrees += 1
+    if is_latitude:
+        return degrees, minutes, seconds, 'N' if value >= 0 else 'S'
+    return degrees, minutes, seconds, 'E' if value >= 0 else 'W'
+
+
+def destination(lat, lon, bearing, distance_nm):
+    """Point at distance_nm along bearing (degrees from north) from (lat, lon)."""
+    r = math.radians(distance_nm / 60)
+    lat1 = math.radians(lat)
+    lon1 = math.radians(lon)
+    theta = math.radians(bearing)
+    lat2 = math.asin(math.sin(lat1) * math.cos(r) + math.cos(lat1) * math.sin(r) * math.cos(theta))
+    lon2 = lon1 + math.atan2(math.sin(theta) * math.sin(r) * math.cos(lat1), math.cos(r) - math.sin(lat1) * math.sin(lat2))
+    return math.degrees(lat2), math.degrees(lon2)
+
+
+def read_border(border_file):
+    """Return the [lon, lat] vertices of a border LineString."""
+    with open(os.path.join(ROOT, border_file), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data["features"][0]["geometry"]["coordinates"]
+
+
+def france_border_label(lat, lon):
+    """Name the French border a vertex lies on, the way the eAIP does."""
+    if lat < 43 or (lat < 44 and lon < 0):
+        return "frontière franco-espagnole"
+    if lat < 46:
+        return "frontière franco-italienne"
+    if lat < 47 or (int(lat) == 47 and lon < 7):
+        return "frontière franco-suisse"
+    if lat < 49:
+        return "frontière franco-allemande"
+    return "frontière franco-belge"
+
+
+def random_center(rng):
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+
+def make_polygon(rng):
+    lat, lon = random_center(rng)
+    radius = rng.uniform(2, 40)
+    bearings = sorted(rng.uniform(0, 360) for _ in range(rng.randint(3, 10)))
+    return [("point",) + destination(lat, lon, b, radius * rng.uniform(0.6, 1.0)) for b in bearings]
+
+
+def make_arc(rng):
+    """Polygon whose vertices partly lie on a circle, consecutive ones being joined by an arc."""
+    lat, lon = random_center(rng)
+    radius = round(rng.uniform(1, 35), 1)
+    clockwise = rng.random() < 0.6
+    bearings = sorted((rng.uniform(0, 360) for _ in range(rng.randint(3, 8))), reverse=not clockwise)
+    on_circle = [rng.random() < 0.7 for _ in bearings]
+    tokens = []
+    for i, bearing in enumerate(bearings):
+        distance = radius if on_circle[i] else radius * rng.uniform(0.4, 0.9)
+        tokens.append(("point",) + destination(lat, lon, bearing, distance))
+        j = (i + 1) % len(bearings)
+        if on_circle[i] and on_circle[j] and rng.random() < 0.8:
+            tokens.append(("arc", "horaire" if clockwise else "anti-horaire", radius, lat, lon))
+    return tokens
+
+
+def make_circle(rng):
+    lat, lon = random_center(rng)
+    return [("circle", round(rng.choice([0.5, 1, 1.5, 2, 2.7, 3, 5, 8]) * rng.uniform(0.8, 1.2), 2), lat, lon)]
+
+
+def make_point(rng):
+    return [("point",) + random_center(rng)]
+
+
+def make_border(rng, borders):
+    """Polygon following a stretch of a border file between two of its vertices, closed by inland points."""
+    coords, label = rng.choices([(coords, label) for coords, label, _ in borders],
+                                weights=[weight for _, _, weight in borders])[0]
+    length = rng.randint(3, min(60, len(coords) // 4))
+    start = rng.randrange(len(coords) - length)
+    first = coords[start]
+    last = coords[start + length]
+    if label is None:
+        label = france_border_label(first[1], first[0])
+    tokens = [("point", first[1], first[0]), ("border", label), ("point", last[1], last[0])]
+    # Pull points spread between the two ends towards the middle of France
+    depth = rng.uniform(0.1, 0.5)
+    steps = rng.randint(1, 3)
+    for k in range(steps, 0, -1):
+        t = k / (steps + 1)
+        lat = first[1] + (last[1] - first[1]) * t
+        lon = first[0] + (last[0] - first[0]) * t
+        tokens.append(("point", lat + (FRANCE_CENTER[0] - lat) * depth, lon + (FRANCE_CENTER[1] - lon) * depth))
+    return tokens
+
+
+def make_geometry(rng, kinds, borders):
+    kind = rng.choices(kinds, weights=[KIND_WEIGHTS[k] for k in kinds])[0]
+    if kind == "polygon":
+        return make_polygon(rng)
+    if kind == "arc":
+        return make_arc(rng)
+    if kind == "circle":
+        return make_circle(rng)
+    if kind == "border":
+        return make_border(rng, borders)
+    return make_point(rng)
+
+
+# ===============================
+# Token rendering
+# ===============================
+
+def raw_point(lat, lon, compact=False):
+    """Coordinate pair as written in the eAIP tables, in degree-sign or compact spelling."""
+    la = dms(lat, True)
+    lo = dms(lon, False)
+    if not compact:
+        return f"{la[0]:02d}°{la[1]:02d}'{la[2]:02d}\"{la[3]} , {lo[0]:03d}°{lo[1]:02d}'{lo[2]:02d}\"{lo[3]}"
+    return f"{la[0]:02d}{la[1]:02d}{la[2]:02d}{la[3]} , {lo[0]:03d}{lo[1]:02d}{lo[2]:02d}{lo[3]}"
+
+
+def parsed_point(lat, lon):
+    """Coordinate pair as produced by format_coords in stage 2."""
+    la = dms(lat, True)
+    lo = dms(lon, False)
+    return f"{la[0]:02d}{la[1]:02d}{la[2]:02d}{la[3]}@{lo[0]:03d}{lo[1]:02d}{lo[2]:02d}{lo[3]}"
+
+
+def render_token(token, point):
+    kind = token[0]
+    if kind == "point":
+        return point(token[1], token[2])
+    if kind == "arc":
+        return f"arc {token[1]} de {token[2]:g} NM de rayon centré sur {point(token[3], token[4])}"
+    if kind == "circle":
+        return f"Cercle de {token[1]:g} NM de rayon centré sur {point(token[2], token[3])}"
+    return token[1]
+
+
+def random_altitudes(rng):
+    upper, lower = sorted(rng.sample(range(len(ALTITUDES)), 2))
+    return ALTITUDES[upper], ALTITUDES[lower]
+
+
+# ===============================
+# Airspaces
+# ===============================
+
+def table_counts(airspaces):
+    """Spread the airspace count over the tables in the France proportions."""
+    counts = {}
+    for table_number, table in TABLES.items():
+        counts[table_number] = max(1, round(airspaces * table["count"] / FRANCE_AIRSPACES))
+    return counts
+
+
+def generate_airspaces(table_number, count, rng, borders):
+    """Yield one dict per synthetic airspace of a table."""
+    table = TABLES[table_number]
+    for n in range(count):
+        upper, lower = random_altitudes(rng)
+        if table_number == 10:
+            name = f"SYNTH{n}"
+        else:
+            name = f"{table['prefix']} SYNTH{n}"
+            if rng.random() < 0.3:
+                name += f" partie {rng.randint(1, 4)}"
+        yield {
+            "name": name,
+            "geometry": make_geometry(rng, table["kinds"], borders),
+            "class": rng.choice("ACDEG"),
+            "upper": upper,
+            "lower": lower,
+            "unit": f"SYNTH{n} APP {rng.uniform(118, 136):.3f}"
+        }
+
+
+def esc(text):
+    return html.escape(text, quote=False)
+
+
+def td(text):
+    return f"<td>{esc(text)}</td>"
+
+
+def row(cells):
+    return "<tr class=\"eaip-row\">" + "".join(cells) + "</tr>\n"
+
+
+def selected_rows(table_number, airspace, rng):
+    """Rows of one airspace in the layout of the eAIP table (input of stage 2)."""
+    tokens = airspace["geometry"]
+    if table_number in (2, 7):
+        # The name is written before the first coordinate of the cell, keep a point in front
+        first_point = next((i for i, token in enumerate(tokens) if token[0] == "point"), 0)
+        tokens = tokens[first_point:] + tokens[:first_point]
+    # Stage 2 finds the end of an embedded name on a degree-sign coordinate, so only later points may be compact
+    coords = " - ".join(render_token(token, lambda lat, lon: raw_point(lat, lon, i > 0 and rng.random() < 0.2))
+                        for i, token in enumerate(tokens))
+    altitude = f"<td><p>{esc(airspace['upper'])}</p><p>------------</p><p>{esc(airspace['lower'])}</p></td>"
+    name = airspace["name"]
+
+    if table_number in (0, 1, 3, 12):
+        return (row([f"<td class=\"strong\" colspan=\"5\">{esc(name)}</td>"]) +
+                row([td(coords), td(airspace["class"]), altitude, td(airspace["unit"]), td("H24")]))
+    if table_number == 2:
+        return row([td(name + " " + coords), td(airspace["class"]), altitude, td(airspace["unit"]), td("")])
+    if table_number == 4:
+        return (row([f"<td class=\"strong\" colspan=\"4\">{esc(name)}</td>"]) +
+                row([td(coords), altitude, td(airspace["unit"]), td("Service d'information de vol")]))
+    if table_number in (5, 8):
+        parts = name.split(" ", 3)
+        return (row([td(" ".join(parts[:3])), td(parts[3] if len(parts) > 3 else "")]) +
+                row([td(coords), altitude, td("H24"), td("Pénétration interdite"), td("")]))
+    if table_number in (6, 9):
+        return (row([f"<td class=\"strong\" colspan=\"5\">{esc(name)}</td>"]) +
+                row([td(coords), altitude, td("H24"), td("Pénétration interdite"), td("")]))
+    if table_number == 7:
+        altitude = f"<td><p>{esc(airspace['upper'])}</p><p>{esc(airspace['lower'])}</p></td>"
+        return row([td(name + " " + coords), altitude, td("Survol interdit")])
+    if table_number == 10:
+        return (row([td(name), td("Parachutage sportif Aérodrome de " + name), td(airspace["upper"]), td("SR-SS")]) +
+                row([td(coords), td("SFC"), td("Activité signalée par NOTAM")]))
+    return (row([td(name)]) +
+            row([td(coords), td(airspace["upper"]), td("Contact radio obligatoire"), td("")]))
+
+
+def parsed_rows(table_number, airspace):
+    """Rows of one airspace as left by stages 2 and 3 (input of stages 4 and 40)."""
+    tokens = json.dumps([render_token(token, parsed_point) for token in airspace["geometry"]], ensure_ascii=False)
+    altitude = f"{airspace['upper']} ------------ {airspace['lower']}"
+    name = airspace["name"]
+    if table_number in (0, 1, 3, 12):
+        cells = [tokens, airspace["class"], altitude, airspace["unit"], "H24"]
+    elif table_number == 2:
+        cells = [tokens, airspace["class"], altitude, airspace["unit"], ""]
+    elif table_number == 4:
+        cells = [tokens, altitude, airspace["unit"], "Service d'information de vol"]
+    elif table_number in (5, 6, 8, 9):
+        cells = [tokens, altitude, "H24", "Pénétration interdite", ""]
+    elif table_number == 7:
+        cells = [tokens, altitude, "Survol interdit"]
+    elif table_number == 10:
+        name += " para sportif"
+        cells = [tokens, f"{airspace['upper']} ------------ SFC", "SR-SS Activité signalée par NOTAM"]
+    else:
+        cells = [tokens, airspace["upper"], "Contact radio obligatoire", ""]
+    return (f"<tr class=\"eaip-row parsed-name\">{td(name)}</tr>\n"
+            f"<tr class=\"eaip-row parsed-row\">{''.join(td(cell) for cell in cells)}</tr>\n")
+
+
+def write_tables(output_file, airspaces, stage="selected", seed=0):
+    """Write a synthetic eaip_selected_tables.html (stage="selected") or
+    eaip_selected_tables_stage1_cleaned.html (stage="cleaned") holding about `airspaces` airspaces.
+    Rows are written as they are generated so that 100x files do not have to fit in memory.
+    Returns the number of airspaces and tokens written per kind.
+    """
+    rng = random.Random(seed)
+    # Spelling variants are drawn separately so that both stages describe the same airspaces for a given seed
+    spelling_rng = random.Random(seed + 1)
+    borders = [(read_border(border_file), label, weight) for border_file, label, weight in BORDERS]
+    stats = {"airspaces": 0, "point": 0, "arc": 0, "circle": 0, "border": 0}
+    title = "eAIP Selected Tables" if stage == "selected" else "eAIP Selected Tables Stage 1"
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(HEADER.format(title=title))
+        for table_number, count in table_counts(airspaces).items():
+            f.write("<div class=\"table-container\">\n")
+            f.write(f"<h3>Table number: {table_number}</h3>\n")
+            if stage == "selected" and table_number not in (10, 11):
+                f.write(f"<table class=\"eaip-table\">{HEADER5}<tbody>\n")
+            else:
+                f.write("<table class=\"eaip-table\"><thead></thead><tbody>\n")
+            if stage == "selected" and table_number == 10:
+                f.write("<tr class=\"eaip-row\"><th>Nom</th><th>Activité</th><th>Limite supérieure</th><th>Horaires</th></tr>\n")
+            elif stage == "selected" and table_number == 11:
+                f.write(row([td("Nom"), td("Limite supérieure"), td("Restrictions"), td("Remarques")]))
+
+            for airspace in generate_airspaces(table_number, count, rng, borders):
+                if stage == "selected":
+                    f.write(selected_rows(table_number, airspace, spelling_rng))
+                else:
+                    f.write(parsed_rows(table_number, airspace))
+                stats["airspaces"] += 1
+                for token in airspace["geometry"]:
+                    stats[token[0]] += 1
+            f.write("</tbody></table>\n</div>\n")
+        f.write("</body>\n</html>")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic eAIP tables to measure how the pipeline scales with input size.")
+    parser.add_argument("-n", "--airspaces", type=int, help="Number of airspaces to generate")
+    parser.add_argument("-s", "--scale", type=float, default=1.0,
+                        help=f"Size relative to the France eAIP ({FRANCE_AIRSPACES} airspaces), used when --airspaces is not given")
+    parser.add_argument("--stage", choices=["selected", "cleaned"], default="selected",
+                        help="'selected' writes the input of stage 2, 'cleaned' the input of stages 4 and 40")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed gives the same file")
+    parser.add_argument("-o", "--output", help="Output file (default: the file name the next stage reads)")
+    args = parser.parse_args()
+
+    airspaces = args.airspaces if args.airspaces is not None else round(FRANCE_AIRSPACES * args.scale)
+    output_file = args.output
+    if not output_file:
+        output_file = "eaip_selected_tables.html" if args.stage == "selected" else "eaip_selected_tables_stage1_cleaned.html"
+
+    stats = write_tables(output_file, airspaces, args.stage, args.seed)
+    print(f"[INFO] {stats['point']} points, {stats['arc']} arcs, {stats['circle']} circles, {stats['border']} border tokens")
+    print(f"Saved {stats['airspaces']} synthetic airspaces to '{output_file}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import json
+import os
+from collections import OrderedDict
+
+
+class PersistentMemo:
+    """Memo of a function of one string, kept between runs in a JSON file.
+    Holds at most max_entries results, the least recently used being evicted first. version identifies the code
+    computing the results: a file written with another version is ignored, and replaced by save().
+    """
+
+    def __init__(self, path, version, max_entries):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.version:
+            print(f"[INFO] {self.path} was written by another version of the code, starting a new cache")
+            return
+        # Entries are stored from the least to the most recently used
+        self.entries.update(data.get("entries", []))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def lookup(self, key, compute):
+        """Return compute(key), computed only if key is not in the memo."""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            value = compute(key)
+            self.entries[key] = value
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def save(self):
+        """Write the memo to its file, through a temporary file so that an interrupted run leaves the old one."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "entries": list(self.entries.items())}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,70 @@
+import argparse
+
+from bs4 import BeautifulSoup
+
+from stages import load_stage
+
+
+def normalize_tables(input_file="eaip_tables.html", output_file="eaip_selected_tables_stage1_cleaned.html",
+                     debug_file=None, tables=None, workers=0, coords_cache_file=None):
+    """Run stages 1, 2 and 3 in one pass: select the tables of input_file, add their parsed rows and write only the
+    parsed name and parsed rows to output_file, the input of stages 4 and 40.
+    Only the selected containers are parsed, once; the parsed rows are serialized once and filtered without being
+    parsed again. debug_file, when given, receives the annotated tables like eaip_selected_tables_stage1.html.
+    workers is the number of worker processes the tables are processed in, see process_containers of stage 2.
+    coords_cache_file keeps the formatted coordinates between runs, when the tables are processed in this process.
+    Returns the number of tables written.
+    """
+    stage1 = load_stage("1-remove_unselected_tables.py")
+    stage2 = load_stage("2-process_tables.py")
+    stage3 = load_stage("3-clean_tables.py")
+
+    selected_containers = stage1.select_containers(input_file, stage1.tables_to_keep if tables is None else tables)
+    print(f"[INFO] Selected {len(selected_containers)} tables from '{input_file}'")
+
+    stage2.use_coords_cache(coords_cache_file, workers)
+
+    # The annotated tables are only rendered for the debug file, otherwise the original rows are left out
+    soup = BeautifulSoup("\n".join(selected_containers), "html.parser")
+    metrics = []
+    processed_containers = stage2.process_containers(soup.select(".table-container"), workers,
+                                                     annotated=bool(debug_file), metrics=metrics)
+    if stage2.coords_cache is not None:
+        stage2.save_coords_cache()
+    stage2.print_table_metrics(metrics)
+    html_content = stage2.make_html(processed_containers)
+
+    if debug_file:
+        with open(debug_file, "w", encoding="utf-8") as f:
+            f.write(html_content)
+        print(f"[INFO] Saved annotated tables to '{debug_file}'")
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        containers = stage3.clean_chunks([html_content], f)
+    print(f"Saved {containers} tables to '{output_file}'")
+    return containers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Select, parse and clean the eAIP tables in one pass "
+                                                 "(stages 1, 2 and 3).")
+    parser.add_argument("-i", "--input", default="eaip_tables.html", help="Tables fetched by stage 0")
+    parser.add_argument("-o", "--output", default="eaip_selected_tables_stage1_cleaned.html",
+                        help="Parsed name and parsed rows, the input of stages 4 and 40")
+    parser.add_argument("--debug-html", nargs="?", const="eaip_selected_tables_stage1.html", default=None,
+                        metavar="FILE",
+                        help="Also write the annotated tables, with every original row "
+                             "(default file: eaip_selected_tables_stage1.html)")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="Process the tables in this many worker processes (default: 0, all in this process)")
+    parser.add_argument("--coords-cache", default="format_coords_cache.json", metavar="FILE",
+                        help="Keep the formatted coordinates between runs in this file, empty to disable it; not used "
+                             "with workers (default: format_coords_cache.json)")
+    args = parser.parse_args()
+
+    normalize_tables(args.input, args.output, args.debug_html, workers=args.workers,
+                     coords_cache_file=args.coords_cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import re
+
+# Precompiled regular expressions shared by the pipeline stages, with their flags, so that no stage recompiles or
+# looks up a pattern per row or per token.
+
+# ===============================
+# Coordinates
+# ===============================
+
+REGEX_ARC = r'arc\s+(anti-horaire|horaire)\s+de\s+([\d.]+)\s*(NM|m|km)\s+de\s+rayon\s+centré\s+sur\s+(\d{6}[NS])(?:\s*@\s*(\d{7}[EW]))?'
+REGEX_CIRCLE = r'cercle\s+de\s+([\d.]+)\s*(NM|m|km)\s+de\s+rayon\s+centré\s+sur\s+(\d{6}[NS])(?:\s*@\s*(\d{7}[EW]))?'
+REGEX_COORD_PAIR = r'\d{6}[NSEW]\s*@\s*\d{7}[NSEW]'
+REGEX_COORD_SINGLE = r'\d{6,7}[NSEW]'
+
+ARC_PATTERN = re.compile(REGEX_ARC, re.IGNORECASE)
+CIRCLE_PATTERN = re.compile(REGEX_CIRCLE, re.IGNORECASE)
+COORD_PAIR_PATTERN = re.compile(REGEX_COORD_PAIR, re.IGNORECASE)
+# substract_lonLat only takes pairs with upper case hemispheres
+CASED_COORD_PAIR_PATTERN = re.compile(REGEX_COORD_PAIR)
+# Latitude and longitude of a pair as groups 1 and 2
+COORD_PAIR_GROUPS_PATTERN = re.compile(rf'({REGEX_COORD_SINGLE})\s*@\s*({REGEX_COORD_SINGLE})', re.IGNORECASE)
+COORD_SINGLE_PATTERN = re.compile(REGEX_COORD_SINGLE)
+# Pair as written by format_coords, without spaces
+JOINED_COORD_PAIR_PATTERN = re.compile(r'(\d{6}[NSEW]@\d{7}[NSEW])')
+
+# ===============================
+# Token classification
+# ===============================
+
+# Phrases process_coordinates looks for (lower case) to tell arcs, circles, borders, parks and axes from points
+TOKEN_KEYWORDS = (
+    "arc horaire",
+    "arc anti-horaire",
+    "cercle de",
+    "centré sur",
+    "frontière",
+    "la côte atlantique française",
+    "côte corse",
+    "côte méditérrannéenne",
+    "limite des eaux territoriales atlantique françaises",
+    "limite des eaux",
+    "parc national des écrins",
+    "axe"
+)
+TOKEN_KEYWORD_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in TOKEN_KEYWORDS))
+NO_KEYWORDS = frozenset()
+
+
+def token_keywords(token):
+    """Return the set of TOKEN_KEYWORDS contained in token, ignoring case.
+    Coordinate tokens contain none of them and are rejected with a single scan of the token.
+    """
+    lower_token = token.lower()
+    if not TOKEN_KEYWORD_PATTERN.search(lower_token):
+        return NO_KEYWORDS
+    return {keyword for keyword in TOKEN_KEYWORDS if keyword in lower_token}
+
+
+# ===============================
+# Table text (stage 2)
+# ===============================
+
+# Parenthesis group after a distance in km giving it in NM, e.g. "5 km (2.7 NM)"
+KM_NM_PATTERN = re.compile(r'(?i)(km)\s*\([^)]*nm\)')
+# One pass over the cleaned text finds the three kinds of tokens, in this order of priority:
+# - a latitude/longitude pair separated by '-' or ',' (groups 1 to 4), written 'DDMMSSN@DDDMMSSE'
+# - a coordinate with spaces before its hemisphere letter (groups 5 and 6), written without them
+# - the ' - ' separator of the points (group 7)
+COORD_TOKEN_PATTERN = re.compile(r'(\d{6})\s*([NSEW])\s*[-,]\s*(\d{7})\s*([NSEW])|(\d{6})\s+([NSEW])|( - )')
+# Without ' - ' separators the points are the pairs separated by commas
+PAIR_COMMA_PATTERN = re.compile(r'(?<=\d{6}[NSEW]@\d{7}[NSEW])\s*,\s*(?=\d{6}[NSEW]@\d{7}[NSEW])')
+SPACED_COORD_PATTERN = re.compile(r'(\d{6})\s+([NSEW])')
+# Coordinate as written in the eAIP, e.g. 46°30'00"N
+DMS_COORD_PATTERN = re.compile(r"\d{2}°\d{2}(?:'|’)\d{2}(?:\"|”)[NSEW]")
+# Start of the geometry in the first cell of a row, after the name of the area
+GEOMETRY_START_PATTERN = re.compile(r"Cercle|Secteur|(\d{2}°\d{2}(?:'|’)\d{2}(?:\"|”)[NSEW])|(\d{6}[NSEW])|(\d{6} [NSEW])")
+PARACHUTAGE_PATTERN = re.compile(r'(?i)parachutage')
+# Paragraph of dashes between the upper and lower limits of an altitude cell
+ALTITUDE_SEPARATOR_PATTERN = re.compile(r'-{3,}')
+AERODROME_SUFFIX_PATTERN = re.compile(r'Aérodrome.*')
+
+# ===============================
+# Whitespace
+# ===============================
+
+CONTROL_CHAR_PATTERN = re.compile(r'[\r\n\t\x00-\x1F\x7F]')
+CONTROL_CHARS_PATTERN = re.compile(r'[\x00-\x1F]+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# ===============================
+# Altitudes (stage 40)
+# ===============================
+
+FLIGHT_LEVEL_PATTERN = re.compile(r'\b[Ff][Ll]\s*\d')
+FLIGHT_LEVEL_VALUE_PATTERN = re.compile(r'\b[Ff][Ll]\s*(\d+)\b')
+# OpenAir names of the altitude references
+ALTITUDE_REFERENCES = [
+    (re.compile(r"\bSFC\b"), "GND"),
+    (re.compile(r"\bASFC\b"), "AGL"),
+    (re.compile(r"\bAMSL\b"), "MSL"),
+    (re.compile(r"\bUNL\b"), "UNL")
+]
+VALUE_UNIT_PATTERN = re.compile(r"^(\d+)([a-zA-Z]+)$")
+DIGIT_PATTERN = re.compile(r"\d")
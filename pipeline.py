@@ -0,0 +1,481 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+import borders
+from stages import BORDER_FILES, load_stage
+
+# Size of the pieces the stage1_cleaned files are read in
+CHUNK_SIZE = 1 << 16
+
+
+# ===============================
+# Streaming reader
+# ===============================
+
+class ParsedRowReader(HTMLParser):
+    """Incremental reader of the parsed rows of eaip_selected_tables_stage1_cleaned.html.
+    feed() it pieces of the file and take the completed rows from `rows` as (container_index, name, cells) tuples:
+    the cell texts and the name of the last parsed-name row of the table are those stages 4 and 40 read with
+    get_text(strip=True).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.container_index = -1
+        self.current_name = None
+        self.row_kind = None
+        self.cells = []
+        self.cell = None
+        self.text = []
+
+    def flush_text(self):
+        # get_text(strip=True) strips every text node on its own and joins them without separator
+        if self.text:
+            text = "".join(self.text).strip()
+            if text:
+                self.cell.append(text)
+            self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.cell is not None:
+            self.flush_text()
+        classes = (dict(attrs).get("class") or "").split()
+        if tag == "div" and "table-container" in classes:
+            self.container_index += 1
+            self.current_name = None
+        elif tag == "tr" and self.container_index >= 0:
+            if "parsed-name" in classes:
+                self.row_kind = "name"
+            elif "parsed-row" in classes:
+                self.row_kind = "row"
+            else:
+                self.row_kind = None
+            self.cells = []
+        elif tag == "td" and self.row_kind:
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if self.cell is not None:
+            self.flush_text()
+            if tag in ("td", "tr"):
+                self.cells.append("".join(self.cell))
+                self.cell = None
+        if tag == "tr" and self.row_kind:
+            if self.row_kind == "name":
+                if self.cells:
+                    self.current_name = self.cells[0]
+            else:
+                self.rows.append((self.container_index, self.current_name, self.cells))
+            self.row_kind = None
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.text.append(data)
+
+
+def iter_rows(input_file, chunk_size=CHUNK_SIZE):
+    """Yield the (container_index, name, cells) of the parsed rows of a stage1_cleaned file,
+    reading it piece by piece so that memory does not grow with the file."""
+    reader = ParsedRowReader()
+    with open(input_file, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            reader.feed(chunk)
+            yield from reader.rows
+            reader.rows.clear()
+    reader.close()
+    yield from reader.rows
+
+
+class ContainerReader(HTMLParser):
+    """Incremental reader of the .table-container elements of eaip_selected_tables.html.
+    feed() it pieces of the file and take the completed containers from `containers` as their HTML, sliced out of the
+    text as it is: only the text from the start of the current container, or of the last tag outside one, is kept.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.containers = []
+        # The text fed from the file offset `start` on
+        self.text = ""
+        self.start = 0
+        # Line of getpos() and file offset of its first character, see tag_offset()
+        self.line = 1
+        self.line_start = 0
+        # Depth of the div elements open in the current container, 0 outside one
+        self.depth = 0
+
+    def feed(self, data):
+        self.text += data
+        super().feed(data)
+
+    def tag_offset(self):
+        """File offset of the tag being handled, from the (line, column) of getpos()."""
+        line, column = self.getpos()
+        while self.line < line:
+            # No newline lies between line_start and start, see drop()
+            self.line_start = self.start + self.text.index("\n", max(self.line_start - self.start, 0)) + 1
+            self.line += 1
+        return self.line_start + column
+
+    def drop(self, offset):
+        """Forget the text before offset, the offset of the tag being handled."""
+        self.text = self.text[offset - self.start:]
+        self.start = offset
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth:
+            if tag == "div":
+                self.depth += 1
+        elif tag == "div" and "table-container" in (dict(attrs).get("class") or "").split():
+            self.drop(self.tag_offset())
+            self.depth = 1
+        else:
+            self.drop(self.tag_offset())
+
+    def handle_endtag(self, tag):
+        if not self.depth:
+            self.drop(self.tag_offset())
+        elif tag == "div":
+            self.depth -= 1
+            if not self.depth:
+                offset = self.tag_offset()
+                self.containers.append(self.text[:self.text.index(">", offset - self.start) + 1])
+                self.drop(offset)
+
+
+def iter_containers(input_file, chunk_size=CHUNK_SIZE):
+    """Yield the HTML of the .table-container elements of an eaip_selected_tables.html file, in document order,
+    reading it piece by piece so that memory does not grow with the file."""
+    reader = ContainerReader()
+    with open(input_file, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            reader.feed(chunk)
+            yield from reader.containers
+            reader.containers.clear()
+    reader.close()
+    yield from reader.containers
+
+
+def iter_selected_rows(input_file):
+    """Yield the (container_index, name, cells) of the parsed rows of an eaip_selected_tables.html file (stage 1),
+    taken from the records of the stage 2 table processors: no stage1 or stage1_cleaned HTML is written or read.
+    The tables are processed one container at a time, as they are read.
+    """
+    stage2 = load_stage("2-process_tables.py")
+    metrics = []
+    for container_index, html in enumerate(iter_containers(input_file)):
+        for name, cells in stage2.container_html_records(html, metrics):
+            yield container_index, name, cells
+    stage2.print_table_metrics(metrics)
+
+
+# ===============================
+# Streaming writers
+# ===============================
+
+class FeatureCollectionWriter:
+    """Write a GeoJSON FeatureCollection one feature at a time, in the layout of json.dump(indent=2)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.f = open(path, "w", encoding="utf-8")
+        self.f.write('{\n  "type": "FeatureCollection",\n  "features": [')
+
+    def write(self, feature):
+        self.f.write(",\n    " if self.count else "\n    ")
+        self.f.write(json.dumps(feature, indent=2).replace("\n", "\n    "))
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n  ]\n}" if self.count else "]\n}")
+        self.f.close()
+
+
+# ===============================
+# Streaming pipeline
+# ===============================
+
+class PipelineOutputs:
+    """Writers of the streaming modes: features go through stages 5, 6 and 7, OpenAir airspaces to the stage 40 file.
+
+    outputs maps "geojson", "processed", "openaip", "filtered" and "openair" to the files stages 4, 5, 6, 7 and 40
+    write. The GeoJSON chain is skipped when outputs["geojson"] is empty, the OpenAir one when outputs["openair"] is.
+    """
+
+    def __init__(self, outputs, zsm_file="zsm.geojson"):
+        self.stage4 = load_stage("4-make_airspace_geojson.py")
+        self.stage5 = load_stage("5-process_geojson.py")
+        self.stage6 = load_stage("6-make_openaip_geojson.py")
+        self.stage7 = load_stage("7-filter_airspace.py")
+        self.stage40 = load_stage("40-make_openair.py")
+        self.zsm_file = zsm_file
+        self.stats4 = self.stage4.new_stats()
+        self.stats40 = self.stage40.new_stats()
+        self.writers = []
+        if outputs.get("geojson"):
+            self.writers = [FeatureCollectionWriter(outputs[key]) for key in ("geojson", "processed", "openaip", "filtered")]
+        self.openair_file = outputs.get("openair")
+        self.openair = None
+        if self.openair_file:
+            self.openair = open(self.openair_file, "w", encoding="utf-8")
+            self.stage40.write_openair_file_header(self.openair)
+
+    def write_feature(self, feature):
+        # Each stage changes the feature in place, so it is written before the next stage runs
+        geojson, processed, openaip, filtered = self.writers
+        geojson.write(feature)
+        processed.write(self.stage5.process_feature(feature))
+        openaip.write(self.stage6.convert_feature(feature))
+        feature = self.stage7.process_feature(feature)
+        if feature is not None:
+            filtered.write(feature)
+
+    def write_airspace(self, airspace):
+        self.stage40.write_openair_feature(self.openair, *airspace)
+        self.stats40["processed"] += 1
+
+    def finish(self):
+        """Add the ZSM airspaces, print the statistics of stages 4 and 40 and close the files."""
+        try:
+            if self.writers:
+                self.stage4.print_stats(self.stats4, self.writers[0].count)
+                zsm = 0
+                for feature in self.stage4.zsm_features(self.zsm_file):
+                    self.write_feature(feature)
+                    zsm += 1
+                print(f"[INFO] ZSM airspaces: {zsm}")
+            if self.openair:
+                for airspace in self.stage40.zsm_airspaces(self.stats40, self.zsm_file):
+                    self.write_airspace(airspace)
+                self.stage40.print_stats(self.stats40)
+        finally:
+            self.close()
+        for writer in self.writers:
+            print(f"Saved {writer.count} features to '{writer.path}'")
+        if self.openair:
+            print(f"Saved {self.stats40['processed']} airspaces to '{self.openair_file}'")
+
+    def close(self):
+        for writer in self.writers:
+            if not writer.f.closed:
+                writer.close()
+        if self.openair and not self.openair.closed:
+            self.openair.close()
+
+
+def run_streaming(input_files, outputs, border_files=BORDER_FILES, parks_file="parks.json", zsm_file="zsm.geojson",
+                  selected=False):
+    """Run stages 4, 5, 6, 7 and 40 on the parsed rows of input_files, one airspace at a time.
+    Only the current airspace is held in memory, so the input files can hold any number of countries or cycles.
+    With selected, the input files are eaip_selected_tables.html files, whose tables are processed by stage 2 first.
+    """
+    out = PipelineOutputs(outputs, zsm_file)
+    parks_data = out.stage4.read_parks_json(parks_file)
+    read_rows = iter_selected_rows if selected else iter_rows
+    try:
+        for input_file in input_files:
+            for container_index, name, cells in read_rows(input_file):
+                if out.writers:
+                    feature = out.stage4.make_airspace_feature(name, container_index, cells, parks_data, border_files, out.stats4)
+                    if feature:
+                        out.write_feature(feature)
+                if out.openair:
+                    airspace = out.stage40.make_openair_airspace(name, container_index, cells, parks_data, border_files, out.stats40)
+                    if airspace:
+                        out.write_airspace(airspace)
+    except BaseException:
+        out.close()
+        raise
+    out.finish()
+
+
+# ===============================
+# Pipelined mode
+# ===============================
+
+def build_airspace(container_index, name, cells, geojson, openair, border_files, parks_file):
+    """Geometry step of the pipelined mode, run in the worker processes.
+    Returns the stage 4 feature and the stage 40 airspace of one parsed row (None when skipped or not asked for),
+    followed by the stats counters of both stages for this row.
+    """
+    stage4 = load_stage("4-make_airspace_geojson.py")
+    stage40 = load_stage("40-make_openair.py")
+    # Read by the first call in the worker process
+    parks_data = stage4.read_parks_json(parks_file)
+    stats4 = stage4.new_stats()
+    stats40 = stage40.new_stats()
+    feature = None
+    airspace = None
+    if geojson:
+        feature = stage4.make_airspace_feature(name, container_index, cells, parks_data, border_files, stats4)
+    if openair:
+        airspace = stage40.make_openair_airspace(name, container_index, cells, parks_data, border_files, stats40)
+    return feature, airspace, stats4, stats40
+
+
+async def aiter_rows(input_file, chunk_size=CHUNK_SIZE):
+    """Like iter_rows, reading the file in a thread so that the event loop keeps running."""
+    loop = asyncio.get_running_loop()
+    reader = ParsedRowReader()
+    with open(input_file, "r", encoding="utf-8") as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, chunk_size)
+            if not chunk:
+                break
+            reader.feed(chunk)
+            for row in reader.rows:
+                yield row
+            reader.rows.clear()
+    reader.close()
+    for row in reader.rows:
+        yield row
+
+
+async def aiter_selected_rows(input_file):
+    """Like iter_selected_rows, processing the tables in a thread so that the event loop keeps running."""
+    loop = asyncio.get_running_loop()
+    stage2 = load_stage("2-process_tables.py")
+    metrics = []
+    reader = ContainerReader()
+    container_index = 0
+    with open(input_file, "r", encoding="utf-8") as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, CHUNK_SIZE)
+            if chunk:
+                reader.feed(chunk)
+            else:
+                reader.close()
+            for html in reader.containers:
+                records = await loop.run_in_executor(None, stage2.container_html_records, html, metrics)
+                for name, cells in records:
+                    yield container_index, name, cells
+                container_index += 1
+            reader.containers.clear()
+            if not chunk:
+                break
+    stage2.print_table_metrics(metrics)
+
+
+async def pipelined(input_files, out, border_files, parks_file, pool, queue_size, selected=False):
+    loop = asyncio.get_running_loop()
+    # Geometry results in input order; the bound limits the rows read ahead of the writers
+    results = asyncio.Queue(queue_size)
+    features = asyncio.Queue(queue_size)
+    airspaces = asyncio.Queue(queue_size)
+    geojson = bool(out.writers)
+    openair = bool(out.openair)
+
+    async def parse():
+        read_rows = aiter_selected_rows if selected else aiter_rows
+        for input_file in input_files:
+            async for container_index, name, cells in read_rows(input_file):
+                future = loop.run_in_executor(pool, build_airspace, container_index, name, cells,
+                                              geojson, openair, border_files, parks_file)
+                await results.put(future)
+        await results.put(None)
+
+    async def collect():
+        while True:
+            future = await results.get()
+            if future is None:
+                break
+            feature, airspace, stats4, stats40 = await future
+            for key, value in stats4.items():
+                out.stats4[key] += value
+            for key, value in stats40.items():
+                out.stats40[key] += value
+            if feature:
+                await features.put(feature)
+            if airspace:
+                await airspaces.put(airspace)
+        await features.put(None)
+        await airspaces.put(None)
+
+    async def write(queue, write_item):
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            write_item(item)
+
+    await asyncio.gather(parse(), collect(), write(features, out.write_feature), write(airspaces, out.write_airspace))
+
+
+def run_pipelined(input_files, outputs, border_files=BORDER_FILES, parks_file="parks.json", zsm_file="zsm.geojson",
+                  workers=None, queue_size=64, selected=False):
+    """Run stages 4, 5, 6, 7 and 40 like run_streaming, with parsing, geometry and writing overlapping:
+    a parser task feeds the parsed rows to a pool of worker processes building the geometries, and writer tasks
+    serialize the results in input order. Tasks are connected by bounded queues, so memory stays constant.
+    The workers walk the borders like this process, see borders.enable_endpoint_projection.
+    """
+    out = PipelineOutputs(outputs, zsm_file)
+    initializer = borders.enable_endpoint_projection if borders.project_endpoints else None
+    try:
+        with ProcessPoolExecutor(workers, initializer=initializer) as pool:
+            asyncio.run(pipelined(input_files, out, border_files, parks_file, pool, queue_size, selected))
+    except BaseException:
+        out.close()
+        raise
+    out.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run stages 4, 5, 6, 7 and 40 in one pass with constant memory, "
+                                                 "streaming the airspaces one at a time from parsing to the writers.")
+    parser.add_argument("inputs", nargs="*", default=["eaip_selected_tables_stage1_cleaned.html"],
+                        help="stage1_cleaned files, read one after the other (default: eaip_selected_tables_stage1_cleaned.html)")
+    parser.add_argument("--geojson", default="airspace.geojson", help="Output of stage 4, empty to skip stages 4 to 7")
+    parser.add_argument("--processed", default="airspace_processed.geojson", help="Output of stage 5")
+    parser.add_argument("--openaip", default="airspace_openAIP_unfiltered.geojson", help="Output of stage 6")
+    parser.add_argument("--filtered", default="airspace_filtered.geojson", help="Output of stage 7")
+    parser.add_argument("--openair", default="airspace.openair", help="Output of stage 40, empty to skip it")
+    parser.add_argument("--parks", default="parks.json", help="Parks file used by stages 4 and 40")
+    parser.add_argument("--selected", action="store_true",
+                        help="The inputs are eaip_selected_tables.html files: process their tables with stage 2 one "
+                             "at a time as they are read, instead of reading stage1_cleaned files")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="Build the geometries in this many worker processes, overlapping parsing, geometry "
+                             "and writing (default: 0, everything in one process)")
+    parser.add_argument("--queue-size", type=int, default=64, help="Bound of the queues between the pipelined tasks")
+    parser.add_argument("--project-borders", action="store_true",
+                        help="Start and end the border walks on the projection of the points before and after a "
+                             "border token, instead of the closest point of the border")
+    args = parser.parse_args()
+
+    if args.project_borders:
+        borders.enable_endpoint_projection()
+
+    outputs = {
+        "geojson": args.geojson,
+        "processed": args.processed,
+        "openaip": args.openaip,
+        "filtered": args.filtered,
+        "openair": args.openair
+    }
+    border_files = {
+        "france": "France.geojson",
+        "andorra": "Andorre.geojson",
+        "switzerland": "Suisse.geojson",
+        "atlantique": "France_coastline.geojson",
+        "corse": "Corsica.geojson"
+    }
+    if args.workers:
+        run_pipelined(args.inputs, outputs, border_files, args.parks, workers=args.workers, queue_size=args.queue_size,
+                      selected=args.selected)
+    else:
+        run_streaming(args.inputs, outputs, border_files, args.parks, selected=args.selected)
+
+
+if __name__ == '__main__':
+    main()
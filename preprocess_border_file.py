@@ -1,9 +1,11 @@
 # Temporary function for debugging 'Frontière' tokens
 
 import json
-import re
 from bs4 import BeautifulSoup
 
+from borders import load_border, shortest_border_path
+from patterns import JOINED_COORD_PAIR_PATTERN
+
 def convert_coord(coord_str):
     # Remove any spaces
     coord_str = coord_str.strip()
@@ -31,7 +33,7 @@ def convert_coord(coord_str):
     return decimal
 
 # Additional filtration: if candidate['begining'] or candidate['end'] contains a lat@lon coordinate, discard extra text
-coord_pair_pattern = re.compile(r'(\d{6}[NSEW]@\d{7}[NSEW])')
+coord_pair_pattern = JOINED_COORD_PAIR_PATTERN
 
 def filter_coordinate(text):
     m = coord_pair_pattern.search(text)
@@ -59,32 +61,6 @@ def france_only(candidates):
             # print(f"[WARN] Discarding candidate not matching 'frontière franco-': {candidate['token']}")
     return filtered
 
-def read_border_geojson(border_file):
-    try:
-        with open(border_file, 'r', encoding='utf-8') as bf:
-            france_geo = json.load(bf)
-            if 'features' in france_geo and len(france_geo['features']) > 0:
-                feature = france_geo['features'][0]
-                geom = feature.get('geometry', {})
-                geo_type = geom.get('type', '').lower()
-                if geo_type == 'polygon':
-                    border_coords = geom.get('coordinates', [])
-                    if border_coords and isinstance(border_coords, list):
-                        border_coords = border_coords[0]
-                    else:
-                        border_coords = []
-                elif geo_type == 'linestring':
-                    border_coords = geom.get('coordinates', [])
-                else:
-                    border_coords = []
-            else:
-                border_coords = []
-            print(f"[INFO] Loaded border from '{border_file}' with {len(border_coords)} coordinates.")
-            return border_coords
-    except Exception as e:
-        print(f"[ERROR] Error reading {border_file}: {e}")
-        return []
-
 def read_airspace_html(html_file):
     try:
         with open(html_file, 'r', encoding='utf-8') as f:
@@ -160,11 +136,12 @@ def get_valid_candidates(candidates):
             not_ready_tokens += 1
     return valid_candidates, ready_tokens, not_ready_tokens
 
-def get_border_match_count(valid_candidates, border_coords):
-    """Return the number of candidates whose 'begining' and 'end' coordinates are exactly present in border_coords.
+def get_border_match_count(valid_candidates, border):
+    """Return the number of candidates whose 'begining' and 'end' coordinates are exactly present in the border.
     valid_candidates: list of candidates that have valid 'lat@lon' strings
-    border_coords: list of [lon, lat] pairs from the geojson border
+    border: Border of the geojson border file, see load_border
     """
+    border_coords = list(zip(border.lons, border.lats))
     border_match_count = 0
     for candidate in valid_candidates:
         try:
@@ -217,72 +194,41 @@ def format_dms(value, is_latitude):
 
 # Update the get_shortest_path_for_candidate function to use format_dms when converting border points
 
-def get_shortest_path_for_candidate(candidate, border_coords):
+def get_shortest_path_for_candidate(candidate, border):
     """For a given candidate with 'begining' and 'end' in 'lat@lon' format,
-    find the closest points in border_coords and return the shortest path between them
+    find the closest points of the border and return the shortest path between them
     as a list of points in 'lat@lon' format (formatted as DMS, e.g., 474600N@0073200E).
-    border_coords is a list of [lon, lat] pairs.
+    border is the Border of the geojson border file, see load_border.
     """
     # Convert candidate beginning and end to [lon, lat] using convert_coord
     try:
         b_lat_str, b_lon_str = candidate["begining"].split('@')
         b_lat = convert_coord(b_lat_str)
         b_lon = convert_coord(b_lon_str)
-        candidate_begin = (b_lon, b_lat)  # border_coords order
+        candidate_begin = (b_lon, b_lat)  # border order
     except Exception as e:
         return []
     try:
         e_lat_str, e_lon_str = candidate["end"].split('@')
         e_lat = convert_coord(e_lat_str)
         e_lon = convert_coord(e_lon_str)
-        candidate_end = (e_lon, e_lat)  # border_coords order
+        candidate_end = (e_lon, e_lat)  # border order
     except Exception as e:
         return []
 
-    def find_closest_index(pt, coords):
-        best_idx = None
-        best_dist = None
-        for idx, coord in enumerate(coords):
-            dist = (pt[0] - coord[0])**2 + (pt[1] - coord[1])**2
-            if best_dist is None or dist < best_dist:
-                best_dist = dist
-                best_idx = idx
-        return best_idx
-
-    i_begin = find_closest_index(candidate_begin, border_coords)
-    i_end = find_closest_index(candidate_end, border_coords)
-    if i_begin is None or i_end is None:
+    chosen_path = shortest_border_path(border, candidate_begin, candidate_end)
+    if chosen_path is None:
         print(f"[DEBUG] No closest index found for candidate {candidate['token']}")
         return []
 
-    def circular_path(i, j, coords):
-        if i <= j:
-            return coords[i:j+1]
-        else:
-            return coords[i:] + coords[:j+1]
-
-    path1 = circular_path(i_begin, i_end, border_coords)
-    path2 = circular_path(i_end, i_begin, border_coords)[::-1]  # reverse to go from begin to end
-
-    def path_length(path):
-        total = 0.0
-        for k in range(len(path) - 1):
-            dx = path[k+1][0] - path[k][0]
-            dy = path[k+1][1] - path[k][1]
-            total += (dx*dx + dy*dy)**0.5
-        return total
-
-    length1 = path_length(path1)
-    length2 = path_length(path2)
-    chosen_path = path1 if length1 <= length2 else path2
-
     # Convert chosen_path (list of [lon, lat]) to list of 'lat@lon' strings using DMS format
     result = [f"{format_dms(pt[1], True)}@{format_dms(pt[0], False)}" for pt in chosen_path]
     return result
 
 def preprocess_frontiere_tokens(input_html_file, border_file):
     print("[INFO] Starting preprocessing of 'Frontière' tokens...")
-    border_coords = read_border_geojson(border_file)
+    border = load_border(border_file)
+    print(f"[INFO] Loaded border from '{border_file}' with {len(border)} coordinates.")
 
     soup = read_airspace_html(input_html_file)
     if soup is None:
@@ -304,7 +250,7 @@ def preprocess_frontiere_tokens(input_html_file, border_file):
     valid_candidates, ready_tokens, not_ready_tokens = get_valid_candidates(frontiere_candidates)
     print(f"\nremaining {len(valid_candidates)}/{toTreat} candidates after get_valid_candidates\n")
 
-    border_match_count = get_border_match_count(valid_candidates, border_coords)
+    border_match_count = get_border_match_count(valid_candidates, border)
 
     print(f"\n[SUMMARY] 'Frontière' candidates: total = {total_tokens}")
     print(f"[SUMMARY] Ready candidates (with exactly 2 lat@lon): {ready_tokens}")
@@ -313,7 +259,7 @@ def preprocess_frontiere_tokens(input_html_file, border_file):
 
     # For each valid candidate, compute and print the shortest path along the border
     for candidate in valid_candidates:
-        route = get_shortest_path_for_candidate(candidate, border_coords)
+        route = get_shortest_path_for_candidate(candidate, border)
         print(f"Candidate token '{candidate['token']}': shortest path -> {len(route)}")
 
 
@@ -0,0 +1,39 @@
+import importlib.util
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Border files used by 4-make_airspace_geojson.py and 40-make_openair.py
+BORDER_FILES = {
+    "france": os.path.join(ROOT, "France.geojson"),
+    "andorra": os.path.join(ROOT, "Andorre.geojson"),
+    "switzerland": os.path.join(ROOT, "Suisse.geojson"),
+    "atlantique": os.path.join(ROOT, "France_coastline.geojson"),
+    "corse": os.path.join(ROOT, "Corsica.geojson")
+}
+
+_loaded = {}
+
+
+def load_stage(filename):
+    """Import one of the numbered pipeline scripts (e.g. '4-make_airspace_geojson.py') as a module.
+    The scripts cannot be imported by name because of the leading number and the dashes.
+    Modules are cached, so every caller shares the same instance.
+    """
+    path = filename if os.path.isabs(filename) else os.path.join(ROOT, filename)
+    if path in _loaded:
+        return _loaded[path]
+    module_name = "stage_" + os.path.splitext(os.path.basename(path))[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _loaded[path] = module
+    return module
+
+
+def call_stage(filename, function_name, *args):
+    """Call a function of one of the numbered pipeline scripts by name.
+    Worker processes are given this function: those of the scripts cannot be pickled, their modules are not
+    importable by name.
+    """
+    return getattr(load_stage(filename), function_name)(*args)
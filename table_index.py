@@ -0,0 +1,50 @@
+import json
+import mmap
+import os
+
+
+def index_file_for(html_file):
+    """Name of the sidecar index of an HTML file: eaip_tables.html -> eaip_tables.index.json"""
+    return os.path.splitext(html_file)[0] + ".index.json"
+
+
+def file_signature(html_file):
+    """Size and modification time of html_file, which the index must have been written for."""
+    stat = os.stat(html_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_index(html_file, containers):
+    """Write the sidecar index of html_file, once html_file is written and closed.
+    containers is the list of [start, end] byte offsets of every .table-container element, in document order.
+    """
+    size, mtime_ns = file_signature(html_file)
+    index = {
+        "file": os.path.basename(html_file),
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "containers": containers
+    }
+    with open(index_file_for(html_file), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+
+def read_containers(html_file, indices):
+    """Return the HTML of the containers at the given positions, sliced out of html_file with its sidecar index.
+    Positions past the last container are dropped. Returns None when there is no index or it does not match the file
+    (another size or modification time, e.g. the file was fetched again), in which case the caller has to parse the
+    file.
+    """
+    index_file = index_file_for(html_file)
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (index.get("size"), index.get("mtime_ns")) != file_signature(html_file):
+        print(f"[WARN] {index_file} does not match {html_file}, ignoring it")
+        return None
+
+    containers = index["containers"]
+    with open(html_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [mm[containers[i][0]:containers[i][1]].decode("utf-8") for i in indices if i < len(containers)]
@@ -0,0 +1,105 @@
+# Layout of the selected eAIP tables, by table number (the position of the table in eaip_selected_tables.html, which
+# is also the container index of stages 4 and 40).
+#
+# The spec of a table with a regular layout drives its processor in stage 2 (see compile_table there):
+# - "name_row": how name rows are told from content rows
+#     "strong":    the row has a <td> or <th> with class 'strong', whose text is the name
+#     "two_cells": the row has 2 cells, whose texts joined are the name
+# - "rewrite_name": write the cleaned name back into the 'strong' cell of the name row (default True)
+# - "reject_names": name rows rejected with the row that follows them
+# - "cells": number of cells of the content rows, rows with another count are ignored
+# - "coords": column of the coordinates in the content rows (default 0)
+# - "carry_coords": an empty coordinate cell takes the coordinates of the previous content row (default True)
+# Tables without "name_row" have a processor of their own in stage 2.
+#
+# "fields" maps the cells of the parsed rows written by stage 2 to the fields of an airspace, read by stages 4 and
+# 40 with row_fields. A value is the position of the cell in the parsed row (0 being the coordinates), or a constant
+# string. "altitudes" is a cell holding both limits, written 'upper ------------ lower' by altitude_text.
+# The coordinates are read with row_coords.
+
+import json
+
+from patterns import CONTROL_CHARS_PATTERN, WHITESPACE_PATTERN
+
+ALTITUDE_SEPARATOR = "------------"
+
+# Fields of an airspace, empty unless the table has them
+FIELDS = ("icao_class", "upper", "lower", "radio", "schedule", "restrictions", "remarks")
+
+# Class A-E airspaces
+CONTROLLED_FIELDS = {"icao_class": 1, "altitudes": 2, "radio": 3, "remarks": 4}
+# Restricted and danger areas
+AREA_FIELDS = {"altitudes": 1, "schedule": 2, "restrictions": 3, "remarks": 4}
+
+TABLE_SPECS = {
+    0: {"name_row": "strong", "cells": 5, "fields": CONTROLLED_FIELDS},
+    1: {"name_row": "strong", "cells": 5, "reject_names": ["LTA FRANCE partie 2"], "fields": CONTROLLED_FIELDS},
+    # Names at the start of the coordinates, TA prefix rows
+    2: {"fields": CONTROLLED_FIELDS},
+    3: {"name_row": "strong", "cells": 5, "fields": CONTROLLED_FIELDS},
+    # Class G airspaces
+    4: {"name_row": "strong", "cells": 4, "fields": {"altitudes": 1, "radio": 2, "remarks": 3}},
+    5: {"name_row": "two_cells", "cells": 5, "fields": AREA_FIELDS},
+    6: {"name_row": "strong", "rewrite_name": False, "cells": 5, "fields": AREA_FIELDS},
+    # Prohibited areas: names at the start of the coordinates, altitudes split in stage 2
+    7: {"fields": {"altitudes": 1, "restrictions": 2}},
+    8: {"name_row": "two_cells", "cells": 5, "fields": AREA_FIELDS},
+    9: {"name_row": "strong", "cells": 5, "fields": AREA_FIELDS},
+    # Training areas: rows in pairs of name and content
+    10: {"fields": {"altitudes": 1, "remarks": 2}},
+    # Low-level areas: rows in pairs of name and content
+    11: {"fields": {"upper": 1, "lower": "GND", "restrictions": 2, "remarks": 3}},
+    12: {"name_row": "strong", "cells": 5, "fields": CONTROLLED_FIELDS},
+}
+
+
+def altitude_text(upper, lower):
+    """Write the upper and lower limits as the altitude cell of a parsed row."""
+    return " ".join(part for part in (upper, ALTITUDE_SEPARATOR, lower) if part)
+
+
+def split_altitudes(text):
+    """Return the (upper, lower) limits of the altitude cell of a parsed row."""
+    alt_parts = text.split(ALTITUDE_SEPARATOR)
+    return alt_parts[0].strip(), alt_parts[1].strip()
+
+
+def compile_fields(fields):
+    """Return the function reading the fields of a parsed row from its cell texts, for a "fields" mapping."""
+    constants = {field: value for field, value in fields.items() if isinstance(value, str)}
+    columns = [(field, column) for field, column in fields.items()
+               if field != "altitudes" and not isinstance(column, str)]
+    altitudes = fields.get("altitudes")
+    empty = dict.fromkeys(FIELDS, "")
+    empty.update(constants)
+
+    def extract(cells):
+        row = dict(empty)
+        for field, column in columns:
+            row[field] = cells[column]
+        if altitudes is not None:
+            row["upper"], row["lower"] = split_altitudes(cells[altitudes])
+        return row
+    return extract
+
+
+FIELD_EXTRACTORS = {table_number: compile_fields(spec["fields"]) for table_number, spec in TABLE_SPECS.items()}
+NO_FIELDS = compile_fields({})
+
+
+def row_fields(table_number, cells):
+    """Return the fields of a parsed row of the table as a dict, see FIELDS. Tables without a spec have none."""
+    return FIELD_EXTRACTORS.get(table_number, NO_FIELDS)(cells)
+
+
+def row_coords(cells):
+    """Return the points of a parsed row as a new list.
+    The records of stage 2 carry them as a tuple; read from the cleaned file they are the JSON array of the first
+    cell, whose whitespace is normalized as stage 2 does. Raises ValueError if that text is not a JSON array.
+    """
+    coords = cells[0]
+    if isinstance(coords, tuple):
+        return list(coords)
+    clean_text = CONTROL_CHARS_PATTERN.sub(' ', coords)
+    clean_text = WHITESPACE_PATTERN.sub(' ', clean_text).strip()
+    return json.loads(clean_text)